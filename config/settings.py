@@ -1,18 +1,117 @@
 import os
-from dotenv import load_dotenv
 from pathlib import Path
 
-load_dotenv()
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
 
 class Config:
     # Telegram
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-    TELEGRAM_ADMIN_IDS = list(map(int, os.getenv('TELEGRAM_ADMIN_IDS', '').split(',')))
+    TELEGRAM_ADMIN_IDS = [int(x) for x in os.getenv('TELEGRAM_ADMIN_IDS', '').split(',') if x.strip()]
+    TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
     
     # Avito
     AVITO_BASE_URL = os.getenv('AVITO_BASE_URL', 'https://www.avito.ru')
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 30))
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', 3))
+    UA_POOL_SIZE = int(os.getenv('UA_POOL_SIZE', 50))           # User-Agent в выборке data/user_agents.json
+    UA_CACHE_DAYS = float(os.getenv('UA_CACHE_DAYS', 7))        # дней до обновления выборки
+    
+    # Retries / blocks
+    RETRY_BACKOFF_BASE = float(os.getenv('RETRY_BACKOFF_BASE', 1.0))    # сек, пауза растет как base * 2^n
+    RETRY_BACKOFF_MAX = float(os.getenv('RETRY_BACKOFF_MAX', 30))       # сек
+    THROTTLE_MIN_RATE = float(os.getenv('THROTTLE_MIN_RATE', 0.05))     # запросов/сек при блокировках
+    THROTTLE_RECOVERY = float(os.getenv('THROTTLE_RECOVERY', 0.1))      # доля исходного темпа за успешный ответ
+    BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 3))          # блокировок подряд до паузы
+    BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', 300))        # сек
+    
+    # Crawler
+    CRAWL_MAX_QUERIES = int(os.getenv('CRAWL_MAX_QUERIES', 5))
+    CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', 8))
+    CRAWL_HOST_CONCURRENCY = int(os.getenv('CRAWL_HOST_CONCURRENCY', 4))
+    CRAWL_HOST_RATE = float(os.getenv('CRAWL_HOST_RATE', 1.0))      # запросов/сек на хост
+    CRAWL_HOST_BURST = int(os.getenv('CRAWL_HOST_BURST', 2))
+    CRAWL_JITTER = float(os.getenv('CRAWL_JITTER', 0.5))            # сек, случайная добавка
+    CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', 5))          # страниц выдачи на запрос
+    CRAWL_PREFETCH = int(os.getenv('CRAWL_PREFETCH', 1))            # страниц, загружаемых заранее
+    CRAWL_MAX_ADS = int(os.getenv('CRAWL_MAX_ADS', 100))            # новых объявлений на запрос за запуск
+    
+    # HTTP
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 32))
+    HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', 8))
+    HTTP_DNS_TTL = int(os.getenv('HTTP_DNS_TTL', 600))              # сек
+    HTTP_KEEPALIVE = float(os.getenv('HTTP_KEEPALIVE', 60))         # сек
+    
+    # Parsing
+    PARSER_BACKEND = os.getenv('PARSER_BACKEND', 'auto')           # auto | selectolax | lxml | bs4
+    
+    # Telegram sending limits
+    TG_GLOBAL_RATE = float(os.getenv('TG_GLOBAL_RATE', 25))        # сообщений/сек на бота
+    TG_GLOBAL_BURST = int(os.getenv('TG_GLOBAL_BURST', 25))
+    TG_CHAT_RATE = float(os.getenv('TG_CHAT_RATE', 1.0))           # сообщений/сек в личный чат
+    TG_CHAT_BURST = int(os.getenv('TG_CHAT_BURST', 3))
+    TG_GROUP_RATE = float(os.getenv('TG_GROUP_RATE', 20 / 60))     # в группы - 20 в минуту
+    TG_SEND_RETRIES = int(os.getenv('TG_SEND_RETRIES', 3))         # повторов после RetryAfter
+    
+    # Notifications
+    NOTIFY_DIGEST_PAGE_SIZE = int(os.getenv('NOTIFY_DIGEST_PAGE_SIZE', 10))    # объявлений в сообщении-сводке
+    NOTIFY_INSTANT_MAX_PRICE = int(os.getenv('NOTIFY_INSTANT_MAX_PRICE', 0))  # сразу, если цена не выше (0 - только сводка)
+    NOTIFY_MAX_INSTANT = int(os.getenv('NOTIFY_MAX_INSTANT', 5))              # отдельных уведомлений за запуск
+    NOTIFY_DIGEST_MAX_PAGES = int(os.getenv('NOTIFY_DIGEST_MAX_PAGES', 3))    # сообщений-сводок получателю за запуск, остальное - одной строкой
+    DASHBOARD_URL = os.getenv('DASHBOARD_URL', 'https://yus.github.io/avitotiger/')
+    
+    # Subscriptions
+    SUBS_MAX_PER_USER = int(os.getenv('SUBS_MAX_PER_USER', 20))
+    
+    # Bot
+    BOT_CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', 16))   # апдейтов обрабатывается параллельно
+    BOT_SEARCH_CONCURRENCY = int(os.getenv('BOT_SEARCH_CONCURRENCY', 8))   # поисков одновременно, остальные ждут
+    BOT_SEARCH_RESULTS = int(os.getenv('BOT_SEARCH_RESULTS', 10))          # объявлений в ответе
+    BOT_EDIT_INTERVAL = float(os.getenv('BOT_EDIT_INTERVAL', 1.0))         # сек между правками сообщения с результатами
+    
+    # Webhook server (bot.py --webhook)
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')                   # публичный https-адрес; пусто - setWebhook не вызывается
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')             # X-Telegram-Bot-Api-Secret-Token
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40))   # одновременных POST от Telegram
+    
+    # Inline mode
+    INLINE_DEBOUNCE = float(os.getenv('INLINE_DEBOUNCE', 0.4))          # сек без новых нажатий перед ответом
+    INLINE_DEADLINE = float(os.getenv('INLINE_DEADLINE', 3.0))          # сек на ответ, дальше - только кэш
+    INLINE_MIN_CHARS = int(os.getenv('INLINE_MIN_CHARS', 2))
+    INLINE_PREFETCH = int(os.getenv('INLINE_PREFETCH', 3))              # популярных продолжений грузить заранее
+    INLINE_PREFETCH_CONCURRENCY = int(os.getenv('INLINE_PREFETCH_CONCURRENCY', 2))
+    INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', 60))         # сек, кэш ответа на стороне Telegram
+    
+    # Telegram poller (daemon mode)
+    POLLER_TIMEOUT = int(os.getenv('POLLER_TIMEOUT', 30))                        # сек, long polling
+    POLLER_CHECKPOINT_UPDATES = int(os.getenv('POLLER_CHECKPOINT_UPDATES', 50))  # offset пишется раз в N апдейтов
+    POLLER_CHECKPOINT_SECONDS = int(os.getenv('POLLER_CHECKPOINT_SECONDS', 10))  # ... или раз в N секунд
+    
+    # Result cache
+    CACHE_TTL = int(os.getenv('CACHE_TTL', 300))                    # сек
+    CACHE_EMPTY_TTL = int(os.getenv('CACHE_EMPTY_TTL', 30))         # сек, для пустой выдачи
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1000))
+    
+    # Seen ads
+    SEEN_TTL_DAYS = int(os.getenv('SEEN_TTL_DAYS', 90))
+    SEEN_MAX_ENTRIES = int(os.getenv('SEEN_MAX_ENTRIES', 5_000_000))
+    
+    # Search queue
+    QUEUE_WORKERS = int(os.getenv('QUEUE_WORKERS', 4))
+    QUEUE_CLAIM_TIMEOUT = int(os.getenv('QUEUE_CLAIM_TIMEOUT', 600))  # сек, потом заявка возвращается в очередь
+    
+    # Stats
+    STATS_HISTORY_DAYS = int(os.getenv('STATS_HISTORY_DAYS', 30))  # окно для статистики по запросам
+    ROLLUP_HOURS = int(os.getenv('ROLLUP_HOURS', 48))     # часовых корзин в web/rollups
+    ROLLUP_DAYS = int(os.getenv('ROLLUP_DAYS', 90))       # дневных
+    ROLLUP_WEEKS = int(os.getenv('ROLLUP_WEEKS', 104))    # недельных
+    ROLLUP_TOP_TRENDS = int(os.getenv('ROLLUP_TOP_TRENDS', 20))
     
     # Database
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./avito_bot.db')
@@ -20,7 +119,7 @@ class Config:
     # Paths
     BASE_DIR = Path(__file__).resolve().parent.parent
     LOGS_DIR = BASE_DIR / 'logs'
-    DATA_DIR = BASE_DIR / 'data'
+    DATA_DIR = Path(os.getenv('DATA_DIR', BASE_DIR / 'data'))
     
     # Bot settings
     BOT_NAME = "AvitoTigerBot"
@@ -5,99 +5,240 @@ Avito Tiger Bot
 
 import os
 import sys
+import time
 import asyncio
+import secrets
+import argparse
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, InlineQueryHandler, ContextTypes
 from telegram.error import TelegramError
-import aiohttp
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+
+from config.settings import Config
+from src.http_session import get_session, close_session
+from src.user_agents import get_user_agents
+from src.extractor import Ad, iter_ads, has_next_page
+from src.result_cache import get_cache, normalize
+from src.crawler import CrawlScheduler
+from src.fetch_policy import AVITO_HOST, BadStatusError, get_policy
+from src.telegram_sender import get_sender, close_senders
+from src.digest import ad_line, md_safe
+from src.inline_search import InlineSearch
+from src.webhook_server import WebhookServer
+from src.storage import Store
+from src.subscriptions import parse_subscription, format_bounds
 
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+ALLOWED_UPDATES = ['message', 'callback_query', 'inline_query']
+
+_store = None
+
+def get_store() -> Store:
+    """Общее подключение к базе (создается при первом обращении)"""
+    global _store
+    if _store is None:
+        _store = Store()
+    return _store
 
 # ===================== ПАРСЕР =====================
 
 class AvitoParser:
-    def __init__(self):
-        self.ua = UserAgent()
-    
-    async def search(self, query: str, limit: int = 5):
-        async with aiohttp.ClientSession() as session:
-            headers = {'User-Agent': self.ua.random}
-            params = {'q': query}
-            
-            try:
-                async with session.get(
-                    "https://www.avito.ru/rossiya",
-                    params=params,
-                    headers=headers,
-                    timeout=30
-                ) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    ads = []
-                    
-                    for item in soup.select('[data-marker="item"]')[:limit]:
-                        try:
-                            title = item.select_one('[itemprop="name"]')
-                            price = item.select_one('[itemprop="price"]')
-                            link = item.select_one('a[href*="/"]')
-                            location = item.select_one('[class*="address"]')
-                            
-                            ads.append({
-                                'title': title.text.strip() if title else 'Без названия',
-                                'price': price.get('content', '0') if price else '0',
-                                'url': f"https://www.avito.ru{link.get('href')}" if link else '',
-                                'location': location.text.strip() if location else ''
-                            })
-                        except:
-                            continue
-                    return ads
-            except:
-                return []
+    def __init__(self, scheduler: Optional[CrawlScheduler] = None):
+        self.ua = get_user_agents()
+        # Бюджет вежливости к Avito, как у cron-парсера (без случайной паузы - ответ ждет
+        # пользователь); блокировки замедляют его бакет через FetchPolicy
+        self.scheduler = scheduler or CrawlScheduler(jitter=0)
+        get_policy().attach(AVITO_HOST, self.scheduler.host(AVITO_HOST).bucket)
+    
+    async def fetch_ads(self, query: str, limit: int,
+                        on_page: Optional[Callable[[List[Dict]], None]] = None) -> List[Ad]:
+        """Выдача через общий кэш (ошибки - исключением), по страницам, пока не
+        наберется limit. on_page(ads) вызывается после каждой страницы, за которой
+        будет следующая, - пока она грузится, можно показать набранное
+        (выдача в одну страницу и ответ из кэша приходят только результатом)"""
+        async def fetch(query: str, limit: int):
+            ads, ids = [], set()
+            for page in range(1, Config.CRAWL_MAX_PAGES + 1):
+                html = await self._fetch_page(query, page)
+                page_ads = [ad for ad in iter_ads(html, limit) if ad.id not in ids]
+                page_ads = page_ads[:limit - len(ads)]
+                ids.update(ad.id for ad in page_ads)
+                ads.extend(page_ads)
+                if not page_ads or len(ads) >= limit or not has_next_page(html):
+                    break
+                if on_page:
+                    on_page([ad.to_dict(query) for ad in page_ads])
+            return ads
+        
+        return await get_cache().fetch(query, limit, fetch)
+    
+    async def search(self, query: str, limit: int = 5,
+                     on_page: Optional[Callable[[List[Dict]], None]] = None):
+        try:
+            ads = await self.fetch_ads(query, limit, on_page)
+        except:
+            return []
+        return [ad.to_dict(query) for ad in ads]
+    
+    async def _fetch_page(self, query: str, page: int = 1) -> str:
+        headers = {'User-Agent': self.ua.random}
+        params = {'q': query}
+        if page > 1:
+            params['p'] = page
+        
+        async def request():
+            session = await get_session()
+            async with session.get(
+                f"{Config.AVITO_BASE_URL}/rossiya",
+                params=params,
+                headers=headers
+            ) as response:
+                html = await response.text() if response.status == 200 else ''
+                return response.status, html, response.headers
+        
+        status, html, _ = await get_policy().call(
+            AVITO_HOST, lambda: self.scheduler.submit(AVITO_HOST, request)
+        )
+        if status != 200:
+            raise BadStatusError(status, f"{query} (page {page})")
+        return html
 
-# ===================== КОМАНДЫ =====================
+_parser = None
+
+def get_parser() -> AvitoParser:
+    """Общий парсер"""
+    global _parser
+    if _parser is None:
+        _parser = AvitoParser()
+    return _parser
+
+_inline = None
 
-async def send_typing_action(update: Update):
-    """Отправить действие 'печатает...'"""
-    try:
-        if update.message:
-            await update.message.chat.send_action(action='typing')
-        elif update.callback_query:
-            await update.callback_query.message.chat.send_action(action='typing')
-    except:
-        pass
+def get_inline() -> InlineSearch:
+    """Inline-поиск поверх общего парсера и кэша"""
+    global _inline
+    if _inline is None:
+        _inline = InlineSearch(get_parser().fetch_ads)
+    return _inline
+
+# ===================== ПОИСК В ФОНЕ =====================
+
+_search_slots = None
+
+def get_search_slots() -> asyncio.Semaphore:
+    """Лимит одновременных поисков (Config.BOT_SEARCH_CONCURRENCY)"""
+    global _search_slots
+    if _search_slots is None:
+        _search_slots = asyncio.Semaphore(Config.BOT_SEARCH_CONCURRENCY)
+    return _search_slots
+
+class SearchReply:
+    """Одно сообщение с результатами, которое правится по мере загрузки страниц.
+    
+    Промежуточная правка - между загрузками страниц выдачи, через очередь
+    отправки и не чаще BOT_EDIT_INTERVAL; пока предыдущая не ушла, новая не ставится.
+    """
+    
+    def __init__(self, sender, chat_id: int, message_id: int, query: str):
+        self.sender = sender
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.query = query
+        self.ads: List[Dict] = []
+        self.edits: List[asyncio.Future] = []
+        self.edited_at = time.monotonic()
+    
+    def _text(self, done: bool) -> str:
+        query = md_safe(self.query)
+        if done and not self.ads:
+            return f"😕 По запросу **{query}** ничего не найдено"
+        header = f"🔍 **{query}** — {len(self.ads)}" + ("" if done else "...")
+        lines = [ad_line(ad, bullet=f"{i}.") for i, ad in enumerate(self.ads, 1)]
+        return header + "\n\n" + "\n".join(lines)
+    
+    def _edit(self, text: str):
+        self.edits.append(self.sender.submit(
+            'edit_message_text',
+            self.chat_id,
+            message_id=self.message_id,
+            text=text,
+            parse_mode='Markdown',
+            disable_web_page_preview=True
+        ))
+        self.edited_at = time.monotonic()
+    
+    def add_page(self, ads: List[Dict]):
+        self.ads.extend(ads)
+        busy = self.edits and not self.edits[-1].done()
+        if not busy and time.monotonic() - self.edited_at >= Config.BOT_EDIT_INTERVAL:
+            self._edit(self._text(done=False))
+    
+    async def finish(self, ads: List[Dict]):
+        """Итоговая правка (ads - полный ответ, в том числе из кэша)"""
+        self.ads = ads
+        self._edit(self._text(done=True))
+        results = await asyncio.gather(*self.edits, return_exceptions=True)
+        if isinstance(results[-1], Exception):
+            print(f"❌ Results edit error for {self.chat_id}: {results[-1]}")
+
+async def run_search(bot, chat_id: int, username: Optional[str], query: str):
+    """Фоновый поиск: сообщение-статус, затем результаты в нем же"""
+    sender = get_sender(bot)
+    slots = get_search_slots()
+    text = f"⏳ В очереди: {query}" if slots.locked() else f"🔍 Ищем: {query}..."
+    status_msg = await sender.send_message(chat_id, text)
+    
+    async with slots:
+        try:
+            await bot.send_chat_action(chat_id=chat_id, action='typing')
+        except TelegramError:
+            pass
+        reply = SearchReply(sender, chat_id, status_msg.message_id, query)
+        ads = await get_parser().search(query, Config.BOT_SEARCH_RESULTS, on_page=reply.add_page)
+        await reply.finish(ads)
+    
+    # Сохраняем в историю
+    store = get_store()
+    store.bump_queries({query: 1})
+    store.add_search(query, ads, chat_id=chat_id, username=username)
+
+# ===================== КОМАНДЫ =====================
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /start"""
     await update.message.reply_text(
         "🤖 **Avito Tiger Bot**\n\n"
         "🔍 **Поиск объявлений:**\n"
-        "`/search iphone 13`\n\n"
+        "`/search iphone 13`\n"
+        f"`@{Config.BOT_USERNAME} iphone 13` - в любом чате\n\n"
         "📊 **Статистика:**\n"
         "`/stats iphone` - график цен\n"
         "`/top` - популярные запросы\n\n"
+        "🔔 **Подписки:**\n"
+        "`/subscribe iphone 13 до 50000` - новые объявления\n"
+        "`/subs` - мои подписки\n"
+        "`/unsubscribe iphone 13` - отписаться\n\n"
         "🌐 **Веб-дашборд:**\n"
         "https://yus.github.io/avitotiger/",
         parse_mode='Markdown'
     )
 
 async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Команда /search - поиск объявлений"""
+    """Команда /search - поиск объявлений.
     
-    # Отправляем "печатает..."
-    await send_typing_action(update)
+    Сам поиск - фоновая задача, обработчик сразу отпускает очередь апдейтов.
+    Работает и из кнопки /top (там update.message нет).
+    """
+    chat_id = update.effective_chat.id
     
     # Проверяем аргументы
     if not context.args:
-        await update.message.reply_text(
+        await get_sender(context.bot).send_message(
+            chat_id,
             "❌ **Укажите запрос!**\n\n"
             "Пример: `/search iphone 13`",
             parse_mode='Markdown'
@@ -105,50 +246,86 @@ async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     query = ' '.join(context.args)
+    username = update.effective_user.username if update.effective_user else None
+    context.application.create_task(run_search(context.bot, chat_id, username, query), update=update)
+
+def button_data(prefix: str, text: str) -> str:
+    """callback_data кнопки: Telegram ограничивает его 64 байтами (не символами),
+    режем по границе символа UTF-8"""
+    return f"{prefix}{text}".encode('utf-8')[:64].decode('utf-8', 'ignore')
+
+async def top_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /top - популярные запросы"""
+    top = get_store().top_queries(10)
     
-    # Отправляем статус
-    status_msg = await update.message.reply_text(f"🔍 Ищем: {query}...")
+    if not top:
+        await update.message.reply_text("📭 Пока нет запросов")
+        return
     
-    # Парсим
-    parser = AvitoParser()
-    ads = await parser.search(query)
+    text = "🔥 **Популярные запросы:**\n\n"
+    for i, (query, count) in enumerate(top, 1):
+        text += f"{i}. {md_safe(query)} — {count}\n"
     
-    # Удаляем статус
-    await status_msg.delete()
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"🔍 {query}", callback_data=button_data('search_', query))]
+        for query, _ in top[:5]
+    ])
     
-    if not ads:
+    await update.message.reply_text(text, parse_mode='Markdown', reply_markup=keyboard)
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /subscribe - подписка на новые объявления по запросу"""
+    parsed = parse_subscription(' '.join(context.args or []))
+    if not parsed:
         await update.message.reply_text(
-            f"😕 По запросу **{query}** ничего не найдено",
+            "❌ **Укажите запрос!**\n\n"
+            "Пример: `/subscribe iphone 13 от 20000 до 50000`",
             parse_mode='Markdown'
         )
         return
     
-    # Отправляем результаты
-    for i, ad in enumerate(ads[:5], 1):
-        try:
-            price = int(float(ad['price']))
-            if price >= 1000:
-                price_text = f"{price/1000:.0f} тыс ₽"
-            else:
-                price_text = f"{price} ₽"
-        except:
-            price_text = "Цена не указана"
-        
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔗 Открыть объявление", url=ad['url'])]
-        ])
-        
-        text = f"📌 **{i}.** {ad['title'][:80]}\n💰 **{price_text}**"
-        if ad['location']:
-            text += f"\n📍 {ad['location']}"
-        
-        await update.message.reply_text(
-            text,
-            parse_mode='Markdown',
-            reply_markup=keyboard,
-            disable_web_page_preview=False
-        )
-        await asyncio.sleep(0.3)
+    query, min_price, max_price = parsed
+    chat_id = update.effective_chat.id
+    store = get_store()
+    
+    if len(store.subscriptions(chat_id)) >= Config.SUBS_MAX_PER_USER:
+        await update.message.reply_text(f"❌ Не больше {Config.SUBS_MAX_PER_USER} подписок")
+        return
+    
+    if store.add_subscription(chat_id, query, min_price, max_price):
+        text = f"🔔 Подписка: **{md_safe(query)}** ({format_bounds(min_price, max_price)})"
+    else:
+        text = f"ℹ️ Уже есть подписка: **{md_safe(query)}**"
+    await update.message.reply_text(text, parse_mode='Markdown')
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /unsubscribe - отписаться от запроса (или от всех: /unsubscribe all)"""
+    text = ' '.join(context.args or [])
+    if not text:
+        await update.message.reply_text("Пример: `/unsubscribe iphone 13`", parse_mode='Markdown')
+        return
+    
+    query = None if text.lower() in ('all', 'все') else normalize(text)
+    removed = get_store().remove_subscriptions(update.effective_chat.id, query)
+    await update.message.reply_text(
+        f"🔕 Удалено подписок: {removed}" if removed else "😕 Такой подписки нет"
+    )
+
+async def subs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /subs - мои подписки"""
+    subs = get_store().subscriptions(update.effective_chat.id)
+    if not subs:
+        await update.message.reply_text("📭 Подписок нет. Пример: `/subscribe iphone 13`", parse_mode='Markdown')
+        return
+    
+    text = "🔔 **Ваши подписки:**\n\n"
+    for i, (_, query, min_price, max_price) in enumerate(subs, 1):
+        text += f"{i}. {md_safe(query)} — {format_bounds(min_price, max_price)}\n"
+    await update.message.reply_text(text, parse_mode='Markdown')
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inline-режим: @бот iphone 13 (обработчик не блокирует очередь - там дебаунс)"""
+    await get_inline().answer(update.inline_query)
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка нажатий на кнопки"""
@@ -157,30 +334,69 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if query.data.startswith('search_'):
         # Запускаем поиск из кнопки
-        search_term = query.data.replace('search_', '')
+        search_term = query.data[len('search_'):]
         context.args = [search_term]
         await search_command(update, context)
 
 # ===================== ЗАПУСК =====================
 
+async def on_shutdown(app: Application):
+    """Закрыть общую HTTP-сессию и очередь отправки при остановке бота"""
+    await close_senders()
+    await close_session()
+    if _store is not None:
+        _store.close()
+
+def build_app() -> Application:
+    """Application со всеми обработчиками (для polling и webhook)"""
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(f"{Config.TELEGRAM_API_URL}/bot")
+        .concurrent_updates(Config.BOT_CONCURRENT_UPDATES)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
+    
+    # Регистрируем команды
+    app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("search", search_command))
+    app.add_handler(CommandHandler("top", top_command))
+    app.add_handler(CommandHandler("subscribe", subscribe_command))
+    app.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+    app.add_handler(CommandHandler("subs", subs_command))
+    app.add_handler(CallbackQueryHandler(button_callback))
+    app.add_handler(InlineQueryHandler(inline_query, block=False))
+    return app
+
 def main():
     """Запуск бота"""
+    ap = argparse.ArgumentParser(description='Avito Tiger Bot')
+    ap.add_argument('--webhook', action='store_true',
+                    help='receive updates with the built-in webhook server instead of long polling')
+    args = ap.parse_args()
+    
     if not TOKEN:
         print("❌ TELEGRAM_BOT_TOKEN не установлен!")
         return
     
-    app = Application.builder().token(TOKEN).build()
-    
-    # Регистрируем команды
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("search", search_command))
-    app.add_handler(CallbackQueryHandler(button_callback))
+    app = build_app()
     
     print("🤖 Avito Tiger Bot запущен!")
     print("✅ Команда /search работает")
     
-    # Запускаем
-    app.run_polling(allowed_updates=['message', 'callback_query'])
+    if not args.webhook:
+        app.run_polling(allowed_updates=ALLOWED_UPDATES)
+        return
+    
+    secret = Config.WEBHOOK_SECRET
+    if not secret:
+        if not Config.WEBHOOK_URL:
+            print("❌ WEBHOOK_SECRET не установлен!")
+            return
+        # Webhook ставим сами - секрет можно придумать на этот запуск
+        secret = secrets.token_urlsafe(32)
+    asyncio.run(WebhookServer(app, secret).run(ALLOWED_UPDATES))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+AvitoTiger CLI - одна точка входа для cron-скриптов
+
+    ./avitotiger parse                 # src/parser.py
+    ./avitotiger stats                 # src/stats.py (+ web/rollups)
+    ./avitotiger rollups               # src/rollups.py
+    ./avitotiger report                # src/daily_report.py
+    ./avitotiger diagrams              # src/diagrams.py
+    ./avitotiger poll --daemon         # src/telegram_poller.py (аргументы передаются как есть)
+    ./avitotiger process               # src/search_processor.py
+    ./avitotiger --timings parse       # + время импорта по зависимостям
+
+Модуль подкоманды импортируется только при ее запуске: parse не тянет
+matplotlib, stats - telegram. Сам CLI использует только стандартную библиотеку.
+"""
+
+import sys
+import time
+import argparse
+import builtins
+import importlib
+import contextlib
+from pathlib import Path
+from collections import Counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# команда -> (модуль, функция, описание)
+COMMANDS = {
+    'parse': ('src.parser', 'main', 'crawl Avito, notify subscribers, update prices'),
+    'stats': ('src.stats', 'main', 'generate dashboard statistics'),
+    'rollups': ('src.rollups', 'main', 'write pre-aggregated price series for the dashboard'),
+    'report': ('src.daily_report', 'main', 'send the daily Telegram report'),
+    'diagrams': ('src.diagrams', 'main', 'render price and trend charts'),
+    'poll': ('src.telegram_poller', 'main', 'fetch Telegram messages into the search queue'),
+    'process': ('src.search_processor', 'process_queue', 'process queued searches'),
+}
+
+class ImportTimer:
+    """Время первых импортов, сделанных напрямую модулем подкоманды.
+
+    Вложенные импорты входят во время того, кто их вызвал; ключ -
+    пакет верхнего уровня (для своих модулей - полное имя src.*).
+    """
+
+    def __init__(self):
+        self.times = Counter()
+        self._depth = 0
+        self._import = builtins.__import__
+
+    def __enter__(self):
+        builtins.__import__ = self._timed
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._import
+
+    def _timed(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        self._depth += 1
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                key = name if name.startswith(('src.', 'config')) else name.partition('.')[0]
+                self.times[key] += time.perf_counter() - started
+
+    def report(self, total: float, top: int = 12):
+        print(f"⏱ import {total * 1000:.0f} ms", file=sys.stderr)
+        for name, seconds in self.times.most_common(top):
+            print(f"   {seconds * 1000:7.1f} ms  {name}", file=sys.stderr)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='avitotiger', description='AvitoTiger command line')
+    ap.add_argument('--timings', action='store_true', help='print import-time breakdown to stderr')
+    sub = ap.add_subparsers(dest='command', required=True, metavar='command')
+    for name, (_, _, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+    args, rest = ap.parse_known_args(argv)
+
+    module_name, func_name, _ = COMMANDS[args.command]
+    started = time.perf_counter()
+    timer = ImportTimer()
+    with timer if args.timings else contextlib.nullcontext():
+        module = importlib.import_module(module_name)
+    if args.timings:
+        timer.report(time.perf_counter() - started)
+
+    # Подкоманда разбирает свои аргументы сама
+    sys.argv = [f"avitotiger {args.command}", *rest]
+    result = getattr(module, func_name)()
+    if hasattr(result, '__await__'):
+        import asyncio
+        asyncio.run(result)
+    if args.timings:
+        print(f"⏱ total {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Crawl Scheduler - параллельный обход запросов
+Общий лимит одновременных задач + бюджет вежливости на каждый хост
+"""
+
+import sys
+import asyncio
+import random
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+from src.ratelimit import TokenBucket
+
+# ===================== ХОСТЫ =====================
+
+class HostBudget:
+    """Бюджет вежливости для одного хоста"""
+
+    def __init__(self, concurrency: int, rate: float, burst: int, jitter: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.jitter = jitter
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            await self.bucket.acquire()
+            if self.jitter > 0:
+                await asyncio.sleep(random.uniform(0, self.jitter))
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+# ===================== ПЛАНИРОВЩИК =====================
+
+class CrawlScheduler:
+    """Запускает много запросов одновременно в рамках лимитов"""
+
+    def __init__(self, concurrency: Optional[int] = None,
+                 host_concurrency: Optional[int] = None,
+                 host_rate: Optional[float] = None,
+                 host_burst: Optional[int] = None,
+                 jitter: Optional[float] = None):
+        self.concurrency = concurrency or Config.CRAWL_CONCURRENCY
+        self.host_concurrency = host_concurrency or Config.CRAWL_HOST_CONCURRENCY
+        self.host_rate = host_rate if host_rate is not None else Config.CRAWL_HOST_RATE
+        self.host_burst = host_burst or Config.CRAWL_HOST_BURST
+        self.jitter = jitter if jitter is not None else Config.CRAWL_JITTER
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._hosts: Dict[str, HostBudget] = {}
+
+    def host(self, name: str) -> HostBudget:
+        """Бюджет хоста (создается при первом обращении)"""
+        if name not in self._hosts:
+            self._hosts[name] = HostBudget(
+                self.host_concurrency, self.host_rate, self.host_burst, self.jitter
+            )
+        return self._hosts[name]
+
+    async def submit(self, host: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Выполнить одну задачу с учетом общего лимита и лимита хоста"""
+        async with self._semaphore:
+            async with self.host(host):
+                return await fn(*args, **kwargs)
+
+    async def map(self, host: str, fn: Callable[..., Awaitable[Any]],
+                  items: Iterable[Any], **kwargs) -> List[Any]:
+        """Выполнить fn для каждого элемента, результаты в исходном порядке.
+        Ошибка одной задачи не останавливает остальные - вместо результата
+        возвращается исключение."""
+        tasks = [self.submit(host, fn, item, **kwargs) for item in items]
+        return await asyncio.gather(*tasks, return_exceptions=True)
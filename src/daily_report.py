@@ -11,28 +11,28 @@ import asyncio
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import Counter
-import matplotlib
-matplotlib.use('Agg')  # Без GUI
-import matplotlib.pyplot as plt
 import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 
+from config.settings import Config
+from src.seen_index import SeenIndex
+from src.storage import Store
+from src.price_archive import PriceArchive
+from src.price_stats import PriceHistory, summarize
+
 # ===================== КОНФИГ =====================
 
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 ADMIN_IDS = list(map(int, os.getenv('TELEGRAM_ADMIN_IDS', '').split(','))) if os.getenv('TELEGRAM_ADMIN_IDS') else []
 
-BASE_DIR = Path(__file__).parent.parent.parent
-DATA_DIR = BASE_DIR / 'data'
+BASE_DIR = Config.BASE_DIR
+DATA_DIR = Config.DATA_DIR
 REPORTS_DIR = DATA_DIR / 'daily_reports'
 DIAGRAMS_DIR = DATA_DIR / 'diagrams'
 
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-DIAGRAMS_DIR.mkdir(parents=True, exist_ok=True)
-
 # ===================== ЗАГРУЗКА ДАННЫХ =====================
 
 def load_json(file_path):
@@ -58,58 +58,49 @@ def generate_daily_report():
     yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
     
     # Загружаем данные
-    trends = load_json(DATA_DIR / 'trends.json')
-    prices = load_json(DATA_DIR / 'prices.json')
-    seen_ads = load_json(DATA_DIR / 'seen_ads.json')
+    store = Store()
+    store.import_trends(DATA_DIR / 'trends.json')
+    archive = PriceArchive()
+    archive.import_json(DATA_DIR / 'prices.json')
+    history = PriceHistory.load(archive, since=datetime.now() - timedelta(days=Config.STATS_HISTORY_DAYS))
+    summary = summarize(history)
     
     # Топ запросов
-    top_queries = []
-    if trends:
-        sorted_trends = sorted(trends.items(), key=lambda x: x[1], reverse=True)
-        top_queries = sorted_trends[:10]
-    
-    # Изменения цен
-    price_changes = []
-    for query, data in prices.items():
-        if len(data) >= 2:
-            yesterday_price = data[-2].get('price', 0)
-            today_price = data[-1].get('price', 0)
-            if yesterday_price > 0:
-                change = ((today_price - yesterday_price) / yesterday_price) * 100
-                price_changes.append({
-                    'query': query,
-                    'yesterday': yesterday_price,
-                    'today': today_price,
-                    'change': round(change, 1)
-                })
-    
-    price_changes.sort(key=lambda x: abs(x['change']), reverse=True)
+    top_queries = store.top_queries(10)
+    
+    # Изменения цен за 24 часа (последняя цена против цены сутки назад)
+    change = summary['change_24h']
+    moved = np.flatnonzero(np.isfinite(change))
+    moved = moved[np.argsort(-np.abs(change[moved]))]
+    price_changes = [
+        {
+            'query': history.queries[i],
+            'yesterday': int(summary['ref_24h'][i]),
+            'today': int(summary['last'][i]),
+            'change': round(float(change[i]), 1)
+        }
+        for i in moved[:5]
+    ]
     
     # Количество новых объявлений
-    new_ads_today = 0
-    if seen_ads and 'ads' in seen_ads:
-        new_ads_today = len(seen_ads['ads'][-50:])
-    
-    # Средняя цена
-    all_prices = []
-    for query, data in prices.items():
-        if data:
-            prices_list = [p['price'] for p in data[-24:]]
-            all_prices.extend(prices_list)
+    new_ads_today = SeenIndex.count_file(DATA_DIR / 'seen_ads.idx', datetime.now())
     
-    avg_price = int(np.mean(all_prices)) if all_prices else 0
+    # Средняя цена по последним 24 точкам каждого запроса
+    recent = history.tail(24).price
+    avg_price = int(recent.mean()) if recent.size else 0
     
     # Формируем отчет
     report = {
         'date': today,
         'generated_at': datetime.now().isoformat(),
-        'total_searches': sum(trends.values()) if trends else 0,
+        'total_searches': store.total_searches(),
         'new_ads_today': new_ads_today,
         'top_queries': top_queries[:10],
         'price_changes': price_changes[:5],
         'avg_price': avg_price,
-        'total_queries_count': len(trends) if trends else 0
+        'total_queries_count': store.query_count()
     }
+    store.close()
     
     # Сохраняем отчет
     report_file = REPORTS_DIR / f"report_{today}.json"
@@ -119,17 +110,22 @@ def generate_daily_report():
 
 def generate_price_chart(report_date):
     """Сгенерировать график цен для отчета"""
-    prices = load_json(DATA_DIR / 'prices.json')
+    # matplotlib грузится ~0.4 с - только когда график действительно нужен
+    import matplotlib
+    matplotlib.use('Agg')  # Без GUI
+    import matplotlib.pyplot as plt
     
-    plt.figure(figsize=(12, 6))
+    prices = PriceArchive().recent(24)
+    with Store() as store:
+        # Берем топ-5 запросов
+        top_queries = [q for q, _ in store.top_queries(5)]
     
-    # Берем топ-5 запросов
-    top_queries = list(prices.keys())[:5]
+    plt.figure(figsize=(12, 6))
     
     for query in top_queries:
         data = prices.get(query, [])
         if data:
-            values = [p['price'] / 1000 for p in data[-24:]]  # в тыс руб
+            values = [p['price'] / 1000 for p in data]  # в тыс руб
             hours = list(range(len(values)))
             plt.plot(hours, values, marker='o', label=query, linewidth=2)
     
@@ -215,6 +211,9 @@ async def main():
         print("❌ No token!")
         return
     
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    DIAGRAMS_DIR.mkdir(parents=True, exist_ok=True)
+    
     # Генерируем отчет
     report = generate_daily_report()
     print(f"✅ Report generated")
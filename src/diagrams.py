@@ -13,8 +13,6 @@ DATA_DIR = BASE_DIR / 'data'
 WEB_DIR = BASE_DIR / 'web'
 DIAGRAMS_DIR = DATA_DIR / 'diagrams'
 
-DIAGRAMS_DIR.mkdir(parents=True, exist_ok=True)
-
 def load_json(file_path):
     if file_path.exists():
         try:
@@ -93,9 +91,13 @@ def generate_trends_chart():
         shutil.copy(trends_path, WEB_DIR / "trends.png")
         print(f"✅ Trends chart saved")
 
-if __name__ == "__main__":
+def main():
     print("📊 Generating diagrams...")
+    DIAGRAMS_DIR.mkdir(parents=True, exist_ok=True)
     generate_price_chart()
     generate_category_pie()
     generate_trends_chart()
     print("✅ All diagrams saved")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Digest - уведомления о новых объявлениях пачками
+За запуск парсера новые объявления копятся по получателям и уходят
+несколькими сообщениями-сводками (по NOTIFY_DIGEST_PAGE_SIZE штук, не больше
+NOTIFY_DIGEST_MAX_PAGES сообщений - остальное одной строкой со ссылкой на дашборд).
+Отдельным сообщением - только то, что проходит порог пользователя
+(data/notify_settings.json, по умолчанию - Config.NOTIFY_*).
+"""
+
+import sys
+import json
+import asyncio
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+
+from config.settings import Config
+from src.telegram_sender import NOTIFY, get_sender
+
+NOTIFY_SETTINGS_FILE = Config.DATA_DIR / 'notify_settings.json'
+MESSAGE_LIMIT = 4096
+
+# ===================== НАСТРОЙКИ =====================
+
+def default_settings() -> Dict:
+    return {
+        'instant_max_price': Config.NOTIFY_INSTANT_MAX_PRICE,  # цена не выше - сразу (0 - никогда)
+        'instant_queries': [],                                  # только эти запросы (пусто - любые)
+        'max_instant': Config.NOTIFY_MAX_INSTANT,               # отдельных сообщений за запуск
+        'digest': True,                                         # False - без сводки
+    }
+
+def load_settings(path: Optional[Path] = None) -> Dict[int, Dict]:
+    """{user_id: настройки} из notify_settings.json поверх значений по умолчанию"""
+    path = Path(path or NOTIFY_SETTINGS_FILE)
+    if not path.exists():
+        return {}
+    try:
+        raw = json.loads(path.read_text(encoding='utf-8'))
+    except Exception as e:
+        print(f"⚠️ {path.name} unreadable, using defaults: {e}")
+        return {}
+    return {int(user_id): {**default_settings(), **settings} for user_id, settings in raw.items()}
+
+# ===================== ФОРМАТ =====================
+
+def format_price(price: int) -> str:
+    if not price:
+        return "Цена не указана"
+    if price >= 1000:
+        return f"{price/1000:.0f} тыс ₽"
+    return f"{price} ₽"
+
+def md_safe(text: str) -> str:
+    """Убрать символы, ломающие Markdown-разметку"""
+    return text.translate(str.maketrans('', '', '*_`[]'))
+
+def ad_line(ad: Dict, bullet: str = '•') -> str:
+    """Строка объявления для сводки: ссылка, цена, место"""
+    line = f"{bullet} [{md_safe(ad['title'][:60])}]({ad['url']}) — {format_price(ad['price'])}"
+    if ad.get('location'):
+        line += f" 📍 {md_safe(ad['location'])}"
+    return line
+
+def digest_pages(ads: List[Dict], page_size: Optional[int] = None,
+                 max_pages: Optional[int] = None) -> List[str]:
+    """Тексты сводки: объявления по запросам, не больше page_size и 4096 символов на сообщение.
+    Сверх max_pages сообщений объявления не перечисляются - только сколько их по запросам."""
+    page_size = page_size or Config.NOTIFY_DIGEST_PAGE_SIZE
+    max_pages = max_pages or Config.NOTIFY_DIGEST_MAX_PAGES
+    by_query: Dict[str, List[Dict]] = {}
+    for ad in ads:
+        by_query.setdefault(ad.get('query', ''), []).append(ad)
+
+    pages: List[List[str]] = [[]]
+    page_ads: List[List[Dict]] = [[]]
+    count = length = 0
+    for query, query_ads in by_query.items():
+        for i, ad in enumerate(query_ads):
+            lines = [f"\n🔍 **{md_safe(query)}** ({len(query_ads)})"] if i == 0 else []
+            lines.append(ad_line(ad))
+            size = sum(len(l) + 1 for l in lines)
+            if count and (count >= page_size or length + size > MESSAGE_LIMIT - 100):
+                pages.append([])
+                page_ads.append([])
+                count = length = 0
+                if i:
+                    lines.insert(0, f"\n🔍 **{md_safe(query)}** (продолжение)")
+                    size = sum(len(l) + 1 for l in lines)
+            pages[-1].extend(lines)
+            page_ads[-1].append(ad)
+            count += 1
+            length += size
+
+    if len(pages) > max_pages:
+        rest: Dict[str, int] = {}
+        for ad in (ad for dropped in page_ads[max_pages:] for ad in dropped):
+            rest[ad.get('query', '')] = rest.get(ad.get('query', ''), 0) + 1
+        pages = pages[:max_pages]
+        by = ", ".join(f"{md_safe(q)} ({n})" for q, n in sorted(rest.items(), key=lambda x: -x[1])[:5])
+        more = f"\n➕ Еще {sum(rest.values())}: {by}"
+        if len(rest) > 5:
+            more += ", ..."
+        more += f"\n📊 Все объявления - на дашборде: {Config.DASHBOARD_URL}"
+        if sum(len(l) + 1 for l in pages[-1]) + len(more) > MESSAGE_LIMIT - 100:
+            pages.append([more])   # не влезает в последнюю страницу
+        else:
+            pages[-1].append(more)
+
+    total = len(pages)
+    header = f"🆕 **Новые объявления: {len(ads)}**"
+    return [
+        (f"{header} ({n}/{total})" if total > 1 else header) + "\n" + "\n".join(lines)
+        for n, lines in enumerate(pages, 1)
+    ]
+
+# ===================== ОТПРАВКА =====================
+
+async def send_notification(bot: Bot, user_id: int, ad: Dict):
+    """Отправить уведомление о новом объявлении (через общую очередь, полоса NOTIFY)"""
+    try:
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔗 Открыть объявление", url=ad['url'])]
+        ])
+
+        text = (
+            f"🆕 **Новое объявление!**\n\n"
+            f"🔍 **Запрос:** {ad['query']}\n"
+            f"🏷 **{ad['title']}**\n"
+            f"💰 **Цена:** {format_price(ad['price'])}\n"
+        )
+
+        if ad['location']:
+            text += f"📍 **Место:** {ad['location']}\n"
+
+        await get_sender(bot).send_message(
+            user_id,
+            text,
+            lane=NOTIFY,
+            parse_mode='Markdown',
+            reply_markup=keyboard,
+            disable_web_page_preview=False
+        )
+        return True
+    except Exception as e:
+        print(f"❌ Send error: {e}")
+        return False
+
+async def send_digest(bot: Bot, user_id: int, ads: List[Dict]) -> int:
+    """Сводка одному получателю; возвращает число отправленных сообщений"""
+    sender = get_sender(bot)
+    pages = [
+        sender.send_message(user_id, text, lane=NOTIFY, parse_mode='Markdown',
+                            disable_web_page_preview=True)
+        for text in digest_pages(ads)
+    ]
+    results = await asyncio.gather(*pages, return_exceptions=True)
+    for error in (r for r in results if isinstance(r, Exception)):
+        print(f"❌ Digest send error for {user_id}: {error}")
+    return sum(not isinstance(r, Exception) for r in results)
+
+class DigestNotifier:
+    """Копит новые объявления за запуск по получателям и рассылает их в flush()"""
+
+    def __init__(self, bot: Bot, recipients: List[int], settings: Optional[Dict[int, Dict]] = None):
+        self.bot = bot
+        self.recipients = list(recipients)
+        self.settings = settings if settings is not None else load_settings()
+        self.ads: Dict[int, List[Dict]] = {}
+        self._ids: Dict[int, set] = {}
+
+    def add(self, ad: Dict, recipients: Optional[Iterable[int]] = None):
+        """Объявление для recipients (None - для получателей по умолчанию), без повторов"""
+        for user_id in (self.recipients if recipients is None else recipients):
+            ids = self._ids.setdefault(user_id, set())
+            if ad['id'] not in ids:
+                ids.add(ad['id'])
+                self.ads.setdefault(user_id, []).append(ad)
+
+    def _instant(self, settings: Dict, ad: Dict) -> bool:
+        max_price = settings['instant_max_price']
+        if not max_price or not ad['price'] or ad['price'] > max_price:
+            return False
+        return not settings['instant_queries'] or ad.get('query') in settings['instant_queries']
+
+    async def _notify(self, user_id: int, ads: List[Dict]) -> int:
+        settings = self.settings.get(user_id) or default_settings()
+        instant = [ad for ad in ads if self._instant(settings, ad)][:settings['max_instant']]
+        instant_ids = {ad['id'] for ad in instant}
+        rest = [ad for ad in ads if ad['id'] not in instant_ids]
+
+        jobs = [send_notification(self.bot, user_id, ad) for ad in instant]
+        if rest and settings['digest']:
+            jobs.append(send_digest(self.bot, user_id, rest))
+        return sum(await asyncio.gather(*jobs))
+
+    async def flush(self) -> int:
+        """Разослать всем получателям параллельно; возвращает число сообщений"""
+        ads, self.ads, self._ids = self.ads, {}, {}
+        sent = await asyncio.gather(*(self._notify(user_id, user_ads) for user_id, user_ads in ads.items()))
+        return sum(sent)
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Avito Extractor - разбор страницы результатов поиска
+Единственное место, где разбирается выдача Avito: parser.py, bot.py,
+search_processor.py и webhook_search.py получают одинаковые записи Ad.
+Быстрый C-движок (lxml / selectolax) по умолчанию, BeautifulSoup как запасной
+"""
+
+import re
+import sys
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+
+ITEM_MARKER = 'data-marker="item"'
+NEXT_PAGE_MARKER = 'data-marker="pagination-button/nextPage"'
+
+# Селекторы (компилируются один раз в каждом движке)
+SEL_ITEM = '[data-marker="item"]'
+SEL_TITLE = '[itemprop="name"]'
+SEL_PRICE = '[itemprop="price"]'
+SEL_LINK = 'a[href*="/"]'
+SEL_DATE = '[data-marker="item-date"]'
+SEL_LOCATION = '[class*="address"]'
+
+PRICE_RE = re.compile(r'\d+')
+
+# id в открывающем теге объявления (scan_ids - без разбора DOM)
+ID_ATTR_RE = re.compile(r'\sid="([^"]*)"')
+
+# (id, title, price, href, date, location)
+RawItem = Tuple[str, str, str, str, str, str]
+
+# ===================== ЗАПИСЬ =====================
+
+class Ad(NamedTuple):
+    """Объявление из выдачи"""
+    id: str
+    title: str
+    price: int
+    url: str
+    date: str
+    location: str
+
+    def to_dict(self, query: str = '', found_at: Optional[str] = None) -> Dict:
+        """Словарь для JSON и уведомлений"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'price': self.price,
+            'url': self.url,
+            'date': self.date,
+            'location': self.location,
+            'query': query,
+            'found_at': found_at or datetime.now().isoformat()
+        }
+
+def clean_price(raw: str) -> int:
+    """'54 990', '54990.00' -> 54990; мусор -> 0"""
+    match = PRICE_RE.search(raw.replace(' ', '').replace('\xa0', '')) if raw else None
+    return int(match.group()) if match else 0
+
+# ===================== ОБЩЕЕ =====================
+
+def _truncate(html: str, limit: int) -> str:
+    """Обрезать HTML перед (limit+1)-м объявлением, чтобы не разбирать лишнее"""
+    pos = -1
+    for _ in range(limit + 1):
+        pos = html.find(ITEM_MARKER, pos + 1)
+        if pos == -1:
+            return html
+    tag_start = html.rfind('<', 0, pos)
+    return html[:tag_start] if tag_start != -1 else html[:pos]
+
+class ParserBackend:
+    """Базовый движок: наследники отдают сырые поля объявлений"""
+
+    name = ''
+
+    def iter_items(self, html: str) -> Iterator[RawItem]:
+        raise NotImplementedError
+
+    def iter_ads(self, html: str, limit: int) -> Iterator[Ad]:
+        """Объявления со страницы по одному, по мере разбора (не больше limit)"""
+        if limit <= 0:
+            return
+
+        count = 0
+        for ad_id, title, price, href, date, location in self.iter_items(_truncate(html, limit)):
+            if not ad_id:
+                continue
+
+            yield Ad(
+                ad_id,
+                (title or "Без названия")[:100],
+                clean_price(price),
+                f"{Config.AVITO_BASE_URL}{href}" if href.startswith('/') else href,
+                date,
+                location,
+            )
+
+            count += 1
+            if count >= limit:
+                return
+
+    def extract(self, html: str, limit: int) -> List[Ad]:
+        """Объявления со страницы (не больше limit)"""
+        return list(self.iter_ads(html, limit))
+
+# ===================== LXML =====================
+
+class LxmlBackend(ParserBackend):
+    """lxml (libxml2, C) с заранее скомпилированными XPath"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree, html
+        self._fromstring = html.fromstring
+        # XPath-эквиваленты SEL_*
+        self._items = etree.XPath('//*[@data-marker="item"]')
+        self._title = etree.XPath('.//*[@itemprop="name"]')
+        self._price = etree.XPath('.//*[@itemprop="price"]/@content')
+        self._href = etree.XPath('.//a[contains(@href, "/")]/@href')
+        self._date = etree.XPath('.//*[@data-marker="item-date"]')
+        self._location = etree.XPath('.//*[contains(@class, "address")]')
+
+    def iter_items(self, html: str) -> Iterator[RawItem]:
+        if not html.strip():
+            return
+        tree = self._fromstring(html)
+
+        for item in self._items(tree):
+            try:
+                title = self._title(item)
+                price = self._price(item)
+                href = self._href(item)
+                date = self._date(item)
+                location = self._location(item)
+
+                yield (
+                    item.get('id', ''),
+                    title[0].text_content().strip() if title else '',
+                    price[0] if price else '0',
+                    href[0] if href else '',
+                    date[0].text_content().strip() if date else '',
+                    location[0].text_content().strip() if location else '',
+                )
+            except Exception as e:
+                print(f"❌ Parse error: {e}")
+
+# ===================== SELECTOLAX =====================
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax + lexbor (C)"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def iter_items(self, html: str) -> Iterator[RawItem]:
+        tree = self._parser(html)
+
+        for item in tree.css(SEL_ITEM):
+            try:
+                title = item.css_first(SEL_TITLE)
+                price = item.css_first(SEL_PRICE)
+                link = item.css_first(SEL_LINK)
+                date = item.css_first(SEL_DATE)
+                location = item.css_first(SEL_LOCATION)
+
+                yield (
+                    item.attributes.get('id') or '',
+                    title.text().strip() if title else '',
+                    (price.attributes.get('content') or '0') if price else '0',
+                    (link.attributes.get('href') or '') if link else '',
+                    date.text().strip() if date else '',
+                    location.text().strip() if location else '',
+                )
+            except Exception as e:
+                print(f"❌ Parse error: {e}")
+
+# ===================== BEAUTIFULSOUP =====================
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup + html.parser (чистый Python, запасной вариант)"""
+
+    name = 'bs4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        import soupsieve
+        self._soup = BeautifulSoup
+        self._item, self._title, self._price, self._link, self._date, self._location = (
+            soupsieve.compile(sel) for sel in
+            (SEL_ITEM, SEL_TITLE, SEL_PRICE, SEL_LINK, SEL_DATE, SEL_LOCATION)
+        )
+
+    def iter_items(self, html: str) -> Iterator[RawItem]:
+        soup = self._soup(html, 'html.parser')
+
+        for item in self._item.select(soup):
+            try:
+                title = self._title.select_one(item)
+                price = self._price.select_one(item)
+                link = self._link.select_one(item)
+                date = self._date.select_one(item)
+                location = self._location.select_one(item)
+
+                yield (
+                    item.get('id', ''),
+                    title.text.strip() if title else '',
+                    price.get('content', '0') if price else '0',
+                    link.get('href', '') if link else '',
+                    date.text.strip() if date else '',
+                    location.text.strip() if location else '',
+                )
+            except Exception as e:
+                print(f"❌ Parse error: {e}")
+
+# ===================== ПРЕДПРОСМОТР =====================
+
+def scan_ids(html: str, limit: int) -> List[str]:
+    """ID первых limit объявлений по порядку выдачи - регуляркой, без парсера.
+    Позиции без id дают '' (extract() их пропускает, но _truncate считает)."""
+    ids = []
+    pos = html.find(ITEM_MARKER)
+    while pos != -1 and len(ids) < limit:
+        tag_start = html.rfind('<', 0, pos)
+        tag_end = html.find('>', pos)
+        attr = ID_ATTR_RE.search(html, tag_start, tag_end)
+        ids.append(attr.group(1) if attr else '')
+        pos = html.find(ITEM_MARKER, pos + 1)
+    return ids
+
+def has_next_page(html: str) -> bool:
+    """Есть ли ссылка на следующую страницу выдачи"""
+    return NEXT_PAGE_MARKER in html
+
+# ===================== ВЫБОР ДВИЖКА =====================
+
+BACKENDS = {
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend,
+    'bs4': SoupBackend,
+}
+
+_backends: Dict[str, ParserBackend] = {}
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """Движок по имени; 'auto' - первый доступный из lxml, selectolax, bs4"""
+    name = name or Config.PARSER_BACKEND
+    names = list(BACKENDS) if name == 'auto' else [name]
+
+    for candidate in names:
+        if candidate not in BACKENDS:
+            raise ValueError(f"Unknown HTML parser backend: {candidate}")
+        if candidate in _backends:
+            return _backends[candidate]
+        try:
+            backend = BACKENDS[candidate]()
+        except ImportError:
+            continue
+        _backends[candidate] = backend
+        return backend
+
+    raise ImportError(f"No HTML parser backend available for '{name}'")
+
+def extract_ads(html: str, limit: int, backend: Optional[str] = None) -> List[Ad]:
+    """Разобрать страницу выдачи выбранным движком"""
+    return get_backend(backend).extract(html, limit)
+
+def iter_ads(html: str, limit: int, backend: Optional[str] = None) -> Iterator[Ad]:
+    """То же, но по одному объявлению - для вывода по мере разбора"""
+    return get_backend(backend).iter_ads(html, limit)
+
+def parse_ads(html: str, limit: int, query: str = '', backend: Optional[str] = None) -> List[Dict]:
+    """То же, но словарями с query и found_at (формат AvitoParser)"""
+    found_at = datetime.now().isoformat()
+    return [ad.to_dict(query, found_at) for ad in extract_ads(html, limit, backend)]
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Fetch Policy - повторы, адаптивное замедление и предохранитель для Avito
+- временные ошибки (сеть, таймаут, 5xx) повторяются до Config.MAX_RETRIES
+  раз с экспоненциальной паузой и случайной добавкой (full jitter);
+- 429/403 - признак блокировки: темп хоста в токен-бакете режется вдвое
+  и потом плавно восстанавливается на успешных ответах (AIMD);
+- BREAKER_THRESHOLD блокировок подряд размыкают предохранитель: запросы
+  к хосту не отправляются BREAKER_COOLDOWN секунд, затем один пробный.
+call() - для asyncio, call_sync() - для потоков (requests); состояние общее.
+"""
+
+import sys
+import time
+import random
+import asyncio
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import aiohttp
+
+from config.settings import Config
+from src.ratelimit import TokenBucket
+
+AVITO_HOST = urlparse(Config.AVITO_BASE_URL).netloc
+BLOCK_STATUSES = (403, 429)
+
+class CircuitOpenError(RuntimeError):
+    """Хост заблокировал нас - запросы приостановлены"""
+
+class BadStatusError(RuntimeError):
+    """Итоговый ответ не 200 (после всех повторов)"""
+
+    def __init__(self, status: int, what: str = ''):
+        super().__init__(f"HTTP {status}" + (f" for {what}" if what else ''))
+        self.status = status
+
+# Чем может закончиться загрузка через call(): для мест, где ошибку страницы
+# надо пережить, не теряя уже собранное
+FETCH_ERRORS = (BadStatusError, CircuitOpenError, aiohttp.ClientError, asyncio.TimeoutError)
+
+def backoff_delay(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Пауза перед повтором номер attempt (с 0): случайная в [0, base * 2^attempt], не больше cap"""
+    base = Config.RETRY_BACKOFF_BASE if base is None else base
+    cap = Config.RETRY_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def _retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get('Retry-After')) if headers else None
+    except (TypeError, ValueError):
+        return None   # HTTP-дата вместо секунд - берем обычную паузу
+
+# ===================== ПРЕДОХРАНИТЕЛЬ =====================
+
+class CircuitBreaker:
+    """closed -> (threshold блокировок подряд) -> open -> (cooldown) -> half-open"""
+
+    def __init__(self, threshold: Optional[int] = None, cooldown: Optional[float] = None):
+        self.threshold = threshold or Config.BREAKER_THRESHOLD
+        self.cooldown = cooldown if cooldown is not None else Config.BREAKER_COOLDOWN
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe = False
+        self._lock = threading.Lock()   # call_sync() зовут из рабочих потоков
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return 'open'
+        return 'half-open'
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос (в half-open - только один пробный)"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probe:
+                self._probe = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe = False
+
+    def release(self):
+        """Ответ ни о чем не говорит (сеть, 5xx) - пробный запрос можно повторить"""
+        with self._lock:
+            self._probe = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe = False
+            if self.failures >= self.threshold:
+                # В half-open счетчик уже за порогом - неудачная проба снова размыкает
+                if self.state != 'open':
+                    print(f"🛑 Circuit open for {self.cooldown:.0f}s after {self.failures} blocked responses")
+                self.opened_at = time.monotonic()
+
+# ===================== ПОЛИТИКА =====================
+
+class FetchPolicy:
+    """Повторы и реакция на блокировки для запросов к хостам"""
+
+    def __init__(self, retries: Optional[int] = None):
+        self.retries = Config.MAX_RETRIES if retries is None else retries
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Хост -> {бакет: исходный темп}; у бота, парсера и воркеров бакеты свои,
+        # а блокировка хоста замедляет всех. Брошенные бакеты выпадают сами.
+        self._buckets: Dict[str, 'weakref.WeakKeyDictionary[TokenBucket, float]'] = {}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker()
+        return self._breakers[host]
+
+    def attach(self, host: str, bucket: TokenBucket):
+        """Токен-бакет хоста, темп которого регулируется (исходный темп - потолок;
+        бакет без лимита, rate <= 0, не трогаем). Бакетов на хост может быть несколько"""
+        if bucket.rate <= 0:
+            return
+        buckets = self._buckets.setdefault(host, weakref.WeakKeyDictionary())
+        buckets.setdefault(bucket, bucket.rate)
+
+    def _slow_down(self, host: str):
+        for bucket in list(self._buckets.get(host, ())):
+            bucket.rate = max(Config.THROTTLE_MIN_RATE, bucket.rate / 2)
+            print(f"🐢 {host}: slowing down to {bucket.rate:.2f} req/s")
+
+    def _speed_up(self, host: str):
+        for bucket, ceiling in list(self._buckets.get(host, {}).items()):
+            bucket.rate = min(ceiling, bucket.rate + ceiling * Config.THROTTLE_RECOVERY)
+
+    def _verdict(self, host: str, breaker: CircuitBreaker, result: Tuple[int, Any, Any],
+                 attempt: int, last: bool) -> Optional[float]:
+        """Разобрать ответ: None - вернуть его, иначе пауза перед повтором"""
+        status, _, headers = result
+        if status in BLOCK_STATUSES:
+            breaker.failure()
+            self._slow_down(host)
+            if last or breaker.state == 'open':
+                return None
+            wait = _retry_after(headers)
+            if wait is None:
+                wait = backoff_delay(attempt + 1)
+            return min(wait, Config.RETRY_BACKOFF_MAX)
+        if status >= 500:
+            breaker.release()
+            return None if last else backoff_delay(attempt)
+        breaker.success()
+        self._speed_up(host)
+        return None
+
+    def _network_error(self, host: str, breaker: CircuitBreaker, error: Exception,
+                       attempt: int, last: bool) -> float:
+        breaker.release()
+        if last:
+            raise error
+        print(f"🔁 {host}: {type(error).__name__}, retry {attempt + 1}/{self.retries}")
+        return backoff_delay(attempt)
+
+    async def call(self, host: str, request: Callable[[], Awaitable[Tuple[int, Any, Any]]]) -> Tuple[int, Any, Any]:
+        """request() -> (status, body, headers). Возвращает первый ответ, который
+        не надо повторять (или последний); сетевые ошибки после всех попыток -
+        исключением. Разомкнутый предохранитель - CircuitOpenError сразу."""
+        breaker = self.breaker(host)
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"{host} paused after repeated blocks")
+
+            last = attempt == self.retries
+            try:
+                result = await request()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                await asyncio.sleep(self._network_error(host, breaker, e, attempt, last))
+                continue
+
+            wait = self._verdict(host, breaker, result, attempt, last)
+            if wait is None:
+                return result
+            await asyncio.sleep(wait)
+
+    def call_sync(self, host: str, request: Callable[[], Tuple[int, Any, Any]]) -> Tuple[int, Any, Any]:
+        """call() для потоков: request() синхронный (requests), паузы - time.sleep.
+        Сетевые ошибки requests - наследники OSError."""
+        breaker = self.breaker(host)
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"{host} paused after repeated blocks")
+
+            last = attempt == self.retries
+            try:
+                result = request()
+            except OSError as e:
+                time.sleep(self._network_error(host, breaker, e, attempt, last))
+                continue
+
+            wait = self._verdict(host, breaker, result, attempt, last)
+            if wait is None:
+                return result
+            time.sleep(wait)
+
+_policy: Optional[FetchPolicy] = None
+
+def get_policy() -> FetchPolicy:
+    """Общая политика процесса"""
+    global _policy
+    if _policy is None:
+        _policy = FetchPolicy()
+    return _policy
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+HTTP Session - один aiohttp.ClientSession на процесс
+Keep-alive пул соединений, DNS-кэш, cookies между запусками
+и общий таймаут Config.REQUEST_TIMEOUT
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import aiohttp
+
+from config.settings import Config
+
+COOKIES_FILE = Config.DATA_DIR / 'cookies.pkl'
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# ===================== СЕССИЯ =====================
+
+def _make_cookie_jar() -> aiohttp.CookieJar:
+    """Cookie jar, восстановленный с диска"""
+    jar = aiohttp.CookieJar()
+    if COOKIES_FILE.exists():
+        try:
+            jar.load(COOKIES_FILE)
+        except Exception as e:
+            print(f"⚠️ Cookies not loaded: {e}")
+    return jar
+
+async def get_session() -> aiohttp.ClientSession:
+    """Общая сессия (создается при первом вызове в текущем event loop)"""
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=Config.HTTP_POOL_SIZE,
+            limit_per_host=Config.HTTP_POOL_PER_HOST,
+            ttl_dns_cache=Config.HTTP_DNS_TTL,
+            keepalive_timeout=Config.HTTP_KEEPALIVE,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            cookie_jar=_make_cookie_jar(),
+            timeout=aiohttp.ClientTimeout(total=Config.REQUEST_TIMEOUT),
+        )
+        _session_loop = loop
+
+    return _session
+
+async def close_session():
+    """Сохранить cookies и закрыть сессию (вызывать при завершении)"""
+    global _session, _session_loop
+
+    if _session is None:
+        return
+
+    if not _session.closed:
+        try:
+            COOKIES_FILE.parent.mkdir(parents=True, exist_ok=True)
+            _session.cookie_jar.save(COOKIES_FILE)
+        except Exception as e:
+            print(f"⚠️ Cookies not saved: {e}")
+        await _session.close()
+
+    _session = None
+    _session_loop = None
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Inline Search - inline-режим бота (@бот iphone 13 в любом чате)
+Ответ собирается из общего кэша выдачи. Живой запрос к Avito идет, только
+если успевает до INLINE_DEADLINE, иначе отдается закэшированная выдача
+подходящего популярного запроса. Нажатия одного пользователя склеиваются
+(INLINE_DEBOUNCE), вероятные продолжения из trends.json грузятся в кэш заранее.
+"""
+
+import sys
+import json
+import time
+import heapq
+import asyncio
+from bisect import bisect_left
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegram import (InlineKeyboardButton, InlineKeyboardMarkup, InlineQuery,
+                      InlineQueryResultArticle, InputTextMessageContent)
+from telegram.error import TelegramError
+
+from config.settings import Config
+from src.extractor import Ad
+from src.result_cache import get_cache, normalize
+from src.digest import ad_line, format_price
+
+TRENDS_FILE = Config.DATA_DIR / 'trends.json'
+
+Fetcher = Callable[[str, int], Awaitable[List[Ad]]]
+
+# ===================== ПОДСКАЗКИ =====================
+
+class Completions:
+    """Популярные запросы из trends.json - продолжения по префиксу"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or TRENDS_FILE)
+        self.mtime: Optional[float] = None
+        self.counts: Dict[str, int] = {}
+        self.keys: List[str] = []   # отсортированы для поиска по префиксу
+
+    def refresh(self):
+        """Перечитать trends.json, если файл изменился"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self.mtime:
+            return
+        try:
+            trends = json.loads(self.path.read_text(encoding='utf-8'))
+        except ValueError as e:
+            print(f"⚠️ {self.path.name} unreadable: {e}")
+            return
+        counts: Dict[str, int] = {}
+        for query, count in trends.items():
+            key = normalize(query)
+            counts[key] = counts.get(key, 0) + int(count)
+        self.counts, self.keys, self.mtime = counts, sorted(counts), mtime
+
+    def complete(self, prefix: str, n: int) -> List[str]:
+        """До n самых популярных запросов, начинающихся с prefix"""
+        self.refresh()
+        prefix = normalize(prefix)
+        matches = []
+        for key in self.keys[bisect_left(self.keys, prefix):]:
+            if not key.startswith(prefix):
+                break
+            matches.append(key)
+        return heapq.nlargest(n, matches, key=self.counts.__getitem__)
+
+def rank(ads: List[Ad], query: str) -> List[Ad]:
+    """Выше - объявления, в названии которых больше слов запроса; дальше - порядок Avito"""
+    words = normalize(query).split()
+    scored = sorted(enumerate(ads), key=lambda item: (-sum(w in item[1].title.lower() for w in words), item[0]))
+    return [ad for _, ad in scored]
+
+def build_results(ads: List[Ad], query: str) -> List[InlineQueryResultArticle]:
+    """Карточки inline-ответа. Объявления без ссылки пропускаются: пустой url
+    у карточки или кнопки - BadRequest на весь answerInlineQuery"""
+    results = []
+    for ad in ads:
+        if not ad.url:
+            continue
+        ad_dict = ad.to_dict(query)
+        description = format_price(ad.price) + (f" · {ad.location}" if ad.location else "")
+        results.append(InlineQueryResultArticle(
+            id=ad.id[:64],
+            title=ad.title,
+            description=description,
+            url=ad.url,
+            input_message_content=InputTextMessageContent(
+                ad_line(ad_dict, bullet='📌'),
+                parse_mode='Markdown'
+            ),
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔗 Открыть объявление", url=ad.url)]
+            ]),
+        ))
+    return results
+
+# ===================== ОТВЕТЫ =====================
+
+class InlineSearch:
+    """Ответы на inline-запросы с дебаунсом и предзагрузкой продолжений"""
+
+    def __init__(self, fetch: Fetcher, completions: Optional[Completions] = None,
+                 limit: Optional[int] = None):
+        self.fetch = fetch          # загрузка через общий кэш, ошибки - исключением
+        self.completions = completions or Completions()
+        self.limit = limit or Config.BOT_SEARCH_RESULTS   # тот же limit, что у /search - общие записи кэша
+        self.latest: Dict[int, str] = {}                  # user_id -> id последнего inline-запроса
+        self.prefetching: Set[str] = set()
+        self.prefetch_slots = asyncio.Semaphore(Config.INLINE_PREFETCH_CONCURRENCY)
+        self.tasks: Set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ Inline fetch failed: {task.exception()}")
+
+    async def answer(self, inline_query: InlineQuery) -> bool:
+        """Ответить на запрос; False - пропущен (пользователь печатает дальше или запрос короткий)"""
+        started = time.monotonic()
+        user_id = inline_query.from_user.id
+        self.latest[user_id] = inline_query.id
+        await asyncio.sleep(Config.INLINE_DEBOUNCE)
+        if self.latest.get(user_id) != inline_query.id:
+            return False
+        del self.latest[user_id]
+
+        query = normalize(inline_query.query)
+        if len(query) < Config.INLINE_MIN_CHARS:
+            return False
+
+        ads = await self.lookup(query, Config.INLINE_DEADLINE - (time.monotonic() - started))
+        self.prefetch(query)
+        try:
+            await inline_query.answer(
+                build_results(ads, query),
+                cache_time=Config.INLINE_CACHE_TIME,
+                is_personal=False
+            )
+        except TelegramError as e:
+            print(f"❌ Inline answer error: {e}")
+            return False
+        return True
+
+    async def lookup(self, query: str, timeout: float) -> List[Ad]:
+        """Выдача из кэша; иначе живой запрос, если успевает за timeout
+        (не успел - догрузится в кэш к следующему нажатию); иначе кэш продолжений"""
+        ads = get_cache().get(query, self.limit)
+        if ads is not None:
+            return rank(ads, query)
+
+        if timeout > 0:
+            fetch = self._spawn(self.fetch(query, self.limit))
+            try:
+                return rank(await asyncio.wait_for(asyncio.shield(fetch), timeout), query)
+            except asyncio.TimeoutError:
+                pass
+            except Exception:
+                pass   # сообщит _done
+
+        for completion in self.completions.complete(query, Config.INLINE_PREFETCH):
+            ads = get_cache().get(completion, self.limit)
+            if ads:
+                return rank(ads, query)
+        return []
+
+    def prefetch(self, query: str):
+        """В фоне загрузить в кэш популярные продолжения запроса"""
+        for completion in self.completions.complete(query, Config.INLINE_PREFETCH):
+            if completion == query or completion in self.prefetching:
+                continue
+            if get_cache().get(completion, self.limit) is not None:
+                continue
+            self.prefetching.add(completion)
+            self._spawn(self._prefetch(completion))
+
+    async def _prefetch(self, query: str):
+        try:
+            async with self.prefetch_slots:
+                await self.fetch(query, self.limit)
+        finally:
+            self.prefetching.discard(query)
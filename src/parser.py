@@ -9,39 +9,63 @@ import sys
 import json
 import asyncio
 import random
+import hashlib
 from pathlib import Path
+from collections import deque
+from contextlib import aclosing
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import aiohttp
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Bot
+
+from config.settings import Config
+from src.crawler import CrawlScheduler
+from src.fetch_policy import FETCH_ERRORS, BadStatusError, get_policy
+from src.http_session import get_session, close_session
+from src.user_agents import get_user_agents
+from src.extractor import Ad, extract_ads, scan_ids, has_next_page
+from src.result_cache import get_cache, normalize
+from src.telegram_sender import close_senders
+from src.digest import DigestNotifier
+from src.subscriptions import SubscriptionIndex
+from src.seen_index import SeenIndex
+from src.storage import Store
+from src.price_archive import PriceArchive
 
 # ===================== КОНФИГ =====================
 
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 ADMIN_IDS = list(map(int, os.getenv('TELEGRAM_ADMIN_IDS', '').split(','))) if os.getenv('TELEGRAM_ADMIN_IDS') else []
 
-BASE_DIR = Path(__file__).parent.parent.parent
-DATA_DIR = BASE_DIR / 'data'
-DATA_DIR.mkdir(exist_ok=True)
+BASE_DIR = Config.BASE_DIR
+DATA_DIR = Config.DATA_DIR
 
+# prices.json / trends.json - выгрузка для веб-дашборда,
+# данные живут в Store и PriceArchive
 PRICES_FILE = DATA_DIR / 'prices.json'
 TRENDS_FILE = DATA_DIR / 'trends.json'
-SEEN_ADS_FILE = DATA_DIR / 'seen_ads.json'
+SEEN_ADS_FILE = DATA_DIR / 'seen_ads.json'   # старый формат, импортируется один раз
+SEEN_INDEX_FILE = DATA_DIR / 'seen_ads.idx'
+
+PAGE_SIZE = 100  # больше, чем объявлений на странице выдачи
 
 # ===================== ПАРСЕР =====================
 
 class AvitoParser:
     """Парсер Avito с антиблокировкой"""
     
-    BASE_URL = "https://www.avito.ru"
+    BASE_URL = Config.AVITO_BASE_URL
     
-    def __init__(self):
-        self.ua = UserAgent()
+    def __init__(self, scheduler: Optional[CrawlScheduler] = None):
+        self.ua = get_user_agents()
+        self.scheduler = scheduler or CrawlScheduler()
+        self.host = urlparse(self.BASE_URL).netloc
+        # Повторы и замедление при блокировках регулируют темп бакета этого хоста
+        self.policy = get_policy()
+        self.policy.attach(self.host, self.scheduler.host(self.host).bucket)
     
     def _get_headers(self):
         """Реальные заголовки браузера"""
@@ -59,87 +83,157 @@ class AvitoParser:
             'Cache-Control': 'max-age=0',
         }
     
-    async def search(self, query: str, limit: int = 10) -> List[Dict]:
-        """Поиск объявлений"""
-        async with aiohttp.ClientSession() as session:
-            try:
+    async def _get(self, query: str, page: int = 1, headers: Optional[Dict] = None):
+        """GET страницы выдачи: (status, html, headers). Каждая попытка идет через
+        бюджет хоста, повторы и предохранитель - в FetchPolicy"""
+        params = {'q': query}
+        if page > 1:
+            params['p'] = page
+        
+        async def request():
+            session = await get_session()
+            async with session.get(
+                f"{self.BASE_URL}/rossiya",
+                params=params,
+                headers=headers or self._get_headers()
+            ) as response:
+                html = await response.text() if response.status == 200 else ''
+                return response.status, html, response.headers
+        
+        return await self.policy.call(self.host, lambda: self.scheduler.submit(self.host, request))
+    
+    async def _fetch_page(self, query: str, page: int = 1) -> str:
+        """HTML страницы выдачи (ошибки HTTP - исключением, чтобы не попасть в кэш)"""
+        status, html, _ = await self._get(query, page)
+        if status != 200:
+            raise BadStatusError(status, f"{query} (page {page})")
+        return html
+    
+    async def search(self, query: str, limit: int = 10, delay: bool = True) -> List[Dict]:
+        """Поиск объявлений через общий кэш (delay=False - паузы делает CrawlScheduler)"""
+        async def fetch(query: str, limit: int) -> List[Ad]:
+            if delay:
                 await asyncio.sleep(random.uniform(2, 4))
+            return await self._fetch(query, limit)
+        
+        try:
+            ads = await get_cache().fetch(query, limit, fetch)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return []
+        
+        found_at = datetime.now().isoformat()
+        return [ad.to_dict(query, found_at) for ad in ads]
+    
+    async def _fetch(self, query: str, limit: int) -> List[Ad]:
+        """Загрузка первой страницы выдачи с Avito"""
+        return self._parse_results(await self._fetch_page(query), limit)
+    
+    async def iter_ads(self, query: str, start_page: int = 1, max_pages: Optional[int] = None,
+                       prefetch: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Объявления по всем страницам выдачи по мере разбора.
+        Пока разбирается страница n, грузятся n+1..n+prefetch; в памяти -
+        не больше prefetch+1 страниц. Остановка - break у вызывающего
+        (через contextlib.aclosing - недогруженные страницы отменяются),
+        пустая страница, нет ссылки на следующую или max_pages."""
+        max_pages = max_pages or Config.CRAWL_MAX_PAGES
+        prefetch = Config.CRAWL_PREFETCH if prefetch is None else prefetch
+        last_page = start_page + max_pages - 1
+        next_page = start_page
+        pending = deque()
+        yielded = set()
+        
+        try:
+            while True:
+                while next_page <= last_page and len(pending) <= prefetch:
+                    pending.append(asyncio.ensure_future(self._fetch_page(query, next_page)))
+                    next_page += 1
+                if not pending:
+                    return
                 
-                headers = self._get_headers()
-                params = {'q': query}
+                html = await pending.popleft()
+                ads = self._parse_results(html, PAGE_SIZE)
+                if not ads:
+                    return
                 
-                async with session.get(
-                    f"{self.BASE_URL}/rossiya",
-                    params=params,
-                    headers=headers,
-                    timeout=30
-                ) as response:
-                    
-                    if response.status != 200:
-                        print(f"❌ HTTP {response.status} for {query}")
-                        return []
-                    
-                    html = await response.text()
-                    return self._parse_results(html, limit)
-                    
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                return []
+                found_at = datetime.now().isoformat()
+                for ad in ads:
+                    # Продвигаемые объявления повторяются на разных страницах
+                    if ad.id not in yielded:
+                        yielded.add(ad.id)
+                        yield ad.to_dict(query, found_at)
+                
+                if not has_next_page(html):
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+            # Забираем исключения уже завершившихся загрузок (например, 404 за последней
+            # страницей), иначе asyncio пишет "Task exception was never retrieved"
+            await asyncio.gather(*pending, return_exceptions=True)
     
-    def _parse_results(self, html: str, limit: int) -> List[Dict]:
-        """Парсинг HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
-        ads = []
+    async def crawl(self, query: str, seen: SeenIndex, state: Optional[Dict] = None,
+                    max_ads: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+        """Инкрементальный обход для cron: (новые объявления, новое состояние).
+        Условный запрос по ETag/Last-Modified; при 200 - отпечаток списка ID
+        (регуляркой, без парсера): совпал - выдача не менялась. Иначе разбираются
+        только объявления до первого уже виденного (выдача - от новых к старым);
+        если новые - вся первая страница, обход идет дальше по страницам."""
+        max_ads = max_ads or Config.CRAWL_MAX_ADS
+        state = dict(state or {'query': query})
+        now = datetime.now().isoformat()
+        state['checked_at'] = now
+        
+        headers = self._get_headers()
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        
+        status, html, response_headers = await self._get(query, headers=headers)
+        if status == 304:
+            return [], state
+        if status != 200:
+            raise BadStatusError(status, query)
+        state['etag'] = response_headers.get('ETag')
+        state['last_modified'] = response_headers.get('Last-Modified')
+        
+        ids = scan_ids(html, max_ads)
+        fingerprint = hashlib.blake2b('\n'.join(ids).encode(), digest_size=8).hexdigest()
+        if fingerprint == state.get('fingerprint'):
+            return [], state
+        state['fingerprint'] = fingerprint
+        state['changed_at'] = now
         
-        items = soup.select('[data-marker="item"]')
+        fresh = 0
+        for ad_id in ids:
+            if ad_id and ad_id in seen:
+                break
+            fresh += 1
         
-        for item in items[:limit]:
+        ads = [ad.to_dict(query, now) for ad in self._parse_results(html, fresh)] if fresh else []
+        
+        # Вся страница новая - догоняем по следующим страницам до первого виденного
+        if ids and fresh == len(ids) and len(ads) < max_ads and has_next_page(html):
+            known = {ad['id'] for ad in ads}
             try:
-                # ID объявления
-                ad_id = item.get('id', '')
-                if not ad_id:
-                    continue
-                
-                # Заголовок
-                title_elem = item.select_one('[itemprop="name"]')
-                title = title_elem.text.strip() if title_elem else "Без названия"
-                
-                # Цена
-                price_elem = item.select_one('[itemprop="price"]')
-                price = price_elem.get('content', '0') if price_elem else '0'
-                
-                # Ссылка
-                link_elem = item.select_one('a[href*="/"]')
-                if link_elem:
-                    href = link_elem.get('href', '')
-                    url = f"{self.BASE_URL}{href}" if href.startswith('/') else href
-                else:
-                    url = ""
-                
-                # Дата
-                date_elem = item.select_one('[data-marker="item-date"]')
-                date = date_elem.text.strip() if date_elem else ""
-                
-                # Местоположение
-                location_elem = item.select_one('[class*="address"]')
-                location = location_elem.text.strip() if location_elem else ""
-                
-                ads.append({
-                    'id': ad_id,
-                    'title': title[:100],
-                    'price': price,
-                    'url': url,
-                    'date': date,
-                    'location': location,
-                    'query': query,
-                    'found_at': datetime.now().isoformat()
-                })
-                
-            except Exception as e:
-                print(f"❌ Parse error: {e}")
-                continue
+                async with aclosing(self.iter_ads(query, start_page=2)) as more:
+                    async for ad in more:
+                        if ad['id'] in seen or len(ads) >= max_ads:
+                            break
+                        if ad['id'] not in known:
+                            known.add(ad['id'])
+                            ads.append(ad)
+            except FETCH_ERRORS as e:
+                # Первая страница уже разобрана и отпечаток обновлен - отдаем собранное,
+                # иначе следующий запуск увидит "без изменений" и эти объявления потеряются
+                print(f"⚠️ {query}: stopped paging after {len(ads)} ads: {e}")
         
-        return ads
+        return ads, state
+    
+    def _parse_results(self, html: str, limit: int) -> List[Ad]:
+        """Парсинг HTML (движок выбирается в Config.PARSER_BACKEND)"""
+        return extract_ads(html, limit)
 
 # ===================== БАЗА ДАННЫХ =====================
 
@@ -155,79 +249,47 @@ def load_json(file: Path, default: dict = None):
     return default
 
 def save_json(file: Path, data: dict):
-    """Сохранить JSON"""
-    file.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+    """Сохранить JSON атомарно (temp-файл + rename)"""
+    tmp = file.with_suffix(file.suffix + '.tmp')
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, file)
 
 # ===================== СТАТИСТИКА =====================
 
-def update_prices(query: str, price: float):
-    """Обновить историю цен"""
-    prices = load_json(PRICES_FILE, {})
-    
-    if query not in prices:
-        prices[query] = []
+class StatsBuffer:
+    """Буфер объявлений, цен и трендов за запуск - пишется одним пакетом в flush()"""
     
-    prices[query].append({
-        'price': price,
-        'time': datetime.now().isoformat()
-    })
+    def __init__(self, max_points: int = 100):
+        self.max_points = max_points  # точек на запрос в prices.json (архив хранит все)
+        self.ads: List[Dict] = []
+        self.prices: List[tuple] = []
+        self.trends: Dict[str, int] = {}
     
-    # Храним только последние 100 значений
-    if len(prices[query]) > 100:
-        prices[query] = prices[query][-100:]
-    
-    save_json(PRICES_FILE, prices)
-
-def update_trends(query: str):
-    """Обновить тренды запросов"""
-    trends = load_json(TRENDS_FILE, {})
+    def add_ad(self, ad: Dict):
+        """Новое объявление"""
+        self.ads.append(ad)
     
-    if query not in trends:
-        trends[query] = 0
+    def add_price(self, query: str, price: float):
+        """Новая точка истории цен"""
+        self.prices.append((query, price, datetime.now().isoformat()))
     
-    trends[query] += 1
+    def add_trend(self, query: str):
+        """Запрос проверен еще раз"""
+        self.trends[query] = self.trends.get(query, 0) + 1
     
-    # Сортируем по популярности
-    trends = dict(sorted(trends.items(), key=lambda x: x[1], reverse=True))
-    
-    save_json(TRENDS_FILE, trends)
-
-# ===================== УВЕДОМЛЕНИЯ =====================
-
-async def send_notification(bot: Bot, user_id: int, ad: Dict):
-    """Отправить уведомление о новом объявлении"""
-    try:
-        price = int(float(ad['price'])) if ad['price'].replace('.', '').isdigit() else 0
-        if price >= 1000:
-            price_text = f"{price/1000:.0f} тыс ₽"
-        else:
-            price_text = f"{price} ₽"
-        
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔗 Открыть объявление", url=ad['url'])]
-        ])
-        
-        text = (
-            f"🆕 **Новое объявление!**\n\n"
-            f"🔍 **Запрос:** {ad['query']}\n"
-            f"🏷 **{ad['title']}**\n"
-            f"💰 **Цена:** {price_text}\n"
-        )
-        
-        if ad['location']:
-            text += f"📍 **Место:** {ad['location']}\n"
+    def flush(self, store: Store, archive: PriceArchive):
+        """Записать накопленное в базу и архив, обновить выгрузки для дашборда"""
+        store.add_ads(self.ads)
+        archive.append_many(self.prices)
+        store.bump_queries(self.trends)
+        self.ads, self.prices, self.trends = [], [], {}
         
-        await bot.send_message(
-            chat_id=user_id,
-            text=text,
-            parse_mode='Markdown',
-            reply_markup=keyboard,
-            disable_web_page_preview=False
-        )
-        return True
-    except Exception as e:
-        print(f"❌ Send error: {e}")
-        return False
+        # Выгрузка: последние max_points цен, запросы по популярности
+        trends = dict(store.top_queries())
+        prices = archive.recent(self.max_points)
+        prices = dict(sorted(prices.items(), key=lambda x: -trends.get(x[0], 0)))
+        save_json(PRICES_FILE, prices)
+        save_json(TRENDS_FILE, trends)
 
 # ===================== ОСНОВНОЕ =====================
 
@@ -239,52 +301,95 @@ async def main():
         print("❌ No token!")
         return
     
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
     bot = Bot(token=TOKEN)
-    parser = AvitoParser()
+    scheduler = CrawlScheduler()
+    parser = AvitoParser(scheduler)
     
     # Загружаем просмотренные объявления
-    seen_ads = load_json(SEEN_ADS_FILE, {"ads": []})
+    seen_ads = SeenIndex.load(SEEN_INDEX_FILE, legacy_json=SEEN_ADS_FILE)
     
-    # Топ-5 запросов для проверки
-    trends = load_json(TRENDS_FILE, {})
-    top_queries = list(trends.keys())[:5] if trends else ["iphone 13", "macbook", "ps5", "велосипед", "диван"]
+    store = Store()
+    store.import_trends(TRENDS_FILE)
+    archive = PriceArchive()
+    archive.import_json(PRICES_FILE)
     
-    print(f"🔍 Checking {len(top_queries)} queries...")
+    # Топ запросов для проверки
+    trends = store.top_queries(Config.CRAWL_MAX_QUERIES)
+    top_queries = [q for q, _ in trends] if trends else ["iphone 13", "macbook", "ps5", "велосипед", "диван"]
+    
+    # Запросы подписок: каждый уникальный запрос обходится один раз,
+    # сколько бы у него ни было подписчиков
+    subscriptions = SubscriptionIndex.load(store)
+    trend_keys = {normalize(q) for q in top_queries}
+    queries = top_queries + [q for q in subscriptions.queries() if q not in trend_keys]
+    
+    print(f"🔍 Checking {len(queries)} queries ({len(subscriptions)} subscriptions)...")
+    
+    # Все запросы параллельно: каждая загрузка страницы идет через бюджет
+    # хоста планировщика; разбираются только изменившиеся выдачи (см. AvitoParser.crawl)
+    states = store.crawl_states()
+    # Первый обход запроса только заполняет индекс виденных: его выдача - не "новые"
+    # объявления, а сотня уже висящих, и рассылать их сводкой незачем
+    first_crawl = {q for q in queries if not (states.get(q) or {}).get('fingerprint')}
+    try:
+        results = await asyncio.gather(
+            *(parser.crawl(q, seen_ads, states.get(q)) for q in queries),
+            return_exceptions=True
+        )
+    finally:
+        await close_session()
+    
+    store.save_crawl_states(r[1] for r in results if not isinstance(r, Exception))
+    results = [r if isinstance(r, Exception) else r[0] for r in results]
     
     new_ads_count = 0
+    new_ids = set()
+    stats = StatsBuffer()
+    notifier = DigestNotifier(bot, ADMIN_IDS)
     
-    for query in top_queries:
-        print(f"  📍 Searching: {query}")
+    for query, ads in zip(queries, results):
+        if isinstance(ads, Exception):
+            print(f"  ❌ {query}: {ads}")
+            continue
         
-        ads = await parser.search(query, limit=3)
+        notify = query not in first_crawl
+        print(f"  📍 {query}: {len(ads)} new ads" + ("" if notify else " (first crawl, not notified)"))
+        is_trend = normalize(query) in trend_keys
         
         for ad in ads:
-            if ad['id'] not in seen_ads['ads']:
-                seen_ads['ads'].append(ad['id'])
+            # Новое - впервые увиденное, в том числе другим запросом в этом же запуске
+            if seen_ads.add(ad['id']):
+                new_ids.add(ad['id'])
                 new_ads_count += 1
-                
-                # Отправляем уведомления админам
-                for admin_id in ADMIN_IDS:
-                    await send_notification(bot, admin_id, ad)
-                
-                # Обновляем статистику цен
-                try:
-                    price_val = float(ad['price'])
-                    update_prices(query, price_val)
-                except:
-                    pass
-                
-                await asyncio.sleep(0.5)
-        
-        await asyncio.sleep(random.uniform(1, 3))
+                stats.add_ad(ad)
+            elif ad['id'] not in new_ids:
+                continue
+            
+            # Уведомления админам (по топ-запросам) и подписчикам - сводкой в конце запуска
+            if notify:
+                if is_trend:
+                    notifier.add(ad)
+                notifier.add(ad, subscriptions.match(query, ad['price']))
+            
+            # Обновляем статистику цен
+            if ad['price']:
+                stats.add_price(query, ad['price'])
+    
+    sent = await notifier.flush()
+    await close_senders()
+    if sent:
+        print(f"📨 Sent {sent} notification messages")
     
     # Обновляем тренды
     for query in top_queries:
-        update_trends(query)
+        stats.add_trend(query)
+    stats.flush(store, archive)
+    store.close()
     
-    # Сохраняем просмотренные (храним последние 1000)
-    seen_ads['ads'] = seen_ads['ads'][-1000:]
-    save_json(SEEN_ADS_FILE, seen_ads)
+    # Сохраняем просмотренные (старые дни отсекаются по SEEN_TTL_DAYS)
+    seen_ads.save()
+    get_cache().prune()
     
     print(f"✅ Found {new_ads_count} new ads")
     print(f"🏁 Parser finished at {datetime.now()}")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Price Archive - полная история цен по запросам
+Колоночный append-only формат: на каждый запрос два файла
+ts.i8 (int64, unix-время) и price.f8 (float64), little-endian.
+Запись - только дописывание в конец (без numpy), чтение диапазонов -
+через numpy.memmap и бинарный поиск по времени.
+"""
+
+import re
+import sys
+import json
+import hashlib
+from array import array
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+
+ARCHIVE_DIR = Config.DATA_DIR / 'price_archive'
+
+TimeLike = Union[datetime, str, int, float]
+
+def _epoch(ts: TimeLike) -> int:
+    """ISO-строка / datetime / число -> unix-время в секундах"""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if isinstance(ts, datetime):
+        return int(ts.timestamp())
+    return int(ts)
+
+def _slug(query: str) -> str:
+    """Имя папки: читаемая часть + короткий хэш"""
+    base = re.sub(r'[^\w-]+', '_', query.lower()).strip('_')[:40] or 'q'
+    return f"{base}-{hashlib.sha1(query.encode()).hexdigest()[:8]}"
+
+def _le(arr: array) -> array:
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+# ===================== АРХИВ =====================
+
+class PriceArchive:
+    """Архив цен: по паре колонок на запрос"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or ARCHIVE_DIR)
+        self.index_file = self.root / 'index.json'
+        self.index: Dict[str, str] = {}
+        if self.index_file.exists():
+            self.index = json.loads(self.index_file.read_text(encoding='utf-8'))
+
+    def queries(self) -> List[str]:
+        return list(self.index)
+
+    def _dir(self, query: str, create: bool = False) -> Optional[Path]:
+        slug = self.index.get(query)
+        if slug is None:
+            if not create:
+                return None
+            slug = self.index[query] = _slug(query)
+            (self.root / slug).mkdir(parents=True, exist_ok=True)
+            tmp = self.index_file.with_suffix('.tmp')
+            tmp.write_text(json.dumps(self.index, ensure_ascii=False, indent=2), encoding='utf-8')
+            tmp.replace(self.index_file)
+        return self.root / slug
+
+    def count(self, query: str) -> int:
+        """Число точек (по короткой колонке - на случай оборванной записи)"""
+        path = self._dir(query)
+        if path is None or not (path / 'ts.i8').exists():
+            return 0
+        return min((path / 'ts.i8').stat().st_size, (path / 'price.f8').stat().st_size) // 8
+
+    # ---------- запись ----------
+
+    def append(self, query: str, points: Iterable[Tuple[TimeLike, float]]):
+        """Дописать точки (time, price) одного запроса, время по возрастанию"""
+        ts, prices = array('q'), array('d')
+        for t, price in points:
+            ts.append(_epoch(t))
+            prices.append(float(price))
+        if not ts:
+            return
+
+        path = self._dir(query, create=True)
+        # Выравниваем колонки, если прошлая запись оборвалась посередине
+        n = self.count(query)
+        for name in ('ts.i8', 'price.f8'):
+            with open(path / name, 'ab') as f:
+                f.truncate(n * 8)
+
+        with open(path / 'ts.i8', 'ab') as f:
+            _le(ts).tofile(f)
+        with open(path / 'price.f8', 'ab') as f:
+            _le(prices).tofile(f)
+
+    def append_many(self, points: Iterable[Tuple[str, float, TimeLike]]):
+        """Дописать точки (query, price, time) нескольких запросов"""
+        by_query: Dict[str, List[Tuple[TimeLike, float]]] = {}
+        for query, price, t in points:
+            by_query.setdefault(query, []).append((t, price))
+        for query, series in by_query.items():
+            self.append(query, series)
+
+    # ---------- чтение ----------
+
+    def tail(self, query: str, n: int) -> List[Tuple[int, float]]:
+        """Последние n точек (ts, price) - без numpy, читается только хвост"""
+        total = self.count(query)
+        n = min(n, total)
+        if n <= 0:
+            return []
+
+        path = self._dir(query)
+        columns = []
+        for name, code in (('ts.i8', 'q'), ('price.f8', 'd')):
+            col = array(code)
+            with open(path / name, 'rb') as f:
+                f.seek((total - n) * 8)
+                col.frombytes(f.read(n * 8))
+            columns.append(_le(col))
+        return list(zip(*columns))
+
+    def recent(self, per_query: int) -> Dict[str, List[Dict]]:
+        """Последние per_query точек каждого запроса (формат prices.json)"""
+        return {
+            query: [
+                {'price': int(p) if p.is_integer() else p, 'time': datetime.fromtimestamp(t).isoformat()}
+                for t, p in self.tail(query, per_query)
+            ]
+            for query in self.index
+        }
+
+    def slice(self, query: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None):
+        """Точки в интервале [start, end) как пара numpy-массивов (ts, price), через memmap"""
+        import numpy as np
+
+        n = self.count(query)
+        if n == 0:
+            return np.empty(0, dtype='<i8'), np.empty(0, dtype='<f8')
+
+        path = self._dir(query)
+        ts = np.memmap(path / 'ts.i8', dtype='<i8', mode='r', shape=(n,))
+        prices = np.memmap(path / 'price.f8', dtype='<f8', mode='r', shape=(n,))
+
+        lo = int(np.searchsorted(ts, _epoch(start), 'left')) if start is not None else 0
+        hi = int(np.searchsorted(ts, _epoch(end), 'left')) if end is not None else n
+        return ts[lo:hi], prices[lo:hi]
+
+    # ---------- миграция ----------
+
+    def import_json(self, prices_file: Path):
+        """Один раз перенести историю из prices.json в пустой архив"""
+        if self.index or not prices_file.exists():
+            return
+        try:
+            prices = json.loads(prices_file.read_text(encoding='utf-8'))
+        except Exception:
+            return
+
+        for query, points in prices.items():
+            self.append(query, sorted((p['time'], p['price']) for p in points))
+
+        if prices:
+            print(f"📥 Imported {len(prices)} price series into {self.root.name}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Price Stats - векторная статистика цен по всем запросам сразу
+История грузится из архива один раз в плоские массивы (ts, price + смещения
+групп), дальше всё считается операциями NumPy без циклов по запросам.
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.price_archive import PriceArchive
+
+HOUR = 3600
+DAY = 24 * HOUR
+WINDOWS = {'24h': DAY, '7d': 7 * DAY}
+PERCENTILES = (10, 25, 75, 90)
+
+# ===================== ИСТОРИЯ =====================
+
+class PriceHistory:
+    """История цен нескольких запросов в плоских массивах.
+    Точки запроса i лежат в [offsets[i], offsets[i+1]), время по возрастанию."""
+
+    def __init__(self, queries: Sequence[str], ts: np.ndarray, price: np.ndarray, offsets: np.ndarray):
+        self.queries = list(queries)
+        self.ts = ts
+        self.price = price
+        self.offsets = offsets
+
+    @classmethod
+    def load(cls, archive: Optional[PriceArchive] = None, queries: Optional[Sequence[str]] = None,
+             since=None) -> 'PriceHistory':
+        """Загрузить из архива (все запросы или только queries, с момента since)"""
+        archive = archive or PriceArchive()
+        queries = list(queries) if queries is not None else archive.queries()
+
+        parts = [archive.slice(q, since) for q in queries]
+        lens = np.array([len(ts) for ts, _ in parts], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lens)))
+
+        if parts and offsets[-1]:
+            ts = np.concatenate([ts for ts, _ in parts]).astype(np.int64)
+            price = np.concatenate([p for _, p in parts]).astype(np.float64)
+        else:
+            ts, price = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        return cls(queries, ts, price, offsets)
+
+    @property
+    def lens(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def group(self) -> np.ndarray:
+        """Номер запроса для каждой точки"""
+        return np.repeat(np.arange(len(self.queries)), self.lens)
+
+    def tail(self, n: int) -> 'PriceHistory':
+        """Последние n точек каждого запроса"""
+        ends = self.offsets[1:][self.group]
+        keep = ends - np.arange(len(self.ts)) <= n
+        offsets = np.concatenate(([0], np.cumsum(np.minimum(self.lens, n))))
+        return PriceHistory(self.queries, self.ts[keep], self.price[keep], offsets)
+
+# ===================== АГРЕГАТЫ =====================
+
+def _group_quantile(sorted_price: np.ndarray, starts: np.ndarray, lens: np.ndarray, q: float) -> np.ndarray:
+    """Квантиль (линейная интерполяция, как np.percentile) внутри отсортированных групп"""
+    pos = starts + q * (lens - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    frac = pos - lo
+    return sorted_price[lo] * (1 - frac) + sorted_price[hi] * frac
+
+def summarize(history: PriceHistory, now: Optional[float] = None,
+              windows: Optional[Dict[str, int]] = None) -> Dict[str, np.ndarray]:
+    """Статистика по каждому запросу: count, mean, median, p10..p90, min, max,
+    last, volatility (std лог-доходностей) и change_<окно> в % к цене на начало окна.
+    Возвращает колонки (массивы длины числа запросов); пустые запросы - NaN."""
+    now = now if now is not None else time.time()
+    windows = windows if windows is not None else WINDOWS
+
+    n_groups = len(history.queries)
+    lens = history.lens
+    starts = history.offsets[:-1]
+    ends = history.offsets[1:]
+    group = history.group
+    has = lens > 0
+
+    nan = np.full(n_groups, np.nan)
+    out: Dict[str, np.ndarray] = {'count': lens}
+
+    # Среднее
+    sums = np.bincount(group, weights=history.price, minlength=n_groups)
+    out['mean'] = np.divide(sums, lens, out=nan.copy(), where=has)
+
+    # Квантили: сортировка цен внутри групп одним lexsort
+    sorted_price = history.price[np.lexsort((history.price, group))]
+    s, l = starts[has], lens[has]
+    for name, q in [('median', 0.5)] + [(f'p{p}', p / 100) for p in PERCENTILES]:
+        col = nan.copy()
+        col[has] = _group_quantile(sorted_price, s, l, q)
+        out[name] = col
+
+    for name, idx in (('min', s), ('max', s + l - 1)):
+        col = nan.copy()
+        col[has] = sorted_price[idx]
+        out[name] = col
+
+    # Последняя точка
+    last = nan.copy()
+    last[has] = history.price[ends[has] - 1]
+    out['last'] = last
+    last_ts = np.full(n_groups, -1, dtype=np.int64)
+    last_ts[has] = history.ts[ends[has] - 1]
+    out['last_ts'] = last_ts
+
+    # Волатильность: std лог-доходностей соседних точек одного запроса
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_price = np.log(np.where(history.price > 0, history.price, np.nan))
+        returns = np.diff(log_price)
+    same = (group[1:] == group[:-1]) & np.isfinite(returns)
+    r_group, r = group[1:][same], returns[same]
+    r_n = np.bincount(r_group, minlength=n_groups)
+    r_sum = np.bincount(r_group, weights=r, minlength=n_groups)
+    r_sq = np.bincount(r_group, weights=r * r, minlength=n_groups)
+    enough = r_n >= 2
+    vol = nan.copy()
+    mean_r = r_sum[enough] / r_n[enough]
+    vol[enough] = np.sqrt(np.maximum(r_sq[enough] / r_n[enough] - mean_r ** 2, 0))
+    out['volatility'] = vol
+
+    # Изменение за окно: цена последней точки не позже now - window.
+    # Ключ (запрос << 32 | время от минимума) отсортирован глобально,
+    # поэтому один searchsorted находит опорную точку для всех запросов.
+    base = int(history.ts.min()) if len(history.ts) else 0
+    key = (group.astype(np.int64) << 32) | (history.ts - base)
+    group_keys = np.arange(n_groups, dtype=np.int64) << 32
+    for name, seconds in windows.items():
+        ref = nan.copy()
+        cutoff = min(int(now) - seconds - base, 2 ** 32 - 1)
+        if cutoff >= 0:
+            idx = np.searchsorted(key, group_keys | cutoff, 'right') - 1
+            ok = has & (idx >= starts)
+            ref[ok] = history.price[idx[ok]]
+        change = nan.copy()
+        valid = ref > 0
+        change[valid] = (last[valid] - ref[valid]) / ref[valid] * 100
+        out[f'ref_{name}'] = ref
+        out[f'change_{name}'] = change
+
+    return out
+
+def to_records(history: PriceHistory, summary: Dict[str, np.ndarray]) -> List[Dict]:
+    """Колонки summarize() -> список словарей (NaN -> None) для JSON"""
+    records = []
+    for i, query in enumerate(history.queries):
+        record = {'query': query}
+        for name, col in summary.items():
+            value = col[i].item()
+            record[name] = None if isinstance(value, float) and np.isnan(value) else value
+        records.append(record)
+    return records
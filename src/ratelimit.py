@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Rate limiting - токен-бакеты для асинхронного кода (и потоков - acquire_sync)
+"""
+
+import time
+import asyncio
+import threading
+from typing import Optional
+
+# ===================== ТОКЕН-БАКЕТ =====================
+
+class TokenBucket:
+    """Токен-бакет: rate токенов в секунду, не больше burst подряд"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._thread_lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Сколько ждать до следующего токена (без списания)"""
+        self._refill()
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Дождаться и забрать токен"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        async with self._lock:
+            while True:
+                wait = self.delay()
+                if wait <= 0:
+                    self.tokens -= 1
+                    return
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        """То же для потоков (ThreadPoolExecutor): ждет без event loop"""
+        with self._thread_lock:
+            while True:
+                wait = self.delay()
+                if wait <= 0:
+                    self.tokens -= 1
+                    return
+                time.sleep(wait)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Result Cache - общий кэш выдачи Avito по запросам
+Ключ - нормализованный запрос, запись живет Config.CACHE_TTL секунд
+(пустая выдача - Config.CACHE_EMPTY_TTL: часто это сбой разметки или капча).
+В памяти - LRU, на диске - по JSON-файлу на запрос в data/cache, поэтому
+кэш общий для бота, cron-парсера и обработчиков поиска.
+Одновременные запросы одного ключа склеиваются в одну загрузку.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+from src.extractor import Ad
+
+CACHE_DIR = Config.DATA_DIR / 'cache'
+
+AsyncFetcher = Callable[[str, int], Awaitable[List[Ad]]]
+SyncFetcher = Callable[[str, int], List[Ad]]
+
+def normalize(query: str) -> str:
+    """'  iPhone   13 ' -> 'iphone 13'"""
+    return ' '.join(query.lower().split())
+
+def _file_name(key: str) -> str:
+    return hashlib.sha1(key.encode()).hexdigest()[:16] + '.json'
+
+# ===================== КЭШ =====================
+
+class ResultCache:
+    """Кэш выдачи: LRU в памяти + файлы на диске"""
+
+    def __init__(self, root: Optional[Path] = None, ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None, empty_ttl: Optional[int] = None):
+        self.root = Path(root or CACHE_DIR)
+        self.ttl = ttl if ttl is not None else Config.CACHE_TTL
+        self.empty_ttl = min(self.ttl, empty_ttl if empty_ttl is not None else Config.CACHE_EMPTY_TTL)
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self._memory: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, List] = {}      # ключ -> [замок, число потоков на нем]
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    # ---------- записи ----------
+
+    def _fresh(self, entry: Optional[Dict], limit: int) -> bool:
+        """Запись не устарела и в ней хватает объявлений
+        (меньше limit записи - значит, больше в выдаче и не было)"""
+        if entry is None:
+            return False
+        ttl = self.ttl if entry['ads'] else self.empty_ttl
+        if time.time() - entry['time'] > ttl:
+            return False
+        return entry['limit'] >= limit or len(entry['ads']) < entry['limit']
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        try:
+            entry = json.loads((self.root / _file_name(key)).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('key') == key else None
+
+    def _remember(self, key: str, entry: Dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, query: str, limit: int) -> Optional[List[Ad]]:
+        """Свежая выдача из кэша или None"""
+        key = normalize(query)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+        if not self._fresh(entry, limit):
+            entry = self._read_disk(key)
+            if not self._fresh(entry, limit):
+                return None
+            self._remember(key, entry)
+
+        return [Ad(*row) for row in entry['ads'][:limit]]
+
+    def put(self, query: str, ads: List[Ad], limit: int):
+        """Сохранить выдачу, полученную с limit"""
+        key = normalize(query)
+        entry = {'key': key, 'time': time.time(), 'limit': limit, 'ads': [list(ad) for ad in ads]}
+        self._remember(key, entry)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / _file_name(key)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Cache write failed: {e}")
+
+    def prune(self):
+        """Удалить с диска устаревшие записи и самые старые сверх max_entries"""
+        if not self.root.exists():
+            return
+        now = time.time()
+        files = sorted(self.root.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for i, path in enumerate(files):
+            if i >= self.max_entries or now - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+
+    # ---------- загрузка со склейкой ----------
+
+    async def fetch(self, query: str, limit: int, fetcher: AsyncFetcher) -> List[Ad]:
+        """Выдача из кэша, иначе fetcher(query, limit). Пока один запрос ключа
+        грузится, остальные ждут его результата. Ошибки fetcher не кэшируются."""
+        ads = self.get(query, limit)
+        if ads is not None:
+            return ads
+
+        key = normalize(query)
+        task = self._inflight.get(key)
+        if task is not None:
+            await asyncio.shield(task)
+            ads = self.get(query, limit)
+            if ads is not None:
+                return ads
+            # Загрузка шла с меньшим limit - грузим сами
+
+        async def load() -> List[Ad]:
+            try:
+                ads = await fetcher(query, limit)
+                self.put(query, ads, limit)
+                return ads
+            finally:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+        task = self._inflight[key] = asyncio.ensure_future(load())
+        return (await asyncio.shield(task))[:limit]
+
+    def fetch_sync(self, query: str, limit: int, fetcher: SyncFetcher) -> List[Ad]:
+        """То же для потоков: один поток грузит, остальные ждут на замке ключа"""
+        ads = self.get(query, limit)
+        if ads is not None:
+            return ads
+
+        key = normalize(query)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                ads = self.get(query, limit)
+                if ads is not None:
+                    return ads
+                ads = fetcher(query, limit)
+                self.put(query, ads, limit)
+                return ads[:limit]
+        finally:
+            # Последний поток ключа убирает замок - словарь не растет с числом запросов
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+
+_cache: Optional[ResultCache] = None
+
+def get_cache() -> ResultCache:
+    """Общий кэш процесса"""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
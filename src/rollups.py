@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Rollups - предагрегированные ряды цен для дашборда
+Вместо сырых prices.json/trends.json браузер получает web/rollups/:
+index.json (список запросов, топ трендов) и по файлу на запрос с часовыми,
+дневными и недельными корзинами (t, n, min, max, mean, median) в колонках.
+Число корзин ограничено ROLLUP_HOURS/DAYS/WEEKS, поэтому размер файлов
+не растет вместе с историей. Файл перезаписывается, только если изменился.
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+from src.storage import Store
+from src.price_archive import PriceArchive
+from src.price_stats import HOUR, DAY, PriceHistory, _group_quantile
+
+ROLLUP_DIR = Config.BASE_DIR / 'web' / 'rollups'
+
+WEEK = 7 * DAY
+WEEK_ORIGIN = 4 * DAY   # 1970-01-05 - понедельник
+COLUMNS = ('t', 'n', 'min', 'max', 'mean', 'median')
+
+def resolutions() -> List[Tuple[str, int, int]]:
+    """(имя, шаг корзины в секундах, сколько корзин хранить)"""
+    return [
+        ('hour', HOUR, Config.ROLLUP_HOURS),
+        ('day', DAY, Config.ROLLUP_DAYS),
+        ('week', WEEK, Config.ROLLUP_WEEKS),
+    ]
+
+def _utc_offset() -> int:
+    """Смещение местного времени от UTC в секундах"""
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+# ===================== КОРЗИНЫ =====================
+
+def bucketize(history: PriceHistory, step: int, keep: int, now: Optional[float] = None,
+              shift: int = 0) -> List[Dict[str, list]]:
+    """Последние keep корзин шириной step для каждого запроса.
+    Корзина - [t, t + step), где t + shift кратно step. Пустые корзины пропускаются."""
+    now = now if now is not None else time.time()
+    n_groups = len(history.queries)
+
+    since = ((int(now) + shift) // step - keep + 1) * step - shift
+    mask = history.ts >= since
+    ts, price, group = history.ts[mask], history.price[mask], history.group[mask]
+    if not ts.size:
+        return [{name: [] for name in COLUMNS} for _ in range(n_groups)]
+
+    # Внутри запроса время растет, поэтому пары (запрос, корзина) уже упорядочены
+    bucket = (ts + shift) // step
+    change = np.flatnonzero((np.diff(group) != 0) | (np.diff(bucket) != 0)) + 1
+    starts = np.concatenate(([0], change))
+    lens = np.diff(np.append(starts, len(ts)))
+    segment = np.repeat(np.arange(len(starts)), lens)
+    sorted_price = price[np.lexsort((price, segment))]
+
+    columns = {
+        't': bucket[starts] * step - shift,
+        'n': lens,
+        'min': np.rint(sorted_price[starts]),
+        'max': np.rint(sorted_price[starts + lens - 1]),
+        'mean': np.rint(np.add.reduceat(price, starts) / lens),
+        'median': np.rint(_group_quantile(sorted_price, starts, lens, 0.5)),
+    }
+    columns = {name: col.astype(np.int64).tolist() for name, col in columns.items()}
+
+    # Корзины запроса i - [bounds[i], bounds[i+1])
+    bounds = np.searchsorted(group[starts], np.arange(n_groups + 1)).tolist()
+    return [
+        {name: col[lo:hi] for name, col in columns.items()}
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
+
+def build(archive: Optional[PriceArchive] = None, now: Optional[float] = None) -> Dict[str, Dict]:
+    """Ряды всех запросов архива: {query: {resolution: {'step': ..., колонки}}}"""
+    archive = archive or PriceArchive()
+    now = now if now is not None else time.time()
+    offset = _utc_offset()
+
+    # Архив читается один раз - на глубину самого длинного окна
+    since = now - max(step * keep for _, step, keep in resolutions()) - WEEK
+    history = PriceHistory.load(archive, since=int(since))
+
+    # Часы - по UTC (как Date в браузере), дни и недели - по местной полуночи
+    shifts = {HOUR: 0, DAY: offset, WEEK: offset - WEEK_ORIGIN}
+    series: Dict[str, Dict] = {query: {} for query in history.queries}
+    for name, step, keep in resolutions():
+        shift = shifts[step]
+        for query, cols in zip(history.queries, bucketize(history, step, keep, now, shift)):
+            series[query][name] = {'step': step, **cols}
+    return series
+
+# ===================== ЗАПИСЬ =====================
+
+def _write(path: Path, text: str) -> bool:
+    """Атомарно записать файл, если содержимое изменилось"""
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+    return True
+
+def _dump(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def generate_rollups(out_dir: Optional[Path] = None, archive: Optional[PriceArchive] = None,
+                     now: Optional[float] = None) -> Dict:
+    """Записать index.json и файлы запросов, удалить файлы исчезнувших запросов"""
+    print("🧮 Generating dashboard rollups...")
+    out_dir = Path(out_dir or ROLLUP_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    archive = archive or PriceArchive()
+    series = build(archive, now)
+
+    entries, files, written = [], set(), 0
+    for query, by_step in series.items():
+        week = by_step['week']   # самое длинное окно
+        if not week['n']:
+            continue
+        name = f"{archive.index[query]}.json"
+        files.add(name)
+        written += _write(out_dir / name, _dump({'query': query, **by_step}))
+        entries.append({
+            'query': query,
+            'file': name,
+            'n': sum(week['n']),
+            'last': week['median'][-1],
+            'last_t': week['t'][-1],
+        })
+    entries.sort(key=lambda e: (-e['n'], e['query']))
+
+    with Store() as store:
+        store.import_trends(Config.DATA_DIR / 'trends.json')
+        trends = store.top_queries(Config.ROLLUP_TOP_TRENDS)
+
+    index = {
+        'updated': datetime.now().isoformat(timespec='seconds'),
+        'resolutions': {name: {'step': step, 'keep': keep} for name, step, keep in resolutions()},
+        'queries': entries,
+        'trends': [[query, count] for query, count in trends],
+    }
+    _write(out_dir / 'index.json', _dump(index))
+
+    removed = 0
+    for path in out_dir.glob('*.json'):
+        if path.name != 'index.json' and path.name not in files:
+            path.unlink()
+            removed += 1
+
+    print(f"✅ Rollups for {len(entries)} queries saved to {out_dir} ({written} updated, {removed} removed)")
+    return index
+
+def main():
+    Config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    archive = PriceArchive()
+    archive.import_json(Config.DATA_DIR / 'prices.json')
+    generate_rollups(archive=archive)
+
+if __name__ == "__main__":
+    main()
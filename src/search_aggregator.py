@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Search Aggregator - latest.json и stats.json по истории поисков
+Состояние (счетчики, сумма средних цен, последние 50 поисков, отметка
+последнего обработанного дня) хранится между запусками, поэтому каждый
+запуск читает только новые файлы из data/searches/ГГГГ/ММ/ДД.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+
+SEARCHES_DIR = Config.DATA_DIR / 'searches'
+STATE_FILE = Config.DATA_DIR / 'search_aggregator.json'
+OUTPUT_FILES = ('latest.json', 'stats.json')
+
+LATEST_LIMIT = 50
+TODAY_TOP = 5
+ALL_TIME_TOP = 5
+STATE_VERSION = 1
+
+def _write_json(path: Path, data, indent: int = 2):
+    """Атомарная запись JSON (temp-файл + rename)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp, path)
+
+def _top(counter: Counter, n: int) -> List[Dict]:
+    """Топ n запросов: по убыванию числа, при равенстве - по алфавиту"""
+    ranked = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+    return [{'count': count, 'query': query} for query, count in ranked]
+
+# ===================== СОСТОЯНИЕ =====================
+
+class SearchAggregator:
+    """Накопительная статистика поисков"""
+
+    def __init__(self, searches_dir: Optional[Path] = None, state_file: Optional[Path] = None):
+        self.searches_dir = Path(searches_dir or SEARCHES_DIR)
+        self.state_file = Path(state_file or STATE_FILE)
+        self.reset()
+
+    def reset(self):
+        self.total = 0
+        self.price_sum = 0
+        self.queries: Counter = Counter()
+        self.days: Dict[str, Counter] = {}      # только последний день (см. _fold)
+        self.latest: List[Dict] = []
+        self.last_day = ''                       # 'ГГГГ/ММ/ДД' последнего обработанного дня
+        self.last_day_files: List[str] = []      # уже учтенные файлы этого дня
+
+    @classmethod
+    def load(cls, searches_dir: Optional[Path] = None, state_file: Optional[Path] = None) -> 'SearchAggregator':
+        agg = cls(searches_dir, state_file)
+        if not agg.state_file.exists():
+            return agg
+        try:
+            state = json.loads(agg.state_file.read_text(encoding='utf-8'))
+            if state.get('version') != STATE_VERSION:
+                raise ValueError(f"unknown state version {state.get('version')}")
+            agg.total = state['total']
+            agg.price_sum = state['price_sum']
+            agg.queries = Counter(state['queries'])
+            agg.days = {day: Counter(c) for day, c in state['days'].items()}
+            agg.latest = state['latest']
+            agg.last_day = state['last_day']
+            agg.last_day_files = state['last_day_files']
+        except Exception as e:
+            print(f"⚠️ Aggregator state unreadable, rebuilding: {e}")
+            agg.reset()
+        return agg
+
+    def save(self):
+        _write_json(self.state_file, {
+            'version': STATE_VERSION,
+            'total': self.total,
+            'price_sum': self.price_sum,
+            'queries': dict(self.queries),
+            'days': {day: dict(c) for day, c in self.days.items()},
+            'latest': self.latest,
+            'last_day': self.last_day,
+            'last_day_files': self.last_day_files,
+        }, indent=None)
+
+    # ---------- новые файлы ----------
+
+    def _day_dirs(self) -> Iterator[Tuple[str, Path]]:
+        """Папки дней не раньше last_day, по возрастанию (старые годы/месяцы не обходятся)"""
+        last = self.last_day.split('/') if self.last_day else ['', '', '']
+
+        def subdirs(path: Path, floor: str) -> List[Path]:
+            if not path.is_dir():
+                return []
+            return sorted(p for p in path.iterdir() if p.is_dir() and p.name.isdigit() and p.name >= floor)
+
+        for year in subdirs(self.searches_dir, last[0]):
+            month_floor = last[1] if year.name == last[0] else ''
+            for month in subdirs(year, month_floor):
+                day_floor = last[2] if (year.name, month.name) == tuple(last[:2]) else ''
+                for day in subdirs(month, day_floor):
+                    yield f"{year.name}/{month.name}/{day.name}", day
+
+    def _fold(self, day: str, search: Dict):
+        query = search.get('query', '')
+        self.total += 1
+        self.price_sum += search.get('avg_price') or 0
+        self.queries[query] += 1
+        self.days.setdefault(day, Counter())[query] += 1
+        self.latest.append(search)
+
+    def update(self) -> int:
+        """Учесть новые файлы поисков; возвращает их число"""
+        added = 0
+        for day, path in self._day_dirs():
+            known = set(self.last_day_files) if day == self.last_day else set()
+            names = sorted(p.name for p in path.glob('*.json') if p.name not in known)
+
+            for name in names:
+                try:
+                    search = json.loads((path / name).read_text(encoding='utf-8'))
+                except Exception as e:
+                    print(f"⚠️ Skipping {day}/{name}: {e}")
+                    continue
+                self._fold(day, search)
+                added += 1
+
+            if day != self.last_day:
+                self.last_day, self.last_day_files = day, []
+            self.last_day_files.extend(names)
+
+        # Дневные счетчики нужны только для "сегодня" - храним последний день
+        self.days = {d: c for d, c in self.days.items() if d == self.last_day}
+        self.latest.sort(key=lambda s: s.get('timestamp', ''), reverse=True)
+        del self.latest[LATEST_LIMIT:]
+        return added
+
+    # ---------- выгрузка ----------
+
+    def stats(self, now: Optional[datetime] = None) -> Dict:
+        now = now or datetime.now()
+        today = self.days.get(now.strftime('%Y/%m/%d'), Counter())
+        return {
+            'updated': now.astimezone().isoformat(timespec='seconds'),
+            'today': {
+                'date': now.strftime('%Y-%m-%d'),
+                'searches': sum(today.values()),
+                'top_queries': _top(today, TODAY_TOP),
+            },
+            'all_time': {
+                'total_searches': self.total,
+                'average_price': self.price_sum // self.total if self.total else 0,
+                'top_queries': _top(self.queries, ALL_TIME_TOP),
+            },
+        }
+
+    def write(self, now: Optional[datetime] = None):
+        _write_json(self.searches_dir / 'latest.json', self.latest)
+        _write_json(self.searches_dir / 'stats.json', self.stats(now))
+
+# ===================== ЗАПУСК =====================
+
+def main():
+    ap = argparse.ArgumentParser(description='Aggregate search history into latest.json and stats.json')
+    ap.add_argument('--rebuild', action='store_true', help='ignore saved state and rescan all files')
+    args = ap.parse_args()
+
+    agg = SearchAggregator() if args.rebuild else SearchAggregator.load()
+    added = agg.update()
+    agg.write()
+    agg.save()
+
+    stats = agg.stats()
+    print("✅ Stats generated:")
+    print(f"   - New search files: {added}")
+    print(f"   - Latest searches: {len(agg.latest)}")
+    print(f"   - Today searches: {stats['today']['searches']}")
+    print(f"   - Total searches: {stats['all_time']['total_searches']}")
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,57 @@
 import os
+import sys
 import json
+import time
 import requests
+import threading
 from datetime import datetime
 from pathlib import Path
-from bs4 import BeautifulSoup
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import random
 import re
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+from src.extractor import extract_ads
+from src.fetch_policy import AVITO_HOST, BadStatusError, get_policy
+from src.ratelimit import TokenBucket
+from src.result_cache import get_cache
+from src.storage import Store
+
 TOKEN = os.environ['TELEGRAM_BOT_TOKEN']
 QUEUE_DIR = 'data/queue'
 PROCESSED_DIR = 'data/processed'
 SEARCHES_DIR = 'data/searches'
+ERROR_DIR = 'data/error'
+CLAIM_SUFFIX = '.working'
 
-def search_avito(query):
-    """Search Avito and parse results"""
+_local = threading.local()
+_avito_bucket = None
+_avito_bucket_lock = threading.Lock()
+
+def get_session():
+    """One requests.Session per worker thread (keep-alive to Avito and Telegram)"""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def get_avito_bucket():
+    """Request pacing to Avito shared by all worker threads (slowed down by FetchPolicy on blocks)"""
+    global _avito_bucket
+    with _avito_bucket_lock:
+        if _avito_bucket is None:
+            _avito_bucket = TokenBucket(Config.CRAWL_HOST_RATE, Config.CRAWL_HOST_BURST)
+            get_policy().attach(AVITO_HOST, _avito_bucket)
+        return _avito_bucket
+
+def fetch_avito(query, limit):
+    """Download and parse one results page.
+
+    Retries, backoff, slowdown and the circuit breaker come from FetchPolicy;
+    a final non-200 raises BadStatusError, so it is not cached.
+    """
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
         'Accept': 'text/html,application/xhtml+xml',
@@ -21,37 +59,35 @@ def search_avito(query):
     }
     
     # Avito search URL
-    url = f'https://www.avito.ru/rossiya?q={requests.utils.quote(query)}'
+    url = f'{Config.AVITO_BASE_URL}/rossiya?q={requests.utils.quote(query)}'
+    
+    bucket = get_avito_bucket()
+    
+    def request():
+        bucket.acquire_sync()
+        response = get_session().get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT)
+        return response.status_code, response.text, response.headers
     
+    status, html, _ = get_policy().call_sync(AVITO_HOST, request)
+    if status != 200:
+        raise BadStatusError(status, query)
+    return extract_ads(html, limit)
+
+def search_avito(query):
+    """Search Avito (through the shared result cache) and parse results"""
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        ads = get_cache().fetch_sync(query, 5, fetch_avito)  # Top 5
+        now = datetime.now().isoformat()
         
-        items = []
-        # Find all listings
-        listings = soup.select('[data-marker="item"]')
-        
-        for item in listings[:10]:  # Top 10 results
-            title_elem = item.select_one('[itemprop="name"]')
-            price_elem = item.select_one('[itemprop="price"]')
-            link_elem = item.select_one('a[href*="/"]')
-            
-            if title_elem:
-                title = title_elem.text.strip()
-                price = price_elem.get('content', '0') if price_elem else '0'
-                link = 'https://avito.ru' + link_elem.get('href', '') if link_elem else ''
-                
-                # Clean price
-                price_clean = re.sub(r'[^\d]', '', str(price))
-                
-                items.append({
-                    'title': title[:100],
-                    'price': int(price_clean) if price_clean.isdigit() else 0,
-                    'url': link,
-                    'date': datetime.now().isoformat()
-                })
-        
-        return items[:5]  # Return top 5
+        return [
+            {
+                'title': ad.title,
+                'price': ad.price,
+                'url': ad.url,
+                'date': now
+            }
+            for ad in ads
+        ]
     except Exception as e:
         print(f"❌ Avito search error: {e}")
         return []
@@ -66,8 +102,8 @@ def send_telegram_results(chat_id, query, items):
             price = f"{item['price']:,} ₽".replace(',', ' ') if item['price'] else 'Цена не указана'
             text += f"{i}. [{item['title'][:50]}]({item['url']})\n💰 {price}\n\n"
     
-    requests.post(
-        f'https://api.telegram.org/bot{TOKEN}/sendMessage',
+    get_session().post(
+        f'{Config.TELEGRAM_API_URL}/bot{TOKEN}/sendMessage',
         json={
             'chat_id': chat_id,
             'text': text,
@@ -91,7 +127,8 @@ def save_search_history(query, items, chat_id, username):
     safe_query = re.sub(r'[^\w\s-]', '', query)[:30]
     safe_query = re.sub(r'[-\s]+', '_', safe_query)
     timestamp = today.strftime('%H%M%S')
-    filename = f"{safe_query}_{timestamp}.json"
+    # chat_id keeps parallel workers from overwriting each other's files
+    filename = f"{safe_query}_{timestamp}_{chat_id}.json"
     
     search_data = {
         'query': query,
@@ -106,15 +143,136 @@ def save_search_history(query, items, chat_id, username):
     with open(save_dir / filename, 'w', encoding='utf-8') as f:
         json.dump(search_data, f, ensure_ascii=False, indent=2)
     
+    with Store() as store:
+        store.bump_queries({query: 1})
+        store.add_search(query, items, chat_id=chat_id, username=username,
+                         ts=search_data['timestamp'], avg_price=search_data['avg_price'])
+    
     print(f"💾 Saved search to {save_dir / filename}")
 
-def process_queue():
-    """Process all pending search requests"""
+def handle_request(request):
+    """Search, reply and save history for one request (queue file or poller daemon)"""
+    query = request['query']
+    chat_id = request['chat_id']
+    username = request.get('username', 'unknown')
+    
+    print(f"🔎 Searching: '{query}'")
+    
+    # Search Avito
+    items = search_avito(query)
+    
+    # Send to Telegram
+    send_telegram_results(chat_id, query, items)
+    
+    # Save to history
+    save_search_history(query, items, chat_id, username)
+    
+    print(f"✅ Completed: '{query}' ({len(items)} results)")
+
+def claim(queue_file):
+    """Take a queue file by renaming it; None if another worker got it first"""
+    claimed = queue_file.with_name(queue_file.name + CLAIM_SUFFIX)
+    try:
+        queue_file.rename(claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+def release_stale_claims():
+    """Put back claims left by a crashed run"""
+    deadline = time.time() - Config.QUEUE_CLAIM_TIMEOUT
+    for claimed in Path(QUEUE_DIR).glob('*.json' + CLAIM_SUFFIX):
+        try:
+            if claimed.stat().st_mtime < deadline:
+                claimed.rename(claimed.with_name(claimed.name[:-len(CLAIM_SUFFIX)]))
+                print(f"↩️ Requeued stale claim {claimed.name}")
+        except FileNotFoundError:
+            pass
+
+class FairQueue:
+    """Round-robin over chats, at most one request per chat in flight.
+
+    A chat with many queued searches gets one worker at a time, so other
+    users are not stuck behind it, and its results arrive in order.
+    """
+
+    def __init__(self, queue_files):
+        self.chats = OrderedDict()
+        for queue_file in sorted(queue_files):
+            try:
+                with open(queue_file, 'r', encoding='utf-8') as f:
+                    chat_id = json.load(f).get('chat_id')
+            except Exception:
+                chat_id = None  # unreadable - fails in process_file, moved to error
+            self.chats.setdefault(chat_id, deque()).append(queue_file)
+        self.busy = set()
+        self.cond = threading.Condition()
+
+    def next(self):
+        """Next file from the first idle chat; None when everything is taken"""
+        with self.cond:
+            while True:
+                idle = [chat for chat in self.chats if chat not in self.busy]
+                if idle:
+                    chat = idle[0]
+                    files = self.chats.pop(chat)
+                    queue_file = files.popleft()
+                    if files:
+                        self.chats[chat] = files  # back to the end of the round
+                    self.busy.add(chat)
+                    return chat, queue_file
+                if not self.chats:
+                    return None
+                self.cond.wait()
+
+    def done(self, chat):
+        with self.cond:
+            self.busy.discard(chat)
+            self.cond.notify_all()
+
+def process_file(queue_file):
+    """Search, reply and archive one claimed request"""
+    claimed = claim(queue_file)
+    if claimed is None:
+        return
+    
+    try:
+        # Load request
+        with open(claimed, 'r', encoding='utf-8') as f:
+            request = json.load(f)
+        
+        handle_request(request)
+        
+        # Move to processed
+        claimed.rename(Path(PROCESSED_DIR) / queue_file.name)
+        
+    except Exception as e:
+        print(f"❌ Error processing {queue_file.name}: {e}")
+        # Move failed to error dir
+        error_dir = Path(ERROR_DIR)
+        error_dir.mkdir(exist_ok=True)
+        claimed.rename(error_dir / queue_file.name)
+
+def worker(queue):
+    while True:
+        job = queue.next()
+        if job is None:
+            return
+        chat, queue_file = job
+        try:
+            process_file(queue_file)
+        finally:
+            queue.done(chat)
+
+def process_queue(workers=None):
+    """Process all pending search requests with a pool of workers"""
     # Create directories
     os.makedirs(QUEUE_DIR, exist_ok=True)
     os.makedirs(PROCESSED_DIR, exist_ok=True)
     os.makedirs(SEARCHES_DIR, exist_ok=True)
     
+    release_stale_claims()
+    
     # Get all pending searches
     queue_files = list(Path(QUEUE_DIR).glob('*.json'))
     
@@ -122,41 +280,13 @@ def process_queue():
         print("📭 No pending searches")
         return
     
-    print(f"📋 Processing {len(queue_files)} searches...")
+    queue = FairQueue(queue_files)
+    workers = min(workers or Config.QUEUE_WORKERS, len(queue.chats))
+    print(f"📋 Processing {len(queue_files)} searches from {len(queue.chats)} chats with {workers} workers...")
     
-    for queue_file in queue_files:
-        try:
-            # Load request
-            with open(queue_file, 'r', encoding='utf-8') as f:
-                request = json.load(f)
-            
-            query = request['query']
-            chat_id = request['chat_id']
-            username = request.get('username', 'unknown')
-            
-            print(f"🔎 Searching: '{query}'")
-            
-            # Search Avito
-            items = search_avito(query)
-            
-            # Send to Telegram
-            send_telegram_results(chat_id, query, items)
-            
-            # Save to history
-            save_search_history(query, items, chat_id, username)
-            
-            # Move to processed
-            processed_path = Path(PROCESSED_DIR) / queue_file.name
-            queue_file.rename(processed_path)
-            
-            print(f"✅ Completed: '{query}' ({len(items)} results)")
-            
-        except Exception as e:
-            print(f"❌ Error processing {queue_file.name}: {e}")
-            # Move failed to error dir
-            error_dir = Path('data/error')
-            error_dir.mkdir(exist_ok=True)
-            queue_file.rename(error_dir / queue_file.name)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(workers):
+            pool.submit(worker, queue)
 
 if __name__ == '__main__':
     process_queue()
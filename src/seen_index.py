@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Seen Index - индекс уже виденных объявлений
+64-битные хэши ID хранятся по дням (бакетам) в отсортированных array('Q') -
+8 байт на ID и в памяти, и в файле; проверка - бинарным поиском по бакетам.
+Устаревшие дни удаляются целиком, файл читается без JSON-разбора.
+"""
+
+import os
+import sys
+import json
+import struct
+import hashlib
+from bisect import bisect_left
+from array import array
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+
+MAGIC = b'AVSI'
+VERSION = 2                          # v2: хэши внутри бакета отсортированы
+HEADER = struct.Struct('<4sII')      # magic, version, число бакетов
+BUCKET = struct.Struct('<II')        # день (с 1970-01-01), число хэшей
+
+# ===================== ХЭШИ =====================
+
+def ad_hash(ad_id: str) -> int:
+    """64-битный хэш ID объявления"""
+    return int.from_bytes(hashlib.blake2b(ad_id.encode(), digest_size=8).digest(), 'little')
+
+def _day(ts: Optional[datetime] = None) -> int:
+    return ((ts or datetime.now()) - datetime(1970, 1, 1)).days
+
+def _to_le(arr: array) -> array:
+    if sys.byteorder == 'big':
+        arr = array('Q', arr)
+        arr.byteswap()
+    return arr
+
+# ===================== ИНДЕКС =====================
+
+class SeenIndex:
+    """Множество виденных ID с истечением по времени"""
+
+    def __init__(self, path: Path, ttl_days: Optional[int] = None, max_entries: Optional[int] = None):
+        self.path = Path(path)
+        self.ttl_days = ttl_days or Config.SEEN_TTL_DAYS
+        self.max_entries = max_entries or Config.SEEN_MAX_ENTRIES
+        self.buckets: Dict[int, array] = {}    # день -> отсортированные хэши
+        self._fresh: Dict[int, int] = {}       # добавленные с последнего слияния: хэш -> день
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path, legacy_json: Optional[Path] = None, **kwargs) -> 'SeenIndex':
+        """Загрузить индекс; при первом запуске - импортировать старый seen_ads.json"""
+        index = cls(path, **kwargs)
+
+        if index.path.exists():
+            try:
+                index._read()
+            except Exception as e:
+                print(f"⚠️ Seen index corrupted, starting empty: {e}")
+                index.buckets.clear()
+        elif legacy_json and Path(legacy_json).exists():
+            try:
+                legacy = json.loads(Path(legacy_json).read_text(encoding='utf-8'))
+                index.update(legacy.get('ads', []))
+                print(f"📥 Imported {len(index)} ids from {Path(legacy_json).name}")
+            except Exception as e:
+                print(f"⚠️ Legacy seen list not imported: {e}")
+
+        index.expire()
+        return index
+
+    @staticmethod
+    def _check(magic: bytes, version: int):
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError(f"unknown format {magic!r} v{version}")
+
+    def _read(self):
+        data = self.path.read_bytes()
+        magic, version, n_buckets = HEADER.unpack_from(data, 0)
+        self._check(magic, version)
+
+        offset = HEADER.size
+        for _ in range(n_buckets):
+            day, count = BUCKET.unpack_from(data, offset)
+            offset += BUCKET.size
+            hashes = array('Q')
+            hashes.frombytes(data[offset:offset + count * 8])
+            offset += count * 8
+            if sys.byteorder == 'big':
+                hashes.byteswap()
+            if version == 1:
+                hashes = array('Q', sorted(hashes))
+                self._dirty = True
+            self.buckets[day] = hashes
+
+    @classmethod
+    def count_file(cls, path: Path, since: datetime) -> int:
+        """count_since() по заголовкам бакетов в файле - без чтения самих хэшей"""
+        first_day = _day(since)
+        total = 0
+        if not Path(path).exists():
+            return 0
+        try:
+            with open(path, 'rb') as f:
+                magic, version, n_buckets = HEADER.unpack(f.read(HEADER.size))
+                cls._check(magic, version)
+                for _ in range(n_buckets):
+                    day, count = BUCKET.unpack(f.read(BUCKET.size))
+                    if day >= first_day:
+                        total += count
+                    f.seek(count * 8, os.SEEK_CUR)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Seen index unreadable: {e}")
+        return total
+
+    def __len__(self) -> int:
+        return sum(len(h) for h in self.buckets.values()) + len(self._fresh)
+
+    def _has(self, h: int) -> bool:
+        if h in self._fresh:
+            return True
+        # Свежие дни проверяются первыми: повторы чаще всего там
+        for day in sorted(self.buckets, reverse=True):
+            hashes = self.buckets[day]
+            i = bisect_left(hashes, h)
+            if i < len(hashes) and hashes[i] == h:
+                return True
+        return False
+
+    def __contains__(self, ad_id: str) -> bool:
+        return self._has(ad_hash(ad_id))
+
+    def add(self, ad_id: str, ts: Optional[datetime] = None) -> bool:
+        """Добавить ID; True - если объявление новое"""
+        h = ad_hash(ad_id)
+        if self._has(h):
+            return False
+
+        self._fresh[h] = _day(ts)
+        self._dirty = True
+        return True
+
+    def update(self, ad_ids: Iterable[str]):
+        for ad_id in ad_ids:
+            self.add(ad_id)
+
+    def _merge(self):
+        """Перенести добавленные хэши в отсортированные бакеты"""
+        if not self._fresh:
+            return
+        by_day: Dict[int, list] = {}
+        for h, day in self._fresh.items():
+            by_day.setdefault(day, []).append(h)
+        for day, hashes in by_day.items():
+            old = self.buckets.get(day, ())
+            self.buckets[day] = array('Q', sorted([*old, *hashes]))
+        self._fresh.clear()
+
+    def count_since(self, since: datetime) -> int:
+        """Сколько ID впервые увидено с даты since (с точностью до дня)"""
+        first_day = _day(since)
+        return sum(len(h) for day, h in self.buckets.items() if day >= first_day) + \
+            sum(day >= first_day for day in self._fresh.values())
+
+    def expire(self, now: Optional[datetime] = None):
+        """Удалить дни старше TTL и самые старые дни сверх max_entries"""
+        self._merge()
+        today = _day(now)
+        old = [day for day in self.buckets if day < today - self.ttl_days]
+
+        total = sum(len(h) for h in self.buckets.values()) - sum(len(self.buckets[d]) for d in old)
+        for day in sorted(d for d in self.buckets if d not in old):
+            if total <= self.max_entries or day == today:
+                break
+            old.append(day)
+            total -= len(self.buckets[day])
+
+        if not old:
+            return
+
+        for day in old:
+            del self.buckets[day]
+        self._dirty = True
+
+    def save(self):
+        """Атомарно записать индекс (temp-файл + rename)"""
+        if not self._dirty and self.path.exists():
+            return
+        self._merge()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.buckets)))
+            for day in sorted(self.buckets):
+                hashes = self.buckets[day]
+                f.write(BUCKET.pack(day, len(hashes)))
+                _to_le(hashes).tofile(f)
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -4,18 +4,24 @@ Avito Statistics Generator - Запускается каждый час
 Генерирует статистику для GitHub Pages
 """
 
+import sys
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import Counter
-import numpy as np
 
-BASE_DIR = Path(__file__).parent.parent.parent
-DATA_DIR = BASE_DIR / 'data'
-WEB_DIR = BASE_DIR / 'web'
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+from src.seen_index import SeenIndex
+from src.storage import Store
+from src.price_archive import PriceArchive
+from src.price_stats import PriceHistory, summarize, to_records
+from src.rollups import generate_rollups
 
-DATA_DIR.mkdir(exist_ok=True)
-WEB_DIR.mkdir(exist_ok=True)
+BASE_DIR = Config.BASE_DIR
+DATA_DIR = Config.DATA_DIR
+WEB_DIR = BASE_DIR / 'web'
 
 def load_json(file: Path):
     """Загрузить JSON"""
@@ -31,9 +37,13 @@ def generate_daily_stats():
     print("📊 Generating daily statistics...")
     
     # Загружаем данные
-    prices = load_json(DATA_DIR / 'prices.json')
-    trends = load_json(DATA_DIR / 'trends.json')
-    seen = load_json(DATA_DIR / 'seen_ads.json')
+    store = Store()
+    store.import_trends(DATA_DIR / 'trends.json')
+    archive = PriceArchive()
+    archive.import_json(DATA_DIR / 'prices.json')
+    history = PriceHistory.load(archive, since=datetime.now() - timedelta(days=Config.STATS_HISTORY_DAYS))
+    summary = summarize(history)
+    top = store.top_queries(10)
     
     # Сегодняшняя дата
     today = datetime.now().strftime('%Y-%m-%d')
@@ -41,32 +51,26 @@ def generate_daily_stats():
     # Статистика
     stats = {
         'date': today,
-        'total_searches': sum(trends.values()) if trends else 0,
-        'new_ads': len(seen.get('ads', [])) if seen else 0,
+        'total_searches': store.total_searches(),
+        'new_ads': SeenIndex.count_file(DATA_DIR / 'seen_ads.idx', datetime.now()),
         'avg_price': 0,
         'top_queries': [],
+        'queries': to_records(history, summary),
         'categories': {}
     }
     
-    # Средняя цена
-    all_prices = []
-    for query, data in prices.items():
-        if data:
-            prices_list = [p['price'] for p in data[-24:]]  # Последние 24 часа
-            if prices_list:
-                all_prices.extend(prices_list)
-    
-    if all_prices:
-        stats['avg_price'] = int(np.mean(all_prices))
+    # Средняя цена по последним 24 точкам каждого запроса
+    recent = history.tail(24).price
+    if recent.size:
+        stats['avg_price'] = int(recent.mean())
     
     # Топ запросов
-    if trends:
-        top = sorted(trends.items(), key=lambda x: x[1], reverse=True)[:10]
-        stats['top_queries'] = [{'query': q, 'count': c} for q, c in top]
+    stats['top_queries'] = [{'query': q, 'count': c} for q, c in top]
+    store.close()
     
     # Сохраняем
     stats_file = WEB_DIR / 'stats.json'
-    stats_file.write_text(json.dumps(stats, indent=2), encoding='utf-8')
+    stats_file.write_text(json.dumps(stats, indent=2, ensure_ascii=False), encoding='utf-8')
     
     # Сохраняем для веб-дашборда
     web_stats = {
@@ -101,6 +105,12 @@ def generate_weekly_report():
     weekly_file.write_text(json.dumps(report, indent=2), encoding='utf-8')
     print(f"✅ Weekly report saved")
 
-if __name__ == "__main__":
+def main():
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    WEB_DIR.mkdir(exist_ok=True)
     generate_daily_stats()
+    generate_rollups()
     generate_weekly_report()
+
+if __name__ == "__main__":
+    main()
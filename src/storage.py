@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Storage - SQLite-хранилище (Config.DATABASE_URL)
+Объявления, счетчики запросов, история поисков, подписки
+и состояние обхода запросов (для обнаружения изменений)
+(история цен - в price_archive.py).
+WAL позволяет парсеру писать, пока бот и отчеты читают.
+"""
+
+import sys
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ads (
+    id          TEXT PRIMARY KEY,
+    query       TEXT NOT NULL,
+    title       TEXT,
+    price       INTEGER,
+    url         TEXT,
+    location    TEXT,
+    first_seen  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ads_first_seen ON ads(first_seen);
+CREATE INDEX IF NOT EXISTS ads_query ON ads(query, first_seen);
+
+CREATE TABLE IF NOT EXISTS query_counters (
+    query       TEXT PRIMARY KEY,
+    count       INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS query_counters_count ON query_counters(count DESC);
+
+CREATE TABLE IF NOT EXISTS searches (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    query          TEXT NOT NULL,
+    ts             TEXT NOT NULL,
+    chat_id        INTEGER,
+    username       TEXT,
+    results_count  INTEGER,
+    avg_price      INTEGER,
+    items          TEXT
+);
+CREATE INDEX IF NOT EXISTS searches_ts ON searches(ts);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id     INTEGER NOT NULL,
+    query       TEXT NOT NULL,
+    min_price   INTEGER NOT NULL DEFAULT 0,
+    max_price   INTEGER NOT NULL DEFAULT 0,     -- 0 - без верхней границы
+    created_at  TEXT NOT NULL,
+    UNIQUE (chat_id, query, min_price, max_price)
+);
+CREATE INDEX IF NOT EXISTS subscriptions_query ON subscriptions(query, min_price);
+
+CREATE TABLE IF NOT EXISTS crawl_state (
+    query          TEXT PRIMARY KEY,
+    etag           TEXT,
+    last_modified  TEXT,
+    fingerprint    TEXT,
+    checked_at     TEXT,
+    changed_at     TEXT
+);
+"""
+
+def db_path(url: Optional[str] = None) -> Path:
+    """sqlite:///./avito_bot.db -> путь к файлу (относительный - от корня проекта)"""
+    url = url or Config.DATABASE_URL
+    if not url.startswith('sqlite:///'):
+        raise ValueError(f"Only sqlite:/// URLs are supported: {url}")
+    path = Path(url[len('sqlite:///'):])
+    return path if path.is_absolute() else Config.BASE_DIR / path
+
+# ===================== ХРАНИЛИЩЕ =====================
+
+class Store:
+    """Тонкая обертка над sqlite3 с пакетными записями"""
+
+    def __init__(self, url: Optional[str] = None):
+        self.path = db_path(url)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- запись ----------
+
+    def add_ads(self, ads: Iterable[Dict]):
+        """Новые объявления (уже известные ID пропускаются)"""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO ads (id, query, title, price, url, location, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(ad['id'], ad.get('query', ''), ad.get('title'), ad.get('price'), ad.get('url'),
+                  ad.get('location'), ad.get('found_at') or now) for ad in ads]
+            )
+
+    def bump_queries(self, counts: Dict[str, int]):
+        """Увеличить счетчики запросов"""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO query_counters (query, count, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(query) DO UPDATE SET count = count + excluded.count, "
+                "updated_at = excluded.updated_at",
+                [(q, c, now) for q, c in counts.items()]
+            )
+
+    def add_search(self, query: str, items: List[Dict], chat_id: Optional[int] = None,
+                   username: Optional[str] = None, ts: Optional[str] = None,
+                   avg_price: Optional[int] = None):
+        """Запись в историю поисков"""
+        if avg_price is None:
+            avg_price = sum(i['price'] for i in items) // len(items) if items else 0
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO searches (query, ts, chat_id, username, results_count, avg_price, items) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query, ts or datetime.now().isoformat(), chat_id, username, len(items),
+                 avg_price, json.dumps(items[:3], ensure_ascii=False))
+            )
+
+    def add_subscription(self, chat_id: int, query: str, min_price: int = 0, max_price: int = 0) -> bool:
+        """Подписка на запрос (query уже нормализован, max_price 0 - без границы);
+        False - такая уже есть"""
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO subscriptions (chat_id, query, min_price, max_price, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chat_id, query, min_price, max_price, datetime.now().isoformat())
+            )
+        return cur.rowcount > 0
+
+    def remove_subscriptions(self, chat_id: int, query: Optional[str] = None) -> int:
+        """Удалить подписки чата на query (None - все); возвращает число удаленных"""
+        sql, args = "DELETE FROM subscriptions WHERE chat_id = ?", [chat_id]
+        if query is not None:
+            sql += " AND query = ?"
+            args.append(query)
+        with self.conn:
+            return self.conn.execute(sql, args).rowcount
+
+    def save_crawl_states(self, states: Iterable[Dict]):
+        """Состояние обхода запросов (ETag, Last-Modified, отпечаток выдачи)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO crawl_state "
+                "(query, etag, last_modified, fingerprint, checked_at, changed_at) "
+                "VALUES (:query, :etag, :last_modified, :fingerprint, :checked_at, :changed_at)",
+                list(states)
+            )
+
+    # ---------- чтение ----------
+
+    def top_queries(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Запросы по популярности"""
+        sql = "SELECT query, count FROM query_counters ORDER BY count DESC"
+        if limit:
+            return self.conn.execute(sql + " LIMIT ?", (limit,)).fetchall()
+        return self.conn.execute(sql).fetchall()
+
+    def total_searches(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(count), 0) FROM query_counters").fetchone()[0]
+
+    def query_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM query_counters").fetchone()[0]
+
+    def new_ads_since(self, since: str) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM ads WHERE first_seen >= ?", (since,)
+        ).fetchone()[0]
+
+    def recent_searches(self, limit: int = 50) -> List[Dict]:
+        rows = self.conn.execute(
+            "SELECT query, ts, chat_id, username, results_count, avg_price, items "
+            "FROM searches ORDER BY ts DESC LIMIT ?", (limit,)
+        )
+        return [
+            {'query': q, 'timestamp': ts, 'chat_id': c, 'username': u,
+             'results_count': n, 'avg_price': a, 'items': json.loads(items or '[]')}
+            for q, ts, c, u, n, a, items in rows
+        ]
+
+    def subscriptions(self, chat_id: Optional[int] = None) -> List[Tuple[int, str, int, int]]:
+        """Подписки (chat_id, query, min_price, max_price) - одного чата или все"""
+        sql = "SELECT chat_id, query, min_price, max_price FROM subscriptions"
+        if chat_id is not None:
+            return self.conn.execute(sql + " WHERE chat_id = ? ORDER BY id", (chat_id,)).fetchall()
+        return self.conn.execute(sql + " ORDER BY query, min_price").fetchall()
+
+    def subscribed_queries(self) -> List[Tuple[str, int]]:
+        """Уникальные запросы подписок и число подписчиков, самые популярные первыми"""
+        return self.conn.execute(
+            "SELECT query, COUNT(DISTINCT chat_id) AS n FROM subscriptions "
+            "GROUP BY query ORDER BY n DESC, query"
+        ).fetchall()
+
+    def crawl_states(self) -> Dict[str, Dict]:
+        """{query: состояние обхода}"""
+        cur = self.conn.execute(
+            "SELECT query, etag, last_modified, fingerprint, checked_at, changed_at FROM crawl_state"
+        )
+        columns = [c[0] for c in cur.description]
+        return {row[0]: dict(zip(columns, row)) for row in cur}
+
+    # ---------- миграция ----------
+
+    def import_trends(self, trends_file: Path):
+        """Один раз перенести trends.json в пустую базу"""
+        if self.query_count() or not trends_file.exists():
+            return
+        try:
+            trends = json.loads(trends_file.read_text(encoding='utf-8'))
+        except Exception:
+            return
+
+        self.bump_queries(trends)
+        if trends:
+            print(f"📥 Imported {len(trends)} queries into {self.path.name}")
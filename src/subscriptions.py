@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Subscriptions - подписки пользователей на запросы с границами цены
+Каждый уникальный запрос обходится один раз за цикл; объявления
+раздаются подписчикам через индекс: по запросу - список фильтров,
+отсортированный по min_price, кандидаты отсекаются бинарным поиском.
+"""
+
+import re
+import sys
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.result_cache import normalize
+from src.storage import Store
+
+# "iphone 13 от 20000 до 50 000" -> запрос и границы
+BOUND_RE = re.compile(r'(?:^|\s+)(от|до|from|to)\s+(\d[\d\s]*)(?=\s+(?:от|до|from|to)\s|\s*$)', re.IGNORECASE)
+
+def parse_subscription(text: str) -> Optional[Tuple[str, int, int]]:
+    """'iphone 13 от 20000 до 50000' -> ('iphone 13', 20000, 50000); без запроса - None"""
+    min_price = max_price = 0
+    for word, number in BOUND_RE.findall(text):
+        value = int(re.sub(r'\s', '', number))
+        if word.lower() in ('от', 'from'):
+            min_price = value
+        else:
+            max_price = value
+    query = normalize(BOUND_RE.sub('', text))
+    if not query:
+        return None
+    return query, min_price, max_price
+
+def format_bounds(min_price: int, max_price: int) -> str:
+    parts = []
+    if min_price:
+        parts.append(f"от {min_price:,} ₽".replace(',', ' '))
+    if max_price:
+        parts.append(f"до {max_price:,} ₽".replace(',', ' '))
+    return ' '.join(parts) or 'любая цена'
+
+# ===================== ИНДЕКС =====================
+
+class SubscriptionIndex:
+    """query -> фильтры (min_price, max_price, chat_id), отсортированные по min_price"""
+
+    def __init__(self, rows: List[Tuple[int, str, int, int]]):
+        self._filters: Dict[str, List[Tuple[int, int, int]]] = {}
+        for chat_id, query, min_price, max_price in rows:
+            self._filters.setdefault(query, []).append((min_price, max_price, chat_id))
+        self._mins: Dict[str, List[int]] = {}
+        for query, filters in self._filters.items():
+            filters.sort()
+            self._mins[query] = [f[0] for f in filters]
+
+    @classmethod
+    def load(cls, store: Store) -> 'SubscriptionIndex':
+        return cls(store.subscriptions())
+
+    def queries(self) -> List[str]:
+        return list(self._filters)
+
+    def __len__(self) -> int:
+        return sum(len(f) for f in self._filters.values())
+
+    def match(self, query: str, price: int) -> Set[int]:
+        """Чаты, чьи фильтры по query пропускают цену price (0 - цена не указана:
+        только подписки без нижней границы)"""
+        key = normalize(query)
+        filters = self._filters.get(key)
+        if not filters:
+            return set()
+        # Кандидаты - фильтры с min_price <= price
+        end = bisect_right(self._mins[key], price)
+        return {chat_id for _, max_price, chat_id in filters[:end]
+                if not max_price or (price and price <= max_price)}
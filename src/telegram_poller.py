@@ -1,25 +1,71 @@
 import os
+import sys
 import json
+import time
+import signal
 import asyncio
+import argparse
+from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from telegram import Bot
 from telegram.error import TelegramError
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+from src.search_processor import handle_request
+
 TOKEN = os.environ['TELEGRAM_BOT_TOKEN']
 OFFSET_FILE = 'data/telegram_offset.txt'
 QUEUE_DIR = 'data/queue'
 
+def load_offset():
+    """Last processed update_id + 1 (0 on first run)"""
+    try:
+        with open(OFFSET_FILE, 'r') as f:
+            return int(f.read().strip())
+    except FileNotFoundError:
+        return 0
+
+def save_offset(offset):
+    os.makedirs(os.path.dirname(OFFSET_FILE), exist_ok=True)
+    tmp = OFFSET_FILE + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(str(offset))
+    os.replace(tmp, OFFSET_FILE)
+
+def to_request(update):
+    """Search request from a plain text message (commands are skipped)"""
+    if not (update.message and update.message.text):
+        return None
+    query = update.message.text.strip()
+    if query.startswith('/'):
+        return None
+    return {
+        'query': query,
+        'chat_id': update.message.chat_id,
+        'username': update.message.from_user.username or 'unknown',
+        'timestamp': datetime.now().isoformat(),
+        'update_id': update.update_id,
+        'status': 'pending'
+    }
+
+def enqueue(request):
+    """Save a request to the file queue (processed by search_processor.py)"""
+    os.makedirs(QUEUE_DIR, exist_ok=True)
+    filename = f"{QUEUE_DIR}/{request['update_id']}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(request, f, ensure_ascii=False, indent=2)
+
+# ============ CRON MODE: updates -> file queue ============
+
 async def poll_messages():
     """Get new messages from Telegram"""
     bot = Bot(token=TOKEN)
     
     # Get last processed update_id
-    last_update_id = 0
-    try:
-        with open(OFFSET_FILE, 'r') as f:
-            last_update_id = int(f.read().strip())
-    except FileNotFoundError:
-        pass
+    last_update_id = load_offset()
     
     try:
         # Get updates from Telegram
@@ -33,44 +79,138 @@ async def poll_messages():
             print(f"📨 Received {len(updates)} updates")
             
             for update in updates:
-                if update.message and update.message.text:
-                    query = update.message.text.strip()
-                    chat_id = update.message.chat_id
-                    username = update.message.from_user.username or 'unknown'
+                search_request = to_request(update)
+                if search_request:
+                    # Save to queue
+                    enqueue(search_request)
                     
-                    # Skip commands
-                    if not query.startswith('/'):
-                        # Save to queue
-                        os.makedirs(QUEUE_DIR, exist_ok=True)
-                        
-                        search_request = {
-                            'query': query,
-                            'chat_id': chat_id,
-                            'username': username,
-                            'timestamp': datetime.now().isoformat(),
-                            'update_id': update.update_id,
-                            'status': 'pending'
-                        }
-                        
-                        filename = f"{QUEUE_DIR}/{update.update_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
-                        with open(filename, 'w', encoding='utf-8') as f:
-                            json.dump(search_request, f, ensure_ascii=False, indent=2)
-                        
-                        print(f"✅ Queued search: '{query}' from @{username}")
-                        
-                        # Send immediate confirmation
-                        await bot.send_message(
-                            chat_id=chat_id,
-                            text=f"🔍 Searching Avito for: *{query}*\n⏳ Results will appear in 1-3 minutes!",
-                            parse_mode='Markdown'
-                        )
+                    print(f"✅ Queued search: '{search_request['query']}' from @{search_request['username']}")
+                    
+                    # Send immediate confirmation
+                    await bot.send_message(
+                        chat_id=search_request['chat_id'],
+                        text=f"🔍 Searching Avito for: *{search_request['query']}*\n⏳ Results will appear in 1-3 minutes!",
+                        parse_mode='Markdown'
+                    )
             
             # Save next offset
-            with open(OFFSET_FILE, 'w') as f:
-                f.write(str(updates[-1].update_id + 1))
-                
+            save_offset(updates[-1].update_id + 1)
+    
     except TelegramError as e:
         print(f"❌ Telegram error: {e}")
 
+# ============ DAEMON MODE: long polling + in-process workers ============
+
+class Daemon:
+    """Long-polls Telegram and runs searches in a thread pool right away.
+    
+    The offset file is written every POLLER_CHECKPOINT_UPDATES updates or
+    POLLER_CHECKPOINT_SECONDS, not per batch. Telegram already drops the
+    updates acknowledged by the next get_updates call. Requests still
+    waiting at shutdown go to the file queue for search_processor.py.
+    """
+    
+    def __init__(self, workers=None):
+        self.bot = Bot(token=TOKEN)
+        self.workers = workers or Config.QUEUE_WORKERS
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.offset = load_offset()
+        self.saved_offset = self.offset
+        self.saved_at = time.monotonic()
+        self.chat_locks = {}
+        self.tasks = set()
+        self.stopping = asyncio.Event()
+    
+    def checkpoint(self, force=False):
+        if self.offset == self.saved_offset:
+            return
+        due = (self.offset - self.saved_offset >= Config.POLLER_CHECKPOINT_UPDATES
+               or time.monotonic() - self.saved_at >= Config.POLLER_CHECKPOINT_SECONDS)
+        if force or due:
+            save_offset(self.offset)
+            self.saved_offset = self.offset
+            self.saved_at = time.monotonic()
+    
+    async def handle(self, request):
+        # One search per chat at a time - answers arrive in order
+        lock = self.chat_locks.setdefault(request['chat_id'], asyncio.Lock())
+        async with lock:
+            if self.stopping.is_set():
+                enqueue(request)
+                print(f"📥 Queued for later: '{request['query']}'")
+                return
+            try:
+                await self.bot.send_chat_action(chat_id=request['chat_id'], action='typing')
+            except TelegramError:
+                pass
+            try:
+                await asyncio.get_running_loop().run_in_executor(self.pool, handle_request, request)
+            except Exception as e:
+                print(f"❌ Error processing '{request['query']}': {e}")
+    
+    def dispatch(self, request):
+        task = asyncio.ensure_future(self.handle(request))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+    
+    async def get_updates(self):
+        """Long poll, interrupted by shutdown"""
+        poll = asyncio.ensure_future(self.bot.get_updates(
+            offset=self.offset,
+            timeout=Config.POLLER_TIMEOUT,
+            allowed_updates=['message']
+        ))
+        stop = asyncio.ensure_future(self.stopping.wait())
+        done, _ = await asyncio.wait({poll, stop}, return_when=asyncio.FIRST_COMPLETED)
+        if poll not in done:
+            poll.cancel()
+            return []
+        stop.cancel()
+        return poll.result()
+    
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+        
+        print(f"🤖 Poller daemon started ({self.workers} workers, offset {self.offset})")
+        
+        while not self.stopping.is_set():
+            try:
+                updates = await self.get_updates()
+            except TelegramError as e:
+                print(f"❌ Telegram error: {e}")
+                await asyncio.sleep(5)
+                continue
+            
+            for update in updates:
+                request = to_request(update)
+                if request:
+                    print(f"📨 Search: '{request['query']}' from @{request['username']}")
+                    self.dispatch(request)
+                self.offset = update.update_id + 1
+            
+            self.checkpoint()
+        
+        # Running searches finish, waiting ones go to the file queue
+        print(f"🛑 Stopping, {len(self.tasks)} requests in progress")
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.pool.shutdown(wait=True)
+        self.checkpoint(force=True)
+        print("👋 Poller daemon stopped")
+
+def main():
+    ap = argparse.ArgumentParser(description='Telegram poller for Avito searches')
+    ap.add_argument('--daemon', action='store_true',
+                    help='poll continuously and search in-process instead of writing the file queue')
+    ap.add_argument('--workers', type=int, help='search workers in daemon mode')
+    args = ap.parse_args()
+    
+    if args.daemon:
+        asyncio.run(Daemon(args.workers).run())
+    else:
+        asyncio.run(poll_messages())
+
 if __name__ == '__main__':
-    asyncio.run(poll_messages())
+    main()
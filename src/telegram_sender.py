@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Telegram Sender - общая очередь исходящих сообщений
+Лимиты Telegram через токен-бакеты: общий на бота, на каждый чат
+(для групп - строже), RetryAfter приостанавливает отправку.
+Две полосы: ответы пользователям идут раньше cron-уведомлений.
+"""
+
+import sys
+import time
+import heapq
+import asyncio
+import itertools
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegram.error import RetryAfter
+
+from config.settings import Config
+from src.ratelimit import TokenBucket
+
+# Полосы (меньше - важнее)
+INTERACTIVE = 0
+NOTIFY = 1
+
+def _seconds(retry_after) -> float:
+    """RetryAfter.retry_after - int или timedelta (зависит от версии PTB)"""
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+# ===================== ОТПРАВИТЕЛЬ =====================
+
+class TelegramSender:
+    """Очередь отправки для одного Bot.
+
+    Порядок внутри чата сохраняется (по чату работает один "насос"),
+    чаты между собой получают общие токены по приоритету полосы.
+    """
+
+    def __init__(self, bot, rate: Optional[float] = None, burst: Optional[int] = None,
+                 chat_rate: Optional[float] = None, chat_burst: Optional[int] = None,
+                 group_rate: Optional[float] = None):
+        self.bot = bot
+        self.bucket = TokenBucket(rate or Config.TG_GLOBAL_RATE, burst or Config.TG_GLOBAL_BURST)
+        self.chat_rate = chat_rate or Config.TG_CHAT_RATE
+        self.chat_burst = chat_burst or Config.TG_CHAT_BURST
+        self.group_rate = group_rate or Config.TG_GROUP_RATE
+        self.loop = asyncio.get_running_loop()
+
+        self._seq = itertools.count()
+        self._chats: Dict[Any, List[Tuple]] = {}       # chat_id -> куча (lane, seq, method, kwargs, future)
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+        self._pumps: Dict[Any, asyncio.Task] = {}
+        self._waiters: List[Tuple] = []                 # куча (lane, seq, future) за общим токеном
+        self._wakeup = asyncio.Event()
+        self._paused_until = 0.0
+        self._gate = asyncio.ensure_future(self._grant())
+
+    # ---------- постановка в очередь ----------
+
+    def submit(self, method: str, chat_id, lane: int = INTERACTIVE, **kwargs) -> asyncio.Future:
+        """Поставить вызов bot.<method>(chat_id=..., **kwargs) в очередь.
+        Порядок фиксируется в момент вызова; результат - в future."""
+        future = self.loop.create_future()
+        heapq.heappush(self._chats.setdefault(chat_id, []),
+                       (lane, next(self._seq), method, kwargs, future))
+        if chat_id not in self._pumps:
+            self._pumps[chat_id] = asyncio.ensure_future(self._pump(chat_id))
+        return future
+
+    def send_message(self, chat_id, text: str, lane: int = INTERACTIVE, **kwargs) -> asyncio.Future:
+        return self.submit('send_message', chat_id, lane, text=text, **kwargs)
+
+    async def join(self):
+        """Дождаться отправки всего, что уже в очереди"""
+        while self._pumps:
+            await asyncio.gather(*list(self._pumps.values()), return_exceptions=True)
+
+    async def close(self):
+        await self.join()
+        self._gate.cancel()
+
+    # ---------- общий лимит ----------
+
+    async def _global_token(self, lane: int):
+        future = self.loop.create_future()
+        heapq.heappush(self._waiters, (lane, next(self._seq), future))
+        self._wakeup.set()
+        await future
+
+    async def _grant(self):
+        """Раздает общие токены ожидающим - сначала полосе INTERACTIVE"""
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            await self.bucket.acquire()
+            # Выбираем после ожидания токена: за это время мог прийти ответ важнее
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+    # ---------- по чатам ----------
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, int) and chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    async def _pump(self, chat_id):
+        queue = self._chats[chat_id]
+        bucket = self._chat_bucket(chat_id)
+        try:
+            while queue:
+                lane, _, method, kwargs, future = heapq.heappop(queue)
+                if future.cancelled():
+                    continue
+                await bucket.acquire()
+                await self._call(lane, method, chat_id, kwargs, future)
+        finally:
+            del self._chats[chat_id]
+            del self._pumps[chat_id]
+
+    async def _call(self, lane: int, method: str, chat_id, kwargs: Dict, future: asyncio.Future):
+        for attempt in range(Config.TG_SEND_RETRIES + 1):
+            await self._global_token(lane)
+            try:
+                result = await getattr(self.bot, method)(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                # Telegram просит подождать - тормозим всю очередь
+                wait = _seconds(e.retry_after)
+                print(f"⏳ Telegram flood control: retry in {wait:.0f}s")
+                self._paused_until = max(self._paused_until, time.monotonic() + wait)
+                await asyncio.sleep(wait)
+                if attempt == Config.TG_SEND_RETRIES and not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            else:
+                if not future.done():
+                    future.set_result(result)
+                return
+
+# ===================== ОБЩИЙ ЭКЗЕМПЛЯР =====================
+
+_senders: Dict[int, TelegramSender] = {}
+
+def get_sender(bot) -> TelegramSender:
+    """Отправитель для bot в текущем event loop (создается при первом обращении)"""
+    loop = asyncio.get_running_loop()
+    sender = _senders.get(id(bot))
+    if sender is None or sender.bot is not bot or sender.loop is not loop:
+        sender = _senders[id(bot)] = TelegramSender(bot)
+    return sender
+
+async def close_senders():
+    """Дождаться отправки очередей (перед завершением процесса)"""
+    for sender in list(_senders.values()):
+        await sender.close()
+    _senders.clear()
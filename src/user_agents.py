@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+User Agents - пул User-Agent с кэшем на диске
+Для запуска по cron хватает нескольких десятков строк, поэтому выборка из
+fake_useragent сохраняется в data/user_agents.json (коммитится вместе с
+data/ и переживает чистый checkout в Actions) и живет UA_CACHE_DAYS.
+Сам fake_useragent импортируется только при обновлении выборки.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import Config
+
+UA_CACHE_FILE = Config.DATA_DIR / 'user_agents.json'
+
+# Если fake_useragent недоступен
+FALLBACK_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+]
+
+class UserAgentPool:
+    """Замена fake_useragent.UserAgent: pool.random - случайная строка из выборки"""
+
+    def __init__(self, path: Optional[Path] = None, size: Optional[int] = None,
+                 ttl_days: Optional[float] = None):
+        self.path = Path(path or UA_CACHE_FILE)
+        self.size = size or Config.UA_POOL_SIZE
+        self.ttl = (ttl_days if ttl_days is not None else Config.UA_CACHE_DAYS) * 86400
+        self.agents = self._load() or self._build()
+
+    @property
+    def random(self) -> str:
+        return random.choice(self.agents)
+
+    def _load(self) -> List[str]:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return []
+        if time.time() - data.get('time', 0) > self.ttl:
+            return []
+        return data.get('agents') or []
+
+    def _build(self) -> List[str]:
+        try:
+            from fake_useragent import UserAgent
+            ua = UserAgent()
+            agents = set()
+            for _ in range(self.size * 5):
+                agents.add(ua.random)
+                if len(agents) >= self.size:
+                    break
+        except Exception as e:
+            print(f"⚠️ fake_useragent unavailable, using built-in User-Agents: {e}")
+            return list(FALLBACK_AGENTS)
+
+        agents = sorted(agents)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps({'time': time.time(), 'agents': agents}, indent=1), encoding='utf-8')
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ User-Agent cache write failed: {e}")
+        return agents
+
+_pool: Optional[UserAgentPool] = None
+
+def get_user_agents() -> UserAgentPool:
+    """Общий пул процесса (загружается при первом обращении)"""
+    global _pool
+    if _pool is None:
+        _pool = UserAgentPool()
+    return _pool
@@ -8,13 +8,38 @@ import sys
 import asyncio
 from pathlib import Path
 
-# Fix the path to find project root (3 levels up from src/)
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# Project root (one level up from src/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
-import aiohttp
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+
+from config.settings import Config
+from src.http_session import get_session, close_session
+from src.user_agents import get_user_agents
+from src.extractor import extract_ads
+from src.result_cache import get_cache
+from src.fetch_policy import AVITO_HOST, BadStatusError, CircuitOpenError, get_policy
+from src.telegram_sender import get_sender, close_senders
+
+async def fetch_ads(query, limit, ua):
+    """Download and parse the results page (retries in FetchPolicy, final non-200 raises BadStatusError)"""
+    headers = {'User-Agent': ua.random}
+    params = {'q': query}
+    
+    async def request():
+        session = await get_session()
+        async with session.get(
+            f"{Config.AVITO_BASE_URL}/rossiya",
+            params=params,
+            headers=headers
+        ) as response:
+            html = await response.text() if response.status == 200 else ''
+            return response.status, html, response.headers
+    
+    status, html, _ = await get_policy().call(AVITO_HOST, request)
+    if status != 200:
+        raise BadStatusError(status, query)
+    return extract_ads(html, limit)
 
 async def main():
     # Get environment variables
@@ -27,88 +52,72 @@ async def main():
         return
     
     bot = Bot(token=token)
-    ua = UserAgent()
+    ua = get_user_agents()
     
     try:
         # Send typing action
         await bot.send_chat_action(chat_id=int(chat_id), action='typing')
         
-        # Search Avito
-        async with aiohttp.ClientSession() as session:
-            headers = {'User-Agent': ua.random}
-            params = {'q': query}
-            
-            async with session.get(
-                "https://www.avito.ru/rossiya",
-                params=params,
-                headers=headers,
-                timeout=30
-            ) as response:
-                
-                if response.status != 200:
-                    await bot.send_message(
-                        chat_id=int(chat_id),
-                        text=f"❌ Avito returned error {response.status}. Try again later."
-                    )
-                    return
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Find ads
-                ads = soup.select('[data-marker="item"]')[:5]
-                
-                if not ads:
-                    await bot.send_message(
-                        chat_id=int(chat_id),
-                        text=f"😕 No results found for: {query}"
-                    )
-                    return
-                
-                # Send each ad
-                for ad in ads:
-                    title_elem = ad.select_one('[itemprop="name"]')
-                    price_elem = ad.select_one('[itemprop="price"]')
-                    link_elem = ad.select_one('a[href*="/"]')
-                    
-                    title = title_elem.text.strip() if title_elem else "No title"
-                    price = price_elem.get('content', '0') if price_elem else '0'
-                    
-                    if link_elem:
-                        href = link_elem.get('href', '')
-                        url = f"https://www.avito.ru{href}" if href.startswith('/') else href
-                        
-                        # Format price
-                        try:
-                            price_val = int(float(price))
-                            if price_val >= 1000:
-                                price_text = f"{price_val/1000:.0f} тыс ₽"
-                            else:
-                                price_text = f"{price_val} ₽"
-                        except:
-                            price_text = "Price not specified"
-                        
-                        keyboard = InlineKeyboardMarkup([
-                            [InlineKeyboardButton("🔗 Open", url=url)]
-                        ])
-                        
-                        await bot.send_message(
-                            chat_id=int(chat_id),
-                            text=f"🏷 **{title[:100]}**\n💰 **{price_text}**",
-                            parse_mode='Markdown',
-                            reply_markup=keyboard
-                        )
-                        await asyncio.sleep(0.3)
+        # Search Avito (shared result cache)
+        try:
+            ads = await get_cache().fetch(query, 5, lambda q, limit: fetch_ads(q, limit, ua))
+        except BadStatusError as e:
+            await bot.send_message(
+                chat_id=int(chat_id),
+                text=f"❌ Avito returned error {e.status}. Try again later."
+            )
+            return
+        except CircuitOpenError:
+            await bot.send_message(
+                chat_id=int(chat_id),
+                text="❌ Avito is limiting requests right now. Try again later."
+            )
+            return
+        
+        if not ads:
+            await bot.send_message(
+                chat_id=int(chat_id),
+                text=f"😕 No results found for: {query}"
+            )
+            return
+        
+        # Send each ad (the sender queue paces them)
+        sender = get_sender(bot)
+        replies = []
+        for ad in ads:
+            if ad.url:
+                # Format price
+                if not ad.price:
+                    price_text = "Price not specified"
+                elif ad.price >= 1000:
+                    price_text = f"{ad.price/1000:.0f} тыс ₽"
+                else:
+                    price_text = f"{ad.price} ₽"
                 
-                await bot.send_message(
-                    chat_id=int(chat_id),
-                    text=f"✅ Found {len(ads)} ads for: {query}"
-                )
+                keyboard = InlineKeyboardMarkup([
+                    [InlineKeyboardButton("🔗 Open", url=ad.url)]
+                ])
                 
+                replies.append(sender.send_message(
+                    int(chat_id),
+                    f"🏷 **{ad.title}**\n💰 **{price_text}**",
+                    parse_mode='Markdown',
+                    reply_markup=keyboard
+                ))
+        
+        replies.append(sender.send_message(
+            int(chat_id),
+            f"✅ Found {len(ads)} ads for: {query}"
+        ))
+        await asyncio.gather(*replies)
+        
     except Exception as e:
         error_msg = f"❌ Search error: {str(e)[:100]}"
         await bot.send_message(chat_id=int(chat_id), text=error_msg)
         print(error_msg)
+    finally:
+        await close_senders()
+        await close_session()
 
 if __name__ == "__main__":
     asyncio.run(main())
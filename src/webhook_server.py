@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Webhook Server - прием апдейтов Telegram по webhook (aiohttp)
+Вместо long polling бот слушает POST от Telegram. Секрет из заголовка
+X-Telegram-Bot-Api-Secret-Token сверяется с WEBHOOK_SECRET, апдейт
+кладется в очередь Application и сразу подтверждается ответом 200.
+Обработчики работают параллельно (BOT_CONCURRENT_UPDATES), поэтому
+Telegram не ждет окончания поиска.
+"""
+
+import sys
+import hmac
+import signal
+import asyncio
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from config.settings import Config
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+class WebhookServer:
+    """HTTP-прием апдейтов для уже собранного Application"""
+
+    def __init__(self, application: Application, secret: str, path: Optional[str] = None,
+                 host: Optional[str] = None, port: Optional[int] = None,
+                 public_url: Optional[str] = None):
+        self.application = application
+        self.secret = secret
+        self.path = path or Config.WEBHOOK_PATH
+        self.host = host or Config.WEBHOOK_HOST
+        self.port = port if port is not None else Config.WEBHOOK_PORT
+        self.public_url = public_url if public_url is not None else Config.WEBHOOK_URL
+        self.received = 0
+        self.rejected = 0
+
+        self.web = web.Application()
+        self.web.router.add_post(self.path, self.handle)
+        self.web.router.add_get('/healthz', self.health)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), self.secret):
+            self.rejected += 1
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot) if isinstance(data, dict) else None
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            # Не JSON или объект не того вида (нет обязательных полей, поле не того типа)
+            print(f"⚠️ Malformed webhook update: {type(e).__name__}: {e}")
+            update = None
+        if update is None:
+            return web.Response(status=400)
+        # Обработка - в задачах Application; Telegram получает 200 сразу
+        await self.application.update_queue.put(update)
+        self.received += 1
+        return web.Response()
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'received': self.received,
+            'rejected': self.rejected,
+            'queued': self.application.update_queue.qsize(),
+        })
+
+    async def run(self, allowed_updates: List[str]):
+        """Запустить Application и HTTP-сервер, работать до SIGINT/SIGTERM"""
+        app = self.application
+        await app.initialize()
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+
+        runner = web.AppRunner(self.web, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        print(f"🌐 Webhook server on {self.host}:{self.port}{self.path}")
+
+        if self.public_url:
+            url = self.public_url.rstrip('/') + self.path
+            await app.bot.set_webhook(
+                url=url,
+                secret_token=self.secret,
+                allowed_updates=allowed_updates,
+                max_connections=Config.WEBHOOK_MAX_CONNECTIONS
+            )
+            print(f"🔗 Webhook set to {url}")
+
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+
+        try:
+            await stopping.wait()
+        finally:
+            # Сначала перестаем принимать, потом дорабатываем очередь.
+            # Webhook не снимаем: пока бот перезапускается, Telegram копит апдейты.
+            print(f"🛑 Stopping webhook server ({app.update_queue.qsize()} updates queued)")
+            await runner.cleanup()
+            await app.stop()
+            await app.shutdown()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Avito stub - локальный сервер с записанными страницами выдачи
+
+    python tests/avito_stub.py --port 8081 --latency 150 --error-rate 0.05
+    AVITO_BASE_URL=http://127.0.0.1:8081 TELEGRAM_API_URL=http://127.0.0.1:8081 python src/parser.py
+
+GET /<регион>?q=...&p=N - страница из tests/fixtures/*.html. ID объявлений
+пересчитываются от запроса и номера страницы: выдачи разных запросов не
+пересекаются, после --pages страниц кнопка "Следующая" пропадает.
+Ответ приходит через --latency ± --jitter мс, с вероятностью --error-rate
+это 500, с вероятностью --block-rate - 429 с Retry-After. ETag/If-None-Match
+поддерживаются (304).
+
+POST /bot<token>/<method> - ответ в духе Telegram Bot API, чтобы отправка
+результатов (TELEGRAM_API_URL) не уходила в сеть.
+GET /stats - счетчики ответов.
+"""
+
+import re
+import zlib
+import random
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+ID_RE = re.compile(r'(\sid="i|data-item-id="|_)(\d{6,})(?=")')
+NEXT_PAGE_RE = re.compile(r'<a [^>]*data-marker="pagination-button/nextPage"[^>]*>.*?</a>', re.S)
+
+# ===================== СТРАНИЦЫ =====================
+
+class Pages:
+    """Записанные страницы, размноженные по запросам и номерам страниц"""
+
+    def __init__(self, paths: List[Path], max_pages: int):
+        self.templates = [Path(p).read_text(encoding='utf-8') for p in paths]
+        if not self.templates:
+            raise SystemExit(f"❌ No recorded pages in {FIXTURES_DIR}")
+        self.max_pages = max_pages
+        self.render = lru_cache(maxsize=512)(self._render)
+
+    def _render(self, query: str, page: int) -> str:
+        salt = zlib.crc32(query.encode()) % 10_000 * 100 + page
+        html = self.templates[salt % len(self.templates)]
+        html = ID_RE.sub(lambda m: f"{m.group(1)}{salt}{m.group(2)}", html)
+        if page >= self.max_pages:
+            html = NEXT_PAGE_RE.sub('', html)
+        return html
+
+# ===================== СЕРВЕР =====================
+
+class AvitoStub:
+    def __init__(self, pages: Pages, latency: float = 0, jitter: float = 0,
+                 error_rate: float = 0, block_rate: float = 0, retry_after: int = 1,
+                 seed: Optional[int] = None):
+        self.pages = pages
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.stats = Counter()
+
+        self.app = web.Application()
+        self.app.router.add_get('/stats', self.get_stats)
+        self.app.router.add_post(r'/bot{token}/{method}', self.telegram)
+        self.app.router.add_get('/{region}', self.search)
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ''
+
+    async def _delay(self):
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def search(self, request: web.Request) -> web.Response:
+        await self._delay()
+        roll = self.random.random()
+        if roll < self.error_rate:
+            self.stats['500'] += 1
+            return web.Response(status=500, text='stub error')
+        if roll < self.error_rate + self.block_rate:
+            self.stats['429'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(self.retry_after)})
+
+        query = request.query.get('q', '')
+        try:
+            page = max(1, int(request.query.get('p', 1)))
+        except ValueError:
+            page = 1
+        if page > self.pages.max_pages:
+            self.stats['404'] += 1
+            return web.Response(status=404)
+
+        html = self.pages.render(query, page)
+        etag = f'"{zlib.crc32(html.encode()):08x}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.stats['304'] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        self.stats['200'] += 1
+        return web.Response(text=html, content_type='text/html', headers={'ETag': etag})
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        """Ответ Bot API: отправленное сообщение с растущим message_id"""
+        self.stats['telegram'] += 1
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = dict(await request.post())
+        return web.json_response({'ok': True, 'result': {
+            'message_id': self.stats['telegram'],
+            'date': 0,
+            'chat': {'id': int(payload.get('chat_id') or 0), 'type': 'private'},
+            'text': payload.get('text', ''),
+        }})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+class StubThread(threading.Thread):
+    """Заглушка в отдельном потоке со своим event loop - для синхронного кода и бенчмарков"""
+
+    def __init__(self, stub: AvitoStub):
+        super().__init__(daemon=True)
+        self.stub = stub
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.stub.start())
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.stub.stop())
+
+    def __enter__(self) -> AvitoStub:
+        self.start()
+        self.ready.wait()
+        return self.stub
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+def add_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument('--fixtures', nargs='*', help='recorded result pages (default: tests/fixtures/*.html)')
+    ap.add_argument('--pages', type=int, default=3, help='result pages per query')
+    ap.add_argument('--latency', type=float, default=0, help='response delay, ms')
+    ap.add_argument('--jitter', type=float, default=0, help='random ± delay, ms')
+    ap.add_argument('--error-rate', type=float, default=0, help='share of 500 responses')
+    ap.add_argument('--block-rate', type=float, default=0, help='share of 429 responses')
+    ap.add_argument('--seed', type=int)
+
+def from_args(args) -> AvitoStub:
+    paths = args.fixtures or sorted(FIXTURES_DIR.glob('*.html'))
+    return AvitoStub(Pages(paths, args.pages), args.latency, args.jitter,
+                     args.error_rate, args.block_rate, seed=args.seed)
+
+def main():
+    ap = argparse.ArgumentParser(description='Local Avito stub serving recorded result pages')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8081)
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    async def serve():
+        stub = from_args(args)
+        url = await stub.start(args.host, args.port)
+        print(f"🧪 Avito stub on {url} ({len(stub.pages.templates)} pages, latency {args.latency:.0f}ms)")
+        print(f"   AVITO_BASE_URL={url} TELEGRAM_API_URL={url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await stub.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark парсинга выдачи Avito: ads/sec и пиковая память по движкам
+
+    python tests/bench_parsing.py                      # tests/fixtures/*.html
+    python tests/bench_parsing.py page1.html page2.html --limit 3 --rounds 50
+
+Каждый движок гоняется в отдельном процессе, чтобы пиковый RSS не смешивался.
+"""
+
+import sys
+import time
+import argparse
+import resource
+import tracemalloc
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractor import BACKENDS, get_backend
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+def _maxrss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_backend(name: str, pages: list, limit: int, rounds: int) -> dict:
+    """Замер одного движка (выполняется в дочернем процессе)"""
+    try:
+        backend = get_backend(name)
+    except ImportError as e:
+        return {'backend': name, 'error': str(e)}
+
+    htmls = [Path(p).read_text(encoding='utf-8') for p in pages]
+    backend.extract(htmls[0], limit)  # прогрев
+    rss_before = _maxrss_mb()
+
+    tracemalloc.start()
+    ads = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for html in htmls:
+            ads += len(backend.extract(html, limit))
+    elapsed = time.perf_counter() - started
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'backend': name,
+        'ads': ads,
+        'pages': rounds * len(htmls),
+        'ads_per_sec': ads / elapsed if elapsed else 0,
+        'ms_per_page': elapsed * 1000 / (rounds * len(htmls)),
+        'py_peak_mb': py_peak / 1024 / 1024,
+        'rss_growth_mb': _maxrss_mb() - rss_before,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description='Avito results page parsing benchmark')
+    ap.add_argument('pages', nargs='*', help='saved result pages (default: tests/fixtures/*.html)')
+    ap.add_argument('--limit', type=int, default=50, help='ads per page to extract')
+    ap.add_argument('--rounds', type=int, default=20)
+    ap.add_argument('--backend', action='append', choices=list(BACKENDS))
+    args = ap.parse_args()
+
+    pages = args.pages or sorted(str(p) for p in FIXTURES_DIR.glob('*.html'))
+    if not pages:
+        print("❌ No pages to parse")
+        return
+
+    print(f"📄 {len(pages)} pages × {args.rounds} rounds, limit={args.limit}")
+    print(f"{'backend':<12}{'ads/sec':>12}{'ms/page':>10}{'py peak MB':>12}{'RSS +MB':>10}")
+
+    for name in args.backend or list(BACKENDS):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            r = pool.submit(run_backend, name, pages, args.limit, args.rounds).result()
+        if 'error' in r:
+            print(f"{name:<12}  skipped: {r['error']}")
+            continue
+        print(f"{name:<12}{r['ads_per_sec']:>12.0f}{r['ms_per_page']:>10.2f}"
+              f"{r['py_peak_mb']:>12.2f}{r['rss_growth_mb']:>10.1f}")
+
+if __name__ == '__main__':
+    main()
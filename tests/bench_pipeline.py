@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark конвейера поиска против локальной заглушки Avito (tests/avito_stub.py)
+
+    python tests/bench_pipeline.py                                   # все сценарии
+    python tests/bench_pipeline.py --only search --requests 500 --concurrency 32 --latency 120
+
+Сценарии:
+    parse          AvitoParser._parse_results по записанным страницам
+    search         AvitoParser.search (aiohttp, кэш, FetchPolicy, CrawlScheduler)
+    search_avito   search_processor.search_avito в пуле потоков (requests)
+    process_queue  search_processor.process_queue: файловая очередь -> поиск -> ответ -> история
+
+Для каждого - запросов/сек, объявлений/сек, p50/p99 задержки, пик памяти
+Python и прирост RSS. Каждый сценарий идет в отдельном процессе, данные -
+во временном каталоге, запросы уникальны (кэш выдачи не помогает), лимиты
+темпа crawler'а сняты (--keep-limits - оставить как в Config).
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import contextlib
+import tracemalloc
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.avito_stub import FIXTURES_DIR, StubThread, add_arguments, from_args
+
+SCENARIOS = ('parse', 'search', 'search_avito', 'process_queue')
+
+def _maxrss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+# ===================== СЦЕНАРИИ =====================
+# Выполняются в дочернем процессе: src.* импортируется уже с окружением
+# заглушки (AVITO_BASE_URL, DATA_DIR, ...)
+
+def _scheduler(opts: dict):
+    from src.crawler import CrawlScheduler
+    if opts['keep_limits']:
+        return CrawlScheduler()
+    c = opts['concurrency']
+    return CrawlScheduler(concurrency=c, host_concurrency=c, host_rate=0, jitter=0)
+
+def bench_parse(opts: dict) -> tuple:
+    from src.parser import AvitoParser
+    parser = AvitoParser(_scheduler(opts))
+    pages = [p.read_text(encoding='utf-8') for p in sorted(FIXTURES_DIR.glob('*.html'))]
+    parser._parse_results(pages[0], opts['limit'])  # прогрев
+
+    latencies, ads = [], 0
+    started_all = time.perf_counter()
+    for i in range(opts['requests']):
+        started = time.perf_counter()
+        ads += len(parser._parse_results(pages[i % len(pages)], opts['limit']))
+        latencies.append(time.perf_counter() - started)
+    return latencies, ads, 0, time.perf_counter() - started_all
+
+def bench_search(opts: dict) -> tuple:
+    import asyncio
+    from src.parser import AvitoParser
+    from src.http_session import close_session
+
+    async def run():
+        parser = AvitoParser(_scheduler(opts))
+        semaphore = asyncio.Semaphore(opts['concurrency'])
+        latencies, counts = [], []
+
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                found = await parser.search(f"bench search {i}", opts['limit'], delay=False)
+                latencies.append(time.perf_counter() - started)
+                counts.append(len(found))
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one(i) for i in range(opts['requests'])))
+        finally:
+            elapsed = time.perf_counter() - started
+            await close_session()
+        return latencies, sum(counts), counts.count(0), elapsed
+
+    return asyncio.run(run())
+
+def bench_search_avito(opts: dict) -> tuple:
+    from src.search_processor import search_avito
+
+    def one(i: int):
+        started = time.perf_counter()
+        found = search_avito(f"bench thread {i}")
+        return time.perf_counter() - started, len(found)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=opts['concurrency']) as pool:
+        results = list(pool.map(one, range(opts['requests'])))
+    elapsed = time.perf_counter() - started
+    counts = [n for _, n in results]
+    return [t for t, _ in results], sum(counts), counts.count(0), elapsed
+
+def bench_process_queue(opts: dict) -> tuple:
+    import src.search_processor as sp
+
+    queue_dir = Path(sp.QUEUE_DIR)
+    queue_dir.mkdir(parents=True, exist_ok=True)
+    chats = max(1, opts['concurrency'] * 2)
+    for i in range(opts['requests']):
+        request = {'query': f"bench queue {i}", 'chat_id': 1000 + i % chats, 'username': 'bench',
+                   'update_id': i, 'status': 'pending'}
+        (queue_dir / f"{i:06d}_bench.json").write_text(json.dumps(request), encoding='utf-8')
+
+    latencies, counts = [], []
+    handle_request, search_avito = sp.handle_request, sp.search_avito
+
+    def counted_search(query):
+        items = search_avito(query)
+        counts.append(len(items))
+        return items
+
+    def timed_request(request):
+        started = time.perf_counter()
+        try:
+            handle_request(request)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    sp.search_avito, sp.handle_request = counted_search, timed_request
+    started = time.perf_counter()
+    sp.process_queue(workers=opts['concurrency'])
+    elapsed = time.perf_counter() - started
+    errors = len(list(Path(sp.ERROR_DIR).glob('*.json'))) if Path(sp.ERROR_DIR).exists() else 0
+    return latencies, sum(counts), errors + counts.count(0), elapsed
+
+BENCHES = {
+    'parse': bench_parse,
+    'search': bench_search,
+    'search_avito': bench_search_avito,
+    'process_queue': bench_process_queue,
+}
+
+def run_scenario(name: str, opts: dict) -> dict:
+    """Замер одного сценария (выполняется в дочернем процессе).
+    Время - только нагрузка, без импортов и подготовки."""
+    rss_before = _maxrss_mb()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        latencies, ads, failed, elapsed = BENCHES[name](opts)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'scenario': name,
+        'requests': len(latencies),
+        'failed': failed,
+        'req_per_sec': len(latencies) / elapsed if elapsed else 0,
+        'ads_per_sec': ads / elapsed if elapsed else 0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'py_peak_mb': py_peak / 1024 / 1024,
+        'rss_growth_mb': _maxrss_mb() - rss_before,
+    }
+
+# ===================== ЗАПУСК =====================
+
+def main():
+    ap = argparse.ArgumentParser(description='Offline benchmark of the Avito search pipeline')
+    ap.add_argument('--only', action='append', choices=SCENARIOS)
+    ap.add_argument('--requests', type=int, default=200, help='searches per scenario')
+    ap.add_argument('--concurrency', type=int, default=8, help='parallel searches / workers')
+    ap.add_argument('--limit', type=int, default=10, help='ads per search (parse / search)')
+    ap.add_argument('--keep-limits', action='store_true', help="keep Config crawl rate limits and jitter")
+    ap.add_argument('--json', action='store_true', help='print results as JSON lines')
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='avito-bench-'))
+    opts = {'requests': args.requests, 'concurrency': args.concurrency,
+            'limit': args.limit, 'keep_limits': args.keep_limits}
+
+    with StubThread(from_args(args)) as stub:
+        # Окружение наследуют дочерние процессы сценариев
+        os.environ.update({
+            'AVITO_BASE_URL': stub.url,
+            'TELEGRAM_API_URL': stub.url,
+            'TELEGRAM_BOT_TOKEN': os.environ.get('TELEGRAM_BOT_TOKEN', 'bench'),
+            'DATA_DIR': str(workdir / 'data'),
+            'DATABASE_URL': f"sqlite:///{workdir / 'bench.db'}",
+            'RETRY_BACKOFF_BASE': os.environ.get('RETRY_BACKOFF_BASE', '0.05'),
+        })
+        (workdir / 'data').mkdir()
+        os.chdir(workdir)  # search_processor пишет в data/... от текущего каталога
+
+        print(f"🧪 Stub {stub.url}: latency {args.latency:.0f}±{args.jitter:.0f}ms, "
+              f"errors {args.error_rate:.0%}, blocks {args.block_rate:.0%}; data in {workdir}")
+        print(f"📊 {args.requests} requests × {args.concurrency} concurrent")
+        if not args.json:
+            print(f"{'scenario':<15}{'req/s':>9}{'ads/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+                  f"{'py peak MB':>12}{'RSS +MB':>9}{'failed':>8}")
+
+        for name in args.only or SCENARIOS:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                r = pool.submit(run_scenario, name, opts).result()
+            if args.json:
+                print(json.dumps(r))
+                continue
+            print(f"{name:<15}{r['req_per_sec']:>9.1f}{r['ads_per_sec']:>10.0f}"
+                  f"{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                  f"{r['py_peak_mb']:>12.2f}{r['rss_growth_mb']:>9.1f}{r['failed']:>8}")
+
+        print(f"🧾 Stub responses: {dict(stub.stats)}")
+
+if __name__ == '__main__':
+    main()
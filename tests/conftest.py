@@ -0,0 +1,17 @@
+"""
+Общая настройка тестов: корень проекта в sys.path, данные и база -
+во временной папке, чтобы тесты не трогали data/ и avito_bot.db
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+_tmp = Path(tempfile.mkdtemp(prefix='avitotiger-tests-'))
+os.environ.setdefault('DATA_DIR', str(_tmp / 'data'))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{_tmp / 'test.db'}")
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123:test')
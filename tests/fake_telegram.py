@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram - локальная проверка bot.py в режиме webhook
+
+    python tests/fake_telegram.py --updates 100 --concurrency 20 --latency 150
+
+Поднимает поддельный Bot API (getMe, sendMessage, editMessageText, ...) и
+заглушку Avito (tests/avito_stub.py), запускает `src/bot.py --webhook` на
+них, проверяет, что апдейт с чужим секретом отклоняется (403), и шлет
+/search из разных чатов параллельно. Отчет: время подтверждения webhook
+(p50/p99) и время до итогового сообщения с результатами.
+
+--no-spawn - бот уже запущен (адреса и секрет печатаются при старте).
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import aiohttp
+from aiohttp import web
+
+from tests.avito_stub import StubThread, add_arguments, from_args
+
+ROOT = Path(__file__).parent.parent
+SECRET = 'fake-telegram-secret'
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+# ===================== BOT API =====================
+
+class FakeBotApi:
+    """Поддельный api.telegram.org: запоминает вызовы и отвечает как Bot API"""
+
+    def __init__(self):
+        self.calls: List[tuple] = []           # (time, method, params)
+        self.finished: Dict[int, float] = {}   # chat_id -> время итогового ответа на /search
+        self.done = asyncio.Event()
+        self.expected = 0
+        self.message_id = 0
+
+        self.app = web.Application()
+        self.app.router.add_post(r'/bot{token}/{method}', self.call)
+        self.runner: Optional[web.AppRunner] = None
+
+    async def _params(self, request: web.Request) -> Dict:
+        if request.content_type == 'application/json':
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            try:
+                params[key] = json.loads(value)
+            except (TypeError, ValueError):
+                params[key] = value
+        return params
+
+    def _message(self, params: Dict, message_id: Optional[int] = None) -> Dict:
+        if message_id is None:
+            self.message_id += 1
+            message_id = self.message_id
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id') or 0), 'type': 'private'},
+            'from': BOT_USER,
+            'text': str(params.get('text', '')),
+        }
+
+    def _track(self, method: str, params: Dict):
+        """Итог /search - правка без "..." в заголовке или сообщение об ошибке/пустой выдаче"""
+        text = str(params.get('text', ''))
+        chat_id = int(params.get('chat_id') or 0)
+        first_line = text.split('\n', 1)[0]
+        final = (method == 'editMessageText' and not first_line.endswith('...')) or \
+                (method == 'sendMessage' and text.startswith(('❌', '😕')))
+        if final and chat_id not in self.finished:
+            self.finished[chat_id] = time.monotonic()
+            if self.expected and len(self.finished) >= self.expected:
+                self.done.set()
+
+    async def call(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = await self._params(request)
+        self.calls.append((time.monotonic(), method, params))
+
+        if method == 'getMe':
+            result = BOT_USER
+        elif method == 'sendMessage':
+            result = self._message(params)
+        elif method == 'editMessageText':
+            result = self._message(params, int(params.get('message_id') or 0))
+        else:
+            result = True   # sendChatAction, answerInlineQuery, setWebhook, ...
+        self._track(method, params)
+        return web.json_response({'ok': True, 'result': result})
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        return f"http://{host}:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+# ===================== АПДЕЙТЫ =====================
+
+def search_update(update_id: int, chat_id: int, query: str) -> Dict:
+    text = f"/search {query}"
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Test', 'username': f"user{chat_id}"},
+            'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len('/search')}],
+        },
+    }
+
+async def post_update(session: aiohttp.ClientSession, url: str, update: Dict, secret: str) -> tuple:
+    started = time.monotonic()
+    async with session.post(url, json=update, headers={SECRET_HEADER: secret}) as response:
+        return response.status, time.monotonic() - started
+
+async def wait_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"bot did not start at {url}")
+
+# ===================== ЗАПУСК =====================
+
+async def run(args, avito_url: str):
+    api = FakeBotApi()
+    api_url = await api.start(port=args.api_port)
+    webhook = f"http://127.0.0.1:{args.port}/telegram"
+    workdir = Path(tempfile.mkdtemp(prefix='fake-telegram-'))
+
+    env = {
+        **os.environ,
+        'TELEGRAM_BOT_TOKEN': '123:fake',
+        'TELEGRAM_API_URL': api_url,
+        'AVITO_BASE_URL': avito_url,
+        'WEBHOOK_SECRET': SECRET,
+        'WEBHOOK_URL': '',
+        'WEBHOOK_HOST': '127.0.0.1',
+        'WEBHOOK_PORT': str(args.port),
+        'WEBHOOK_PATH': '/telegram',
+        'DATA_DIR': str(workdir),
+        'DATABASE_URL': f"sqlite:///{workdir / 'bot.db'}",
+    }
+    print(f"🤖 Fake Bot API {api_url}, Avito stub {avito_url}, webhook {webhook}")
+
+    bot = None
+    if args.no_spawn:
+        print(f"   TELEGRAM_API_URL={api_url} AVITO_BASE_URL={avito_url} WEBHOOK_SECRET={SECRET} "
+              f"WEBHOOK_PORT={args.port} python src/bot.py --webhook")
+    else:
+        log = open(workdir / 'bot.log', 'w')
+        bot = await asyncio.create_subprocess_exec(
+            sys.executable, str(ROOT / 'src' / 'bot.py'), '--webhook',
+            env=env, cwd=str(ROOT), stdout=log, stderr=log
+        )
+        print(f"   bot pid {bot.pid}, log {workdir / 'bot.log'}")
+
+    try:
+        await wait_ready(f"http://127.0.0.1:{args.port}/healthz", timeout=args.timeout)
+
+        async with aiohttp.ClientSession() as session:
+            status, _ = await post_update(session, webhook, search_update(0, 1, 'x'), 'wrong-secret')
+            print(f"{'✅' if status == 403 else '❌'} Wrong secret -> HTTP {status}")
+
+            api.expected = args.updates
+            semaphore = asyncio.Semaphore(args.concurrency)
+            sent_at: Dict[int, float] = {}
+
+            async def send(i: int):
+                chat_id = 1000 + i
+                async with semaphore:
+                    sent_at[chat_id] = time.monotonic()
+                    return await post_update(session, webhook, search_update(i + 1, chat_id, f"iphone {i}"), SECRET)
+
+            started = time.monotonic()
+            acks = await asyncio.gather(*(send(i) for i in range(args.updates)))
+            acked = time.monotonic() - started
+            try:
+                await asyncio.wait_for(api.done.wait(), args.timeout)
+            except asyncio.TimeoutError:
+                pass
+            total = time.monotonic() - started
+
+        failed = sum(status != 200 for status, _ in acks)
+        ack_ms = [t * 1000 for _, t in acks]
+        reply_ms = [(api.finished[c] - sent_at[c]) * 1000 for c in api.finished if c in sent_at]
+        print(f"📨 {args.updates} updates acked in {acked:.2f}s ({failed} failed): "
+              f"p50 {percentile(ack_ms, 0.5):.1f}ms, p99 {percentile(ack_ms, 0.99):.1f}ms")
+        print(f"💬 {len(reply_ms)}/{args.updates} searches answered in {total:.2f}s: "
+              f"p50 {percentile(reply_ms, 0.5):.0f}ms, p99 {percentile(reply_ms, 0.99):.0f}ms")
+        methods: Dict[str, int] = {}
+        for _, method, _ in api.calls:
+            methods[method] = methods.get(method, 0) + 1
+        print(f"🧾 Bot API calls: {methods}")
+    finally:
+        if bot is not None and bot.returncode is None:
+            bot.send_signal(signal.SIGTERM)
+            await bot.wait()
+        await api.stop()
+
+def main():
+    ap = argparse.ArgumentParser(description='Drive bot.py --webhook with a fake Telegram and Avito')
+    ap.add_argument('--updates', type=int, default=50, help='/search updates to send')
+    ap.add_argument('--concurrency', type=int, default=10, help='parallel webhook POSTs')
+    ap.add_argument('--port', type=int, default=8088, help='webhook port of the bot')
+    ap.add_argument('--api-port', type=int, default=0, help='fake Bot API port (0 - any)')
+    ap.add_argument('--timeout', type=float, default=60)
+    ap.add_argument('--no-spawn', action='store_true', help='bot is started separately')
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    with StubThread(from_args(args)) as avito:
+        asyncio.run(run(args, avito.url))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from config.settings import Config
+from src import bot
+from src.crawler import CrawlScheduler
+from src.fetch_policy import AVITO_HOST, BadStatusError, FetchPolicy
+from src.result_cache import ResultCache
+from src.storage import Store
+from tests.avito_stub import FIXTURES_DIR, Pages
+
+
+class FakeMessage:
+    """update.message: запоминает ответы"""
+
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append((text, kwargs))
+
+
+def make_update(chat_id=1):
+    return SimpleNamespace(message=FakeMessage(), effective_chat=SimpleNamespace(id=chat_id),
+                           effective_user=None)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = Store(f"sqlite:///{tmp_path / 'bot.db'}")
+    monkeypatch.setattr(bot, '_store', store)
+    yield store
+    store.close()
+
+
+def test_button_data_fits_64_bytes():
+    data = bot.button_data('search_', 'велосипед горный ' * 5)
+    assert len(data.encode('utf-8')) <= 64
+    assert data.startswith('search_велосипед')
+    assert bot.button_data('search_', 'ps5') == 'search_ps5'
+
+
+def test_top_command_escapes_markdown(store):
+    store.bump_queries({'iphone_13 [pro]': 3, 'велосипед горный ' * 5: 2})
+    update = make_update()
+    asyncio.run(bot.top_command(update, SimpleNamespace(args=[])))
+
+    (text, kwargs), = update.message.replies
+    assert '1. iphone13 pro — 3' in text
+    buttons = [row[0].callback_data for row in kwargs['reply_markup'].inline_keyboard]
+    assert buttons[0] == 'search_iphone_13 [pro]'
+    assert all(len(data.encode('utf-8')) <= 64 for data in buttons)
+
+
+def test_subscribe_and_subs_escape_markdown(store):
+    update = make_update(chat_id=5)
+    context = SimpleNamespace(args=['*iphone_13*', 'до', '50000'])
+    asyncio.run(bot.subscribe_command(update, context))
+    asyncio.run(bot.subscribe_command(update, context))
+    asyncio.run(bot.subs_command(update, SimpleNamespace(args=[])))
+
+    (added, _), (again, _), (listing, kwargs) = update.message.replies
+    assert added.startswith('🔔 Подписка: **iphone13**')
+    assert again == 'ℹ️ Уже есть подписка: **iphone13**'
+    assert '1. iphone13 — до 50 000 ₽' in listing and kwargs['parse_mode'] == 'Markdown'
+    assert store.subscriptions(5) == [(5, '*iphone_13*', 0, 50000)]
+
+
+def test_parser_fetches_through_host_budget(monkeypatch):
+    monkeypatch.setattr(Config, 'RETRY_BACKOFF_BASE', 0.0)
+    policy = FetchPolicy(retries=0)
+    monkeypatch.setattr(bot, 'get_policy', lambda: policy)
+    parser = bot.AvitoParser(CrawlScheduler(host_rate=4.0, jitter=0))
+    bucket = parser.scheduler.host(AVITO_HOST).bucket
+    hosts = []
+
+    async def submit(host, fn, *args):
+        hosts.append(host)
+        return 429, '', {}
+
+    monkeypatch.setattr(parser.scheduler, 'submit', submit)
+    with pytest.raises(BadStatusError):
+        asyncio.run(parser._fetch_page('iphone'))
+    assert hosts == [AVITO_HOST]
+    assert bucket.rate == 2.0               # блокировка замедлила бакет бота
+
+
+class FakeSender:
+    """submit() запоминает правки; future завершает тест"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, method, chat_id, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        self.calls.append((method, kwargs['text'], future))
+        return future
+
+
+def result(i):
+    return {'id': str(i), 'title': f"Ad {i}", 'price': 1000 * i, 'url': f"https://avito.ru/{i}",
+            'location': ''}
+
+
+def test_search_reply_edits_between_pages(monkeypatch):
+    monkeypatch.setattr(Config, 'BOT_EDIT_INTERVAL', 0.0)
+
+    async def run():
+        sender = FakeSender()
+        reply = bot.SearchReply(sender, 1, 10, 'iphone_13')
+        reply.add_page([result(1), result(2)])
+        reply.add_page([result(3)])               # первая правка еще не ушла - новой нет
+        assert len(sender.calls) == 1
+        sender.calls[0][2].set_result(None)
+        reply.add_page([result(4)])
+        assert len(sender.calls) == 2
+        sender.calls[1][2].set_result(None)
+
+        finishing = asyncio.ensure_future(reply.finish([result(i) for i in range(1, 6)]))
+        await asyncio.sleep(0)
+        sender.calls[2][2].set_result(None)
+        await finishing
+        return [text for _, text, _ in sender.calls]
+
+    first, second, final = asyncio.run(run())
+    assert first.startswith('🔍 **iphone13** — 2...')
+    assert second.startswith('🔍 **iphone13** — 4...')
+    assert final.startswith('🔍 **iphone13** — 5\n') and final.count('\n5. ') == 1
+
+
+def test_search_reply_nothing_found():
+    async def run():
+        sender = FakeSender()
+        reply = bot.SearchReply(sender, 1, 10, 'q')
+        finishing = asyncio.ensure_future(reply.finish([]))
+        await asyncio.sleep(0)
+        sender.calls[0][2].set_result(None)
+        await finishing
+        return sender.calls[0][1]
+
+    assert asyncio.run(run()) == '😕 По запросу **q** ничего не найдено'
+
+
+def test_fetch_ads_reports_pages_until_limit(monkeypatch, tmp_path):
+    pages = Pages(sorted(FIXTURES_DIR.glob('*.html')), 3)
+    requested = []
+
+    async def fetch_page(query, page=1):
+        requested.append(page)
+        return pages.render(query, page)
+
+    monkeypatch.setattr(bot, 'get_cache', lambda: ResultCache(tmp_path / 'cache'))
+    parser = bot.AvitoParser(CrawlScheduler(jitter=0))
+    monkeypatch.setattr(parser, '_fetch_page', fetch_page)
+    seen = []
+
+    ads = asyncio.run(parser.fetch_ads('iphone', 120, on_page=lambda page: seen.append(len(page))))
+    assert len(ads) == len({ad.id for ad in ads}) == 120
+    assert requested == [1, 2, 3]
+    assert seen == [50, 50]                 # последняя страница приходит только результатом
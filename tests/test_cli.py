@@ -0,0 +1,65 @@
+import sys
+import types
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from src import cli
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def fake_command(monkeypatch):
+    """Подкоманда fake -> модуль fake_cmd, который запоминает свои sys.argv"""
+    module = types.ModuleType('fake_cmd')
+    module.calls = []
+
+    def main():
+        module.calls.append(list(sys.argv))
+
+    async def main_async():
+        module.calls.append('async')
+
+    module.main, module.main_async = main, main_async
+    monkeypatch.setitem(sys.modules, 'fake_cmd', module)
+    monkeypatch.setitem(cli.COMMANDS, 'fake', ('fake_cmd', 'main', 'test command'))
+    monkeypatch.setitem(cli.COMMANDS, 'fake-async', ('fake_cmd', 'main_async', 'test command'))
+    monkeypatch.setattr(sys, 'argv', list(sys.argv))
+    return module
+
+
+def test_arguments_are_passed_to_the_command(fake_command):
+    cli.main(['fake', '--daemon', '-n', '3'])
+    assert fake_command.calls == [['avitotiger fake', '--daemon', '-n', '3']]
+
+
+def test_coroutine_commands_are_run(fake_command):
+    cli.main(['fake-async'])
+    assert fake_command.calls == ['async']
+
+
+def test_timings_go_to_stderr(fake_command, capsys):
+    cli.main(['--timings', 'fake'])
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert '⏱ import' in err and '⏱ total' in err
+
+
+def test_unknown_command_exits(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(['nope'])
+    assert 'invalid choice' in capsys.readouterr().err
+
+
+def test_every_command_points_to_a_function():
+    for module_name, func_name, _ in cli.COMMANDS.values():
+        path = ROOT / (module_name.replace('.', '/') + '.py')
+        assert f"def {func_name}(" in path.read_text(encoding='utf-8'), module_name
+
+
+def test_cli_does_not_import_subcommand_dependencies():
+    code = "import sys; import src.cli; print(sorted({'telegram', 'aiohttp', 'numpy', 'matplotlib'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
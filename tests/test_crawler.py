@@ -0,0 +1,97 @@
+import time
+import asyncio
+
+from src.crawler import CrawlScheduler, HostBudget
+
+
+def scheduler(**kwargs):
+    """Планировщик без пауз, если в тесте не сказано иное"""
+    options = dict(concurrency=8, host_concurrency=4, host_rate=0, host_burst=1, jitter=0)
+    options.update(kwargs)
+    return CrawlScheduler(**options)
+
+
+class Probe:
+    """Считает, сколько задач выполнялось одновременно"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, item, delay=0.02):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(delay)
+        self.active -= 1
+        return item * 2
+
+
+def test_map_keeps_order_and_returns_errors():
+    async def work(item):
+        await asyncio.sleep(0.001 * (5 - item))
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    results = asyncio.run(scheduler().map('a', work, range(5)))
+    assert results[:3] == [0, 1, 2] and results[4] == 4
+    assert isinstance(results[3], ValueError)
+
+
+def test_host_concurrency_is_limited():
+    probe = Probe()
+    results = asyncio.run(scheduler(host_concurrency=2).map('a', probe, range(6)))
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert probe.peak == 2
+
+
+def test_global_concurrency_is_shared_by_hosts():
+    probe = Probe()
+    crawl = scheduler(concurrency=3, host_concurrency=4)
+
+    async def run():
+        await asyncio.gather(
+            crawl.map('a', probe, range(4)),
+            crawl.map('b', probe, range(4)),
+        )
+
+    asyncio.run(run())
+    assert probe.peak == 3
+
+
+def test_host_budgets_are_separate():
+    async def run():
+        crawl = scheduler()
+        assert crawl.host('a') is crawl.host('a')
+        assert crawl.host('a') is not crawl.host('b')
+        return crawl
+
+    crawl = asyncio.run(run())
+    assert set(crawl._hosts) == {'a', 'b'}
+
+
+def test_host_rate_spaces_requests():
+    started = []
+
+    async def stamp(item):
+        started.append(time.monotonic())
+
+    asyncio.run(scheduler(host_rate=50, host_burst=1).map('a', stamp, range(4)))
+    gaps = [b - a for a, b in zip(started, started[1:])]
+    # Первый токен есть сразу, дальше - по одному в 1/50 сек
+    assert min(gaps) >= 0.015
+
+
+def test_budget_releases_slot_on_cancel():
+    async def run():
+        budget = HostBudget(concurrency=1, rate=0.5, burst=1, jitter=0)
+        async with budget:
+            pass
+        # Токен потрачен - следующий вход ждет бакет, держа слот
+        waiter = asyncio.ensure_future(budget.__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return budget.semaphore.locked()
+
+    assert asyncio.run(run()) is False
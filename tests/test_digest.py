@@ -0,0 +1,86 @@
+import asyncio
+
+from config.settings import Config
+from src.digest import MESSAGE_LIMIT, DigestNotifier, default_settings, digest_pages, md_safe
+
+
+def make_ads(n, query='iphone', price=50000, start=0):
+    return [{'id': str(start + i), 'query': query, 'title': f"Объявление {start + i}", 'price': price,
+             'url': f"https://www.avito.ru/{start + i}", 'location': 'Москва'} for i in range(n)]
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def test_small_digest_is_one_message():
+    pages = digest_pages(make_ads(3) + make_ads(2, 'ps5', start=3))
+    assert len(pages) == 1
+    assert pages[0].startswith('🆕 **Новые объявления: 5**')
+    assert '**iphone** (3)' in pages[0] and '**ps5** (2)' in pages[0]
+
+
+def test_pages_respect_size_and_message_limit():
+    ads = make_ads(25)
+    for ad in ads:
+        ad['title'] = 'x' * 60
+    pages = digest_pages(ads, page_size=10, max_pages=10)
+    assert len(pages) == 3
+    assert '(1/3)' in pages[0]
+    assert '**iphone** (продолжение)' in pages[1]
+    assert all(len(page) <= MESSAGE_LIMIT for page in pages)
+
+    long = make_ads(200)
+    for ad in long:
+        ad['url'] += '?' + 'x' * 200
+    pages = digest_pages(long, page_size=200, max_pages=100)
+    assert len(pages) > 1
+    assert all(len(page) <= MESSAGE_LIMIT for page in pages)
+
+
+def test_overflow_is_summarised_with_dashboard_link():
+    ads = make_ads(40) + make_ads(30, 'ps_5', start=40)
+    pages = digest_pages(ads, page_size=10, max_pages=3)
+    assert len(pages) == 3
+    assert pages[-1].count('•') == 10
+    assert '➕ Еще 40: ps5 (30), iphone (10)' in pages[-1]
+    assert Config.DASHBOARD_URL in pages[-1]
+
+
+def test_md_safe():
+    assert md_safe('*iphone_13* [`pro`]') == 'iphone13 pro'
+
+
+def test_notifier_deduplicates_and_splits_instant():
+    cheap = make_ads(2, price=1000, start=100)
+    normal = make_ads(4)
+    settings = {1: {**default_settings(), 'instant_max_price': 5000, 'max_instant': 1}}
+
+    async def run():
+        bot = FakeBot()
+        notifier = DigestNotifier(bot, [1, 2], settings)
+        for ad in cheap + normal:
+            notifier.add(ad)
+        notifier.add(normal[0])                     # повтор - не попадает
+        notifier.add(normal[1], recipients=[3])     # только подписчику 3
+        assert [len(notifier.ads[u]) for u in (1, 2, 3)] == [6, 6, 1]
+        sent = await notifier.flush()
+        assert notifier.ads == {}
+        return bot.sent, sent
+
+    sent_messages, sent = asyncio.run(run())
+    by_user = {}
+    for chat_id, text in sent_messages:
+        by_user.setdefault(chat_id, []).append(text)
+
+    # Пользователь 1: одно объявление отдельно (max_instant=1), остальные 5 - сводкой
+    assert len(by_user[1]) == 2
+    assert any('Новое объявление!' in t for t in by_user[1])
+    assert any('Новые объявления: 5' in t for t in by_user[1])
+    # Пользователь 2 - по умолчанию, одна сводка на все 6
+    assert len(by_user[2]) == 1 and 'Новые объявления: 6' in by_user[2][0]
+    assert sent == 4
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from src.extractor import BACKENDS, extract_ads, get_backend, has_next_page, iter_ads, parse_ads, scan_ids
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'avito_search.html'
+
+
+def available_backends():
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+@pytest.fixture(scope='module')
+def html():
+    return FIXTURE.read_text(encoding='utf-8')
+
+
+@pytest.fixture(scope='module')
+def reference(html):
+    return extract_ads(html, 100, available_backends()[0])
+
+
+def test_fixture_is_parsed(reference, html):
+    assert len(reference) == len(scan_ids(html, 100)) > 0
+    first = reference[0]
+    assert first.id and first.title and first.price > 0
+    assert first.url.startswith('https://www.avito.ru/')
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backends_agree(backend, html, reference):
+    assert extract_ads(html, 100, backend) == reference
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_limit_and_iter_ads(backend, html, reference):
+    assert extract_ads(html, 7, backend) == reference[:7]
+    assert list(iter_ads(html, 7, backend)) == reference[:7]
+
+
+def test_scan_ids_matches_parsed_ids(html, reference):
+    assert [ad_id for ad_id in scan_ids(html, 100) if ad_id] == [ad.id for ad in reference]
+
+
+def test_parse_ads_dicts(html, reference):
+    dicts = parse_ads(html, 3, query='iphone')
+    assert [d['id'] for d in dicts] == [ad.id for ad in reference[:3]]
+    assert all(d['query'] == 'iphone' and d['found_at'] for d in dicts)
+
+
+def test_empty_page(html):
+    assert extract_ads('<html><body></body></html>', 10) == []
+    assert not has_next_page('<html></html>')
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend('regex')
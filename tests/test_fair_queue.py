@@ -0,0 +1,100 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.search_processor import FairQueue, claim
+
+
+def make_queue(tmp_path, chats):
+    """chats - chat_id по порядку файлов в очереди"""
+    files = []
+    for i, chat_id in enumerate(chats):
+        path = tmp_path / f"{i:03d}.json"
+        path.write_text(json.dumps({'chat_id': chat_id, 'query': f"q{i}"}), encoding='utf-8')
+        files.append(path)
+    return FairQueue(files)
+
+
+def test_round_robin_over_chats(tmp_path):
+    queue = make_queue(tmp_path, [1, 1, 1, 2, 3, 3])
+    order = []
+    while True:
+        job = queue.next()
+        if job is None:
+            break
+        chat, path = job
+        order.append((chat, path.name))
+        queue.done(chat)
+    assert [chat for chat, _ in order] == [1, 2, 3, 1, 3, 1]
+    # Внутри чата - порядок очереди
+    assert [name for chat, name in order if chat == 1] == ['000.json', '001.json', '002.json']
+
+
+def test_busy_chat_is_skipped_until_done(tmp_path):
+    queue = make_queue(tmp_path, [1, 1, 2])
+    assert queue.next()[0] == 1
+    assert queue.next()[0] == 2
+    # Чат 1 занят - следующий поток ждет, пока его не отпустят
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(queue.next()))
+    waiter.start()
+    time.sleep(0.05)
+    assert not got
+    queue.done(1)
+    waiter.join(1)
+    assert got and got[0][0] == 1
+
+
+def test_workers_never_run_one_chat_in_parallel(tmp_path):
+    chats = [i % 3 for i in range(30)] + [7] * 10
+    queue = make_queue(tmp_path, chats)
+    lock = threading.Lock()
+    active, done, overlaps = set(), [], []
+
+    def worker():
+        while True:
+            job = queue.next()
+            if job is None:
+                return
+            chat, path = job
+            with lock:
+                if chat in active:
+                    overlaps.append(chat)
+                active.add(chat)
+            time.sleep(0.002)
+            with lock:
+                active.discard(chat)
+                done.append(path.name)
+            queue.done(chat)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        for _ in range(6):
+            pool.submit(worker)
+
+    assert not overlaps
+    assert sorted(done) == sorted(f"{i:03d}.json" for i in range(len(chats)))
+
+
+def test_unreadable_file_still_queued(tmp_path):
+    bad = tmp_path / 'bad.json'
+    bad.write_text('{', encoding='utf-8')
+    queue = FairQueue([bad])
+    assert queue.next() == (None, bad)
+
+
+def test_only_one_claim_wins(tmp_path):
+    path = tmp_path / 'req.json'
+    path.write_text('{}', encoding='utf-8')
+    barrier = threading.Barrier(8)
+
+    def try_claim():
+        barrier.wait()
+        return claim(path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: try_claim(), range(8)))
+
+    winners = [r for r in results if r is not None]
+    assert len(winners) == 1
+    assert winners[0].exists() and not path.exists()
@@ -0,0 +1,161 @@
+import gc
+import time
+import asyncio
+
+import aiohttp
+import pytest
+
+from config.settings import Config
+from src.fetch_policy import CircuitBreaker, CircuitOpenError, FetchPolicy, backoff_delay
+from src.ratelimit import TokenBucket
+
+HOST = 'avito.test'
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Паузы повторов - нулевые"""
+    monkeypatch.setattr(Config, 'RETRY_BACKOFF_BASE', 0.0)
+
+
+def responses(*items):
+    """request() для call(): отдает items по очереди (исключения - бросает)"""
+    calls = []
+
+    async def request():
+        item = items[min(len(calls), len(items) - 1)]
+        calls.append(item)
+        if isinstance(item, Exception):
+            raise item
+        return item, 'body', {}
+
+    return request, calls
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(n, base=1, cap=5) <= 5 for n in range(20))
+    assert backoff_delay(3, base=0, cap=5) == 0
+
+
+def test_breaker_transitions():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    assert breaker.state == 'closed'
+    breaker.failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    assert breaker.allow()          # одна пробная
+    assert not breaker.allow()
+    breaker.release()               # проба ничего не сказала - можно еще одну
+    assert breaker.allow()
+
+    breaker.failure()               # проба заблокирована - снова open
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+
+def test_retries_server_errors_then_succeeds():
+    request, calls = responses(500, 502, 200)
+    status, body, _ = asyncio.run(FetchPolicy(retries=3).call(HOST, request))
+    assert status == 200 and body == 'body'
+    assert calls == [500, 502, 200]
+
+
+def test_returns_last_response_after_retries():
+    request, calls = responses(503)
+    status, _, _ = asyncio.run(FetchPolicy(retries=2).call(HOST, request))
+    assert status == 503 and len(calls) == 3
+
+
+def test_network_errors_raise_after_retries():
+    request, calls = responses(aiohttp.ClientConnectionError('reset'))
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(FetchPolicy(retries=2).call(HOST, request))
+    assert len(calls) == 3
+
+
+def test_blocks_open_breaker_and_stop_requests(monkeypatch):
+    monkeypatch.setattr(Config, 'BREAKER_THRESHOLD', 2)
+    policy = FetchPolicy(retries=5)
+    request, calls = responses(429)
+    status, _, _ = asyncio.run(policy.call(HOST, request))
+    assert status == 429
+    assert len(calls) == 2          # после второй блокировки - без повторов
+    assert policy.breaker(HOST).state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call(HOST, request))
+    assert len(calls) == 2
+
+
+def test_aimd_rate_of_attached_bucket(monkeypatch):
+    monkeypatch.setattr(Config, 'THROTTLE_RECOVERY', 0.25)
+    policy = FetchPolicy(retries=0)
+    bucket = TokenBucket(4.0)
+    policy.attach(HOST, bucket)
+
+    blocked, _ = responses(429)
+    asyncio.run(policy.call(HOST, blocked))
+    assert bucket.rate == 2.0
+    asyncio.run(policy.call(HOST, blocked))
+    assert bucket.rate == 1.0
+
+    ok, _ = responses(200)
+    asyncio.run(policy.call(HOST, ok))
+    assert bucket.rate == 2.0
+    for _ in range(10):
+        asyncio.run(policy.call(HOST, ok))
+    assert bucket.rate == 4.0       # не выше исходного темпа
+
+
+def test_unlimited_bucket_is_not_attached():
+    policy = FetchPolicy(retries=0)
+    bucket = TokenBucket(0)
+    policy.attach(HOST, bucket)
+    blocked, _ = responses(429)
+    asyncio.run(policy.call(HOST, blocked))
+    assert bucket.rate == 0
+
+
+def test_call_sync_shares_breaker_with_async(monkeypatch):
+    monkeypatch.setattr(Config, 'BREAKER_THRESHOLD', 2)
+    policy = FetchPolicy(retries=3)
+    calls = []
+
+    def request():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionResetError('reset')   # requests.ConnectionError - тоже OSError
+        return 500 if len(calls) == 2 else 200, 'ok', {}
+
+    assert policy.call_sync(HOST, request)[0] == 200
+    assert len(calls) == 3
+
+    blocked, _ = responses(429)
+    asyncio.run(policy.call(HOST, blocked))
+    with pytest.raises(CircuitOpenError):
+        policy.call_sync(HOST, request)
+
+
+def test_every_attached_bucket_is_throttled():
+    policy = FetchPolicy(retries=0)
+    parser_bucket, bot_bucket = TokenBucket(4.0), TokenBucket(2.0)
+    policy.attach(HOST, parser_bucket)
+    policy.attach(HOST, bot_bucket)
+    policy.attach(HOST, bot_bucket)         # повторное подключение не меняет потолок
+
+    blocked, _ = responses(429)
+    asyncio.run(policy.call(HOST, blocked))
+    assert (parser_bucket.rate, bot_bucket.rate) == (2.0, 1.0)
+
+    del parser_bucket
+    gc.collect()
+    assert list(policy._buckets[HOST]) == [bot_bucket]
@@ -0,0 +1,101 @@
+import json
+import asyncio
+
+import pytest
+
+from config.settings import Config
+from src import inline_search
+from src.extractor import Ad
+from src.inline_search import Completions, InlineSearch, build_results, rank
+from src.result_cache import ResultCache
+
+
+def ad(ad_id, title='iPhone 13', url=None):
+    return Ad(ad_id, title, 50000, f"https://www.avito.ru/{ad_id}" if url is None else url, '', 'Москва')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / 'cache', ttl=60)
+    monkeypatch.setattr(inline_search, 'get_cache', lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def completions(tmp_path):
+    trends = tmp_path / 'trends.json'
+    trends.write_text(json.dumps({'iphone 13': 5, 'iPhone 13 pro': 9, 'iphone 12': 2, 'ps5': 7}),
+                      encoding='utf-8')
+    return Completions(trends)
+
+
+def test_build_results_skips_ads_without_url():
+    results = build_results([ad('1'), ad('2', url=''), ad('3')], 'iphone')
+    assert [r.id for r in results] == ['1', '3']
+    assert results[0].url == 'https://www.avito.ru/1'
+    assert results[0].reply_markup.inline_keyboard[0][0].url == results[0].url
+    assert results[0].description == '50 тыс ₽ · Москва'
+
+
+def test_rank_prefers_title_matches():
+    ads = [ad('1', 'Чехол'), ad('2', 'iPhone 13 Pro'), ad('3', 'iPhone 12')]
+    assert [a.id for a in rank(ads, 'iphone 13')] == ['2', '3', '1']
+
+
+def test_completions_by_popularity(completions):
+    assert completions.complete('iPh', 2) == ['iphone 13 pro', 'iphone 13']
+    assert completions.complete('xbox', 3) == []
+
+
+def test_lookup_falls_back_to_cached_completion(cache, completions):
+    cache.put('iphone 13 pro', [ad('9', 'iPhone 13 Pro')], Config.BOT_SEARCH_RESULTS)
+    started = asyncio.Event()
+
+    async def slow_fetch(query, limit):
+        started.set()
+        await asyncio.sleep(1)
+        return []
+
+    async def run():
+        search = InlineSearch(slow_fetch, completions)
+        ads = await search.lookup('iphone', timeout=0.05)
+        for task in list(search.tasks):
+            task.cancel()
+        await asyncio.gather(*search.tasks, return_exceptions=True)
+        return ads
+
+    assert [a.id for a in asyncio.run(run())] == ['9']
+
+
+def test_answer_debounces_and_prefetches(cache, completions, monkeypatch):
+    monkeypatch.setattr(Config, 'INLINE_DEBOUNCE', 0.02)
+    fetched, answers = [], []
+
+    async def fetch(query, limit):
+        fetched.append(query)
+        ads = [ad(query.replace(' ', '-'))]
+        cache.put(query, ads, limit)
+        return ads
+
+    class FakeInlineQuery:
+        def __init__(self, query_id, text):
+            self.id = query_id
+            self.query = text
+            self.from_user = type('User', (), {'id': 1})()
+
+        async def answer(self, results, **kwargs):
+            answers.append((self.query, [r.id for r in results]))
+
+    async def run():
+        search = InlineSearch(fetch, completions)
+        done = await asyncio.gather(
+            search.answer(FakeInlineQuery('a', 'iph')),
+            search.answer(FakeInlineQuery('b', 'iphone')),
+        )
+        await asyncio.gather(*search.tasks)
+        return done
+
+    assert asyncio.run(run()) == [False, True]
+    assert answers == [('iphone', ['iphone'])]
+    # Продолжения 'iphone' загружены в кэш заранее
+    assert sorted(fetched) == ['iphone', 'iphone 12', 'iphone 13', 'iphone 13 pro']
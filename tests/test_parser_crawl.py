@@ -0,0 +1,120 @@
+import zlib
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from src.crawler import CrawlScheduler
+from src.extractor import scan_ids
+from src.parser import AvitoParser
+from src.seen_index import SeenIndex
+from tests.avito_stub import FIXTURES_DIR, Pages
+
+QUERY = 'iphone 13'
+
+
+class StubParser(AvitoParser):
+    """Парсер, у которого _get отдает страницы заглушки без сети (ETag - как у avito_stub).
+    Страница n отвечает через latency * n секунд"""
+
+    def __init__(self, max_pages=3, fail_pages=(), latency=0.0):
+        super().__init__(CrawlScheduler(host_rate=0, jitter=0))
+        self.pages = Pages(sorted(FIXTURES_DIR.glob('*.html')), max_pages)
+        self.fail_pages = set(fail_pages)
+        self.latency = latency
+        self.requests = []
+        self.cancelled = []
+
+    async def _get(self, query, page=1, headers=None):
+        self.requests.append(page)
+        try:
+            await asyncio.sleep(self.latency * page)
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        if page in self.fail_pages:
+            return 500, '', {}
+        if page > self.pages.max_pages:
+            return 404, '', {}
+        html = self.pages.render(query, page)
+        etag = f'"{zlib.crc32(html.encode()):08x}"'
+        if headers and headers.get('If-None-Match') == etag:
+            return 304, '', {'ETag': etag}
+        return 200, html, {'ETag': etag}
+
+
+@pytest.fixture
+def seen(tmp_path):
+    return SeenIndex(tmp_path / 'seen.idx')
+
+
+def test_first_crawl_pages_until_max_ads(seen):
+    parser = StubParser()
+    ads, state = asyncio.run(parser.crawl(QUERY, seen, max_ads=80))
+    assert len(ads) == 80 and len({ad['id'] for ad in ads}) == 80
+    assert state['etag'] and state['fingerprint'] and state['changed_at']
+    assert parser.requests[:2] == [1, 2]
+
+
+def test_unchanged_page_is_skipped_by_etag_then_fingerprint(seen):
+    parser = StubParser()
+    _, state = asyncio.run(parser.crawl(QUERY, seen, max_ads=10))
+    parser.requests.clear()
+
+    ads, again = asyncio.run(parser.crawl(QUERY, seen, state, max_ads=10))
+    assert ads == [] and parser.requests == [1]          # 304
+    assert again['fingerprint'] == state['fingerprint']
+
+    # Без ETag страница приходит целиком, но список ID тот же
+    ads, again = asyncio.run(parser.crawl(QUERY, seen, dict(state, etag=None), max_ads=10))
+    assert ads == [] and again['changed_at'] == state['changed_at']
+
+
+def test_stops_at_first_seen_id(seen):
+    parser = StubParser()
+    ids = scan_ids(parser.pages.render(QUERY, 1), 100)
+    for ad_id in ids[7:]:
+        seen.add(ad_id)
+
+    ads, state = asyncio.run(parser.crawl(QUERY, seen, {'query': QUERY, 'fingerprint': 'old'}))
+    assert [ad['id'] for ad in ads] == ids[:7]
+    assert parser.requests == [1]                        # дальше первой страницы не пошли
+    assert state['fingerprint'] != 'old'
+
+
+async def collect(parser, **kwargs):
+    ads = [ad async for ad in parser.iter_ads(QUERY, **kwargs)]
+    leftover = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    return ads, leftover
+
+
+def test_iter_ads_walks_all_pages(seen):
+    parser = StubParser(max_pages=3)
+    ads, leftover = asyncio.run(collect(parser, prefetch=1))
+    assert len(ads) == len({ad['id'] for ad in ads}) == 150
+    assert not leftover
+    # Страница 4 успела загрузиться заранее (404), ее ошибка забрана в finally
+    assert parser.requests == [1, 2, 3, 4]
+
+
+def test_iter_ads_prefetches_and_cancels_on_break():
+    async def run(parser):
+        async with aclosing(parser.iter_ads(QUERY, prefetch=2)) as ads:
+            async for _ in ads:
+                break
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    parser = StubParser(max_pages=5, latency=0.05)
+    leftover = asyncio.run(run(parser))
+    assert parser.requests == [1, 2, 3]
+    assert sorted(parser.cancelled) == [2, 3]
+    assert not leftover
+
+
+def test_crawl_keeps_first_page_when_paging_fails(seen, capsys):
+    parser = StubParser(fail_pages={2})
+    ads, state = asyncio.run(parser.crawl(QUERY, seen, max_ads=100))
+    assert len(ads) == 50
+    assert state['fingerprint']
+    assert 'stopped paging after 50 ads' in capsys.readouterr().out
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from src.price_archive import PriceArchive
+
+T0 = 1_700_000_000
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return PriceArchive(tmp_path / 'archive')
+
+
+def test_append_and_tail(archive, tmp_path):
+    archive.append('iphone', [(T0 + i, 1000 + i) for i in range(5)])
+    archive.append('iphone', [(T0 + 5, 2000.5)])
+    assert archive.count('iphone') == 6
+    assert archive.tail('iphone', 2) == [(T0 + 4, 1004.0), (T0 + 5, 2000.5)]
+    assert archive.tail('iphone', 100)[0] == (T0, 1000.0)
+    assert archive.tail('missing', 3) == []
+
+    reopened = PriceArchive(tmp_path / 'archive')
+    assert reopened.queries() == ['iphone']
+    assert reopened.count('iphone') == 6
+
+
+def test_append_many_groups_by_query(archive):
+    archive.append_many([('a', 10, T0), ('b', 20, T0), ('a', 11, T0 + 1)])
+    assert archive.tail('a', 5) == [(T0, 10.0), (T0 + 1, 11.0)]
+    assert archive.tail('b', 5) == [(T0, 20.0)]
+
+
+def test_torn_write_is_realigned(archive):
+    archive.append('q', [(T0, 1), (T0 + 1, 2)])
+    path = archive._dir('q')
+    # Запись оборвалась: время дописано, цена - нет
+    with open(path / 'ts.i8', 'ab') as f:
+        f.write((T0 + 2).to_bytes(8, 'little'))
+    assert archive.count('q') == 2
+
+    archive.append('q', [(T0 + 3, 4)])
+    assert (path / 'ts.i8').stat().st_size == (path / 'price.f8').stat().st_size == 24
+    assert archive.tail('q', 5) == [(T0, 1.0), (T0 + 1, 2.0), (T0 + 3, 4.0)]
+
+
+def test_slice_is_half_open(archive):
+    archive.append('q', [(T0 + 10 * i, i) for i in range(10)])
+    ts, prices = archive.slice('q', T0 + 20, T0 + 50)
+    assert list(ts) == [T0 + 20, T0 + 30, T0 + 40]
+    assert list(prices) == [2.0, 3.0, 4.0]
+    assert len(archive.slice('q')[0]) == 10
+    assert len(archive.slice('q', end=T0)[0]) == 0
+    assert len(archive.slice('missing')[0]) == 0
+
+
+def test_recent_matches_prices_json_format(archive):
+    archive.append('q', [('2024-01-01T10:00:00', 1500), ('2024-01-01T11:00:00', 1499.5)])
+    assert archive.recent(1) == {'q': [{'price': 1499.5, 'time': '2024-01-01T11:00:00'}]}
+    assert archive.recent(5)['q'][0] == {'price': 1500, 'time': '2024-01-01T10:00:00'}
+
+
+def test_import_json_once(archive, tmp_path):
+    prices = tmp_path / 'prices.json'
+    prices.write_text(json.dumps({'q': [
+        {'price': 2, 'time': '2024-01-01T11:00:00'},
+        {'price': 1, 'time': '2024-01-01T10:00:00'},
+    ]}), encoding='utf-8')
+    archive.import_json(prices)
+    archive.import_json(prices)
+    assert [p for _, p in archive.tail('q', 5)] == [1.0, 2.0]
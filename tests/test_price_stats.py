@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.price_archive import PriceArchive
+from src.price_stats import DAY, PERCENTILES, PriceHistory, summarize, to_records
+
+NOW = 1_750_000_000
+
+
+@pytest.fixture
+def archive(tmp_path):
+    rng = np.random.default_rng(7)
+    archive = PriceArchive(tmp_path / 'archive')
+    for query, n in (('iphone 13', 400), ('ps5', 37), ('one', 1)):
+        ts = np.sort(rng.integers(NOW - 10 * DAY, NOW, n))
+        prices = rng.integers(1_000, 90_000, n).astype(float)
+        archive.append(query, zip(ts.tolist(), prices.tolist()))
+    archive.append('zero', [(NOW - 5, 0.0), (NOW - 3, 100.0), (NOW - 1, 120.0)])
+    return archive
+
+
+def naive(ts, prices, now, window):
+    """Статистика одного запроса циклами - эталон для summarize()"""
+    out = {
+        'count': len(prices),
+        'mean': prices.mean(),
+        'median': np.percentile(prices, 50),
+        'min': prices.min(),
+        'max': prices.max(),
+        'last': prices[-1],
+    }
+    for p in PERCENTILES:
+        out[f'p{p}'] = np.percentile(prices, p)
+    returns = [math.log(b / a) for a, b in zip(prices, prices[1:]) if a > 0 and b > 0]
+    out['volatility'] = float(np.std(returns)) if len(returns) >= 2 else math.nan
+    before = [p for t, p in zip(ts, prices) if t <= now - window]
+    ref = before[-1] if before else math.nan
+    out['change_24h'] = (prices[-1] - ref) / ref * 100 if ref > 0 else math.nan
+    return out
+
+
+def test_summarize_matches_naive(archive):
+    history = PriceHistory.load(archive)
+    summary = summarize(history, now=NOW, windows={'24h': DAY})
+
+    for i, query in enumerate(history.queries):
+        ts, prices = archive.slice(query)
+        expected = naive(np.asarray(ts), np.asarray(prices), NOW, DAY)
+        for name, value in expected.items():
+            got = summary[name][i]
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(got), (query, name)
+            else:
+                assert got == pytest.approx(value), (query, name)
+
+
+def test_tail_keeps_last_points(archive):
+    history = PriceHistory.load(archive)
+    tail = history.tail(5)
+    for i, query in enumerate(history.queries):
+        _, prices = archive.slice(query)
+        lo, hi = tail.offsets[i], tail.offsets[i + 1]
+        assert tail.price[lo:hi].tolist() == list(prices[-5:])
+
+
+def test_load_since_and_empty_queries(archive):
+    history = PriceHistory.load(archive, queries=['ps5', 'missing'], since=NOW - 2 * DAY)
+    assert history.queries == ['ps5', 'missing']
+    assert history.lens[1] == 0
+    assert (history.ts >= NOW - 2 * DAY).all()
+
+    records = to_records(history, summarize(history, now=NOW))
+    assert records[1]['count'] == 0
+    assert records[1]['mean'] is None
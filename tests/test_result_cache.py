@@ -0,0 +1,162 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.extractor import Ad
+from src.result_cache import ResultCache, normalize
+
+
+def ads(n, prefix='a'):
+    return [Ad(f"{prefix}{i}", f"title {i}", 1000 + i, f"https://avito.ru/{i}", '', '') for i in range(n)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / 'cache', ttl=60, max_entries=10)
+
+
+def test_normalize():
+    assert normalize('  iPhone   13 ') == 'iphone 13'
+
+
+def test_put_get_and_disk_round_trip(cache, tmp_path):
+    cache.put('iPhone 13', ads(5), 5)
+    assert cache.get('iphone  13', 5) == ads(5)
+    assert cache.get('iphone 13', 3) == ads(3)
+    # Записи с limit=5 и 5 объявлениями мало для limit=10
+    assert cache.get('iphone 13', 10) is None
+
+    other = ResultCache(tmp_path / 'cache', ttl=60)
+    assert other.get('iphone 13', 5) == ads(5)
+
+
+def test_short_result_is_complete(cache):
+    cache.put('rare', ads(2), 10)
+    assert cache.get('rare', 50) == ads(2)
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', ttl=0)
+    cache.put('q', ads(1), 5)
+    time.sleep(0.01)
+    assert cache.get('q', 1) is None
+
+
+def test_concurrent_fetches_are_coalesced(cache):
+    calls = []
+
+    async def fetcher(query, limit):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return ads(limit)
+
+    async def run():
+        return await asyncio.gather(*(cache.fetch('Same Query', 5, fetcher) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == ads(5) for r in results)
+
+
+def test_errors_reach_every_waiter_and_are_not_cached(cache):
+    calls = []
+
+    async def failing(query, limit):
+        calls.append(query)
+        await asyncio.sleep(0.02)
+        raise RuntimeError('HTTP 429')
+
+    async def ok(query, limit):
+        calls.append(query)
+        return ads(limit)
+
+    async def run():
+        results = await asyncio.gather(*(cache.fetch('q', 5, failing) for _ in range(5)),
+                                       return_exceptions=True)
+        assert len(calls) == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.get('q', 5) is None
+        assert not cache._inflight
+        return await cache.fetch('q', 5, ok)
+
+    assert asyncio.run(run()) == ads(5)
+    assert len(calls) == 2
+
+
+def test_fetch_sync_coalesces_threads(cache):
+    calls = []
+    lock = threading.Lock()
+
+    def fetcher(query, limit):
+        with lock:
+            calls.append(query)
+        time.sleep(0.05)
+        return ads(limit)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.fetch_sync('q', 5, fetcher), range(8)))
+
+    assert len(calls) == 1
+    assert all(r == ads(5) for r in results)
+
+
+def test_fetch_sync_error_is_not_cached(cache):
+    def failing(query, limit):
+        raise OSError('timeout')
+
+    with pytest.raises(OSError):
+        cache.fetch_sync('q', 5, failing)
+    assert cache.get('q', 5) is None
+
+
+def test_memory_lru_is_bounded(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', ttl=60, max_entries=3)
+    for i in range(5):
+        cache.put(f"q{i}", ads(1), 1)
+    assert list(cache._memory) == ['q2', 'q3', 'q4']
+    cache.prune()
+    assert len(list((tmp_path / 'cache').glob('*.json'))) == 3
+
+
+def test_empty_result_lives_only_empty_ttl(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', ttl=60, empty_ttl=0)
+    cache.put('captcha', [], 5)
+    cache.put('q', ads(1), 5)
+    time.sleep(0.01)
+    assert cache.get('captcha', 5) is None
+    assert cache.get('q', 5) == ads(1)
+
+
+def test_empty_result_is_still_coalesced(cache):
+    calls = []
+
+    async def fetcher(query, limit):
+        calls.append(query)
+        await asyncio.sleep(0.02)
+        return []
+
+    async def run():
+        return await asyncio.gather(*(cache.fetch('nothing', 5, fetcher) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[]] * 5
+    assert len(calls) == 1
+
+
+def test_fetch_sync_drops_key_locks(cache):
+    def fetcher(query, limit):
+        time.sleep(0.01)
+        return ads(limit)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.fetch_sync(f"q{i % 4}", 2, fetcher), range(16)))
+    assert cache._key_locks == {}
+
+    def failing(query, limit):
+        raise OSError('timeout')
+
+    with pytest.raises(OSError):
+        cache.fetch_sync('fail', 2, failing)
+    assert cache._key_locks == {}
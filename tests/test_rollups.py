@@ -0,0 +1,89 @@
+import json
+import statistics
+
+import numpy as np
+import pytest
+
+from src import rollups
+from src.price_archive import PriceArchive
+from src.price_stats import DAY, HOUR
+
+NOW = 1_750_000_000
+
+
+@pytest.fixture
+def archive(tmp_path):
+    rng = np.random.default_rng(3)
+    archive = PriceArchive(tmp_path / 'archive')
+    for query, n in (('iphone 13', 3000), ('ps5', 200)):
+        ts = np.sort(rng.integers(NOW - 800 * DAY, NOW, n))
+        prices = rng.integers(1_000, 90_000, n).astype(float)
+        archive.append(query, zip(ts.tolist(), prices.tolist()))
+    archive.append('old', [(NOW - 1000 * DAY, 5.0)])
+    return archive
+
+
+def naive_buckets(ts, prices, step, keep, shift):
+    current = (NOW + shift) // step
+    buckets = {}
+    for t, p in zip(ts, prices):
+        key = (t + shift) // step
+        if key > current - keep:
+            buckets.setdefault(key, []).append(p)
+    return {key * step - shift: values for key, values in sorted(buckets.items())}
+
+
+def test_build_matches_naive_buckets(archive):
+    series = rollups.build(archive, now=NOW)
+    offset = rollups._utc_offset()
+    shifts = {HOUR: 0, DAY: offset, rollups.WEEK: offset - rollups.WEEK_ORIGIN}
+
+    for query in ('iphone 13', 'ps5'):
+        ts, prices = archive.slice(query)
+        for name, step, keep in rollups.resolutions():
+            got = series[query][name]
+            expected = naive_buckets(ts.tolist(), prices.tolist(), step, keep, shifts[step])
+            assert got['step'] == step
+            assert len(got['t']) <= keep
+            assert got['t'] == list(expected)
+            assert got['n'] == [len(v) for v in expected.values()]
+            assert got['min'] == [round(min(v)) for v in expected.values()]
+            assert got['max'] == [round(max(v)) for v in expected.values()]
+            for mean, median, values in zip(got['mean'], got['median'], expected.values()):
+                assert abs(mean - statistics.mean(values)) <= 0.5
+                assert abs(median - statistics.median(values)) <= 0.5
+
+    assert series['old']['week']['n'] == []
+
+
+def test_generate_writes_index_and_shards(archive, tmp_path):
+    out = tmp_path / 'rollups'
+    out.mkdir()
+    (out / 'stale-0000.json').write_text('{}')
+
+    index = rollups.generate_rollups(out, archive, now=NOW)
+    assert [e['query'] for e in index['queries']] == ['iphone 13', 'ps5']
+    assert not (out / 'stale-0000.json').exists()
+
+    for entry in index['queries']:
+        shard = json.loads((out / entry['file']).read_text(encoding='utf-8'))
+        assert shard['query'] == entry['query']
+        assert set(shard) == {'query', 'hour', 'day', 'week'}
+        assert entry['n'] == sum(shard['week']['n'])
+
+    # Повторный запуск без новых данных ничего не переписывает
+    mtimes = {p.name: p.stat().st_mtime_ns for p in out.glob('*.json') if p.name != 'index.json'}
+    rollups.generate_rollups(out, archive, now=NOW)
+    assert mtimes == {p.name: p.stat().st_mtime_ns for p in out.glob('*.json') if p.name != 'index.json'}
+
+
+def test_shard_size_does_not_grow_with_history(tmp_path):
+    sizes = []
+    for days in (1000, 3000):   # оба длиннее самого длинного окна (104 недели)
+        archive = PriceArchive(tmp_path / f'archive{days}')
+        ts = np.arange(NOW - days * DAY, NOW, HOUR)
+        archive.append('q', ((int(t), 1000.0 + (t % 7)) for t in ts))
+        out = tmp_path / f'out{days}'
+        index = rollups.generate_rollups(out, archive, now=NOW)
+        sizes.append((out / index['queries'][0]['file']).stat().st_size)
+    assert sizes[0] == sizes[1]
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+
+from src.search_aggregator import LATEST_LIMIT, SearchAggregator
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def add_search(root, day, name, query, avg_price):
+    path = root / day / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        'query': query,
+        'timestamp': f"{day.replace('/', '-')}T{name[:2]}:00:00",
+        'avg_price': avg_price,
+    }), encoding='utf-8')
+
+
+def snapshot(agg):
+    stats = agg.stats(NOW)
+    stats.pop('updated')
+    return stats, agg.latest
+
+
+def test_incremental_update_matches_full_rebuild(tmp_path):
+    searches = tmp_path / 'searches'
+    state = tmp_path / 'state.json'
+    batches = [
+        [('2025/12/31', 'iphone', 100)],
+        [('2026/02/28', 'ps5', 300), ('2026/03/01', 'iphone', 200)],
+        [('2026/03/01', 'macbook', 900)],                                   # тот же день, новый файл
+        [('2026/03/02', 'iphone', 150), ('2026/03/02', 'ps5', 350)] * 30,  # больше LATEST_LIMIT
+    ]
+
+    n = 0
+    for batch in batches:
+        for day, query, price in batch:
+            add_search(searches, day, f"{n % 24:02d}_{n}.json", query, price)
+            n += 1
+        agg = SearchAggregator.load(searches, state)
+        assert agg.update() == len(batch)
+        agg.save()
+
+    incremental = SearchAggregator.load(searches, state)
+    assert incremental.update() == 0
+
+    full = SearchAggregator(searches, tmp_path / 'other.json')
+    assert full.update() == n
+
+    assert snapshot(incremental) == snapshot(full)
+    stats, latest = snapshot(full)
+    assert stats['all_time']['total_searches'] == n
+    assert stats['today']['searches'] == 60
+    assert len(latest) == LATEST_LIMIT
+
+
+def test_unreadable_state_is_rebuilt(tmp_path):
+    searches = tmp_path / 'searches'
+    add_search(searches, '2026/03/02', '10_a.json', 'iphone', 100)
+    state = tmp_path / 'state.json'
+    state.write_text('{broken', encoding='utf-8')
+
+    agg = SearchAggregator.load(searches, state)
+    assert agg.update() == 1
+    assert agg.stats(NOW)['all_time']['top_queries'] == [{'count': 1, 'query': 'iphone'}]
+
+
+def test_latest_is_newest_first(tmp_path):
+    searches = tmp_path / 'searches'
+    # Имена как у search_processor: запрос_время_чат - по имени порядок был бы по запросу
+    add_search(searches, '2026/03/01', '23_zzz.json', 'zzz', 100)
+    add_search(searches, '2026/03/02', '09_aaa.json', 'aaa', 100)
+    add_search(searches, '2026/03/02', '11_mmm.json', 'mmm', 100)
+
+    agg = SearchAggregator(searches, tmp_path / 'state.json')
+    agg.update()
+    assert [s['query'] for s in agg.latest] == ['mmm', 'aaa', 'zzz']
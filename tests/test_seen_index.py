@@ -0,0 +1,96 @@
+import struct
+from datetime import datetime, timedelta
+
+from src.seen_index import BUCKET, HEADER, MAGIC, SeenIndex, ad_hash, _day
+
+
+def test_add_and_contains(tmp_path):
+    index = SeenIndex(tmp_path / 'seen.idx')
+    assert index.add('a1')
+    assert not index.add('a1')
+    assert 'a1' in index
+    assert 'a2' not in index
+    assert len(index) == 1
+
+
+def test_round_trip_keeps_ids_and_days(tmp_path):
+    path = tmp_path / 'seen.idx'
+    now = datetime.now()
+    index = SeenIndex(path)
+    for i in range(300):
+        index.add(f"id{i}", now - timedelta(days=i % 5))
+    index.save()
+
+    loaded = SeenIndex.load(path)
+    assert len(loaded) == 300
+    assert all(f"id{i}" in loaded for i in range(300))
+    assert 'other' not in loaded
+    assert loaded.count_since(now) == 60
+    assert loaded.count_since(now - timedelta(days=1)) == 120
+    for hashes in loaded.buckets.values():
+        assert list(hashes) == sorted(hashes)
+
+    # После загрузки новые ID видны сразу и попадают в файл при сохранении
+    assert loaded.add('fresh', now)
+    assert not loaded.add('id7')
+    assert 'fresh' in loaded
+    assert loaded.count_since(now) == 61
+    loaded.save()
+    assert 'fresh' in SeenIndex.load(path)
+
+
+def test_count_file_reads_headers_only(tmp_path):
+    path = tmp_path / 'seen.idx'
+    now = datetime.now()
+    index = SeenIndex(path)
+    for i in range(50):
+        index.add(f"id{i}", now - timedelta(days=i % 2))
+    index.save()
+
+    assert SeenIndex.count_file(path, now) == 25
+    assert SeenIndex.count_file(path, now - timedelta(days=1)) == 50
+    assert SeenIndex.count_file(tmp_path / 'missing.idx', now) == 0
+
+
+def test_expire_by_ttl(tmp_path):
+    now = datetime.now()
+    index = SeenIndex(tmp_path / 'seen.idx', ttl_days=10)
+    index.add('old', now - timedelta(days=30))
+    index.add('new', now)
+    index.expire(now)
+    assert 'old' not in index
+    assert 'new' in index
+    assert len(index) == 1
+
+
+def test_expire_drops_oldest_days_over_max_entries(tmp_path):
+    now = datetime.now()
+    index = SeenIndex(tmp_path / 'seen.idx', ttl_days=100, max_entries=5)
+    for day in range(4):
+        for i in range(3):
+            index.add(f"d{day}-{i}", now - timedelta(days=day))
+    index.expire(now)
+    # Самые старые дни отбрасываются целиком, пока не влезет в max_entries
+    assert len(index) == 3
+    assert all(f"d0-{i}" in index for i in range(3))
+    assert 'd3-0' not in index
+
+
+def test_reads_v1_files_with_unsorted_buckets(tmp_path):
+    path = tmp_path / 'seen.idx'
+    hashes = [ad_hash(f"id{i}") for i in range(20)]
+    hashes.sort(reverse=True)
+    data = HEADER.pack(MAGIC, 1, 1) + BUCKET.pack(_day(), len(hashes))
+    data += struct.pack(f'<{len(hashes)}Q', *hashes)
+    path.write_bytes(data)
+
+    index = SeenIndex.load(path)
+    assert all(f"id{i}" in index for i in range(20))
+    assert 'id20' not in index
+
+
+def test_corrupted_file_starts_empty(tmp_path):
+    path = tmp_path / 'seen.idx'
+    path.write_bytes(b'garbage')
+    index = SeenIndex.load(path)
+    assert len(index) == 0
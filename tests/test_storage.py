@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from src.storage import Store, db_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    with Store(f"sqlite:///{tmp_path / 'bot.db'}") as store:
+        yield store
+
+
+def ad(ad_id, query='iphone', price=1000, found_at='2024-01-02T10:00:00'):
+    return {'id': ad_id, 'query': query, 'title': f"ad {ad_id}", 'price': price,
+            'url': f"https://avito.ru/{ad_id}", 'location': 'Москва', 'found_at': found_at}
+
+
+def test_db_path(tmp_path):
+    assert db_path(f"sqlite:///{tmp_path / 'x.db'}") == tmp_path / 'x.db'
+    assert db_path('sqlite:///./x.db').name == 'x.db'
+    with pytest.raises(ValueError):
+        db_path('postgresql://localhost/avito')
+
+
+def test_add_ads_keeps_first_seen(store):
+    store.add_ads([ad('1'), ad('2', found_at='2024-01-05T00:00:00')])
+    store.add_ads([ad('1', found_at='2024-02-01T00:00:00')])
+    assert store.new_ads_since('2024-01-01') == 2
+    assert store.new_ads_since('2024-01-03') == 1
+    assert store.new_ads_since('2024-02-01') == 0
+
+
+def test_query_counters(store):
+    store.bump_queries({'iphone': 2, 'ps5': 1})
+    store.bump_queries({'ps5': 3})
+    assert store.top_queries() == [('ps5', 4), ('iphone', 2)]
+    assert store.top_queries(1) == [('ps5', 4)]
+    assert store.total_searches() == 6
+    assert store.query_count() == 2
+
+
+def test_recent_searches(store):
+    items = [ad(str(i), price=1000 * (i + 1)) for i in range(5)]
+    store.add_search('iphone', items, chat_id=7, username='u', ts='2024-01-01T10:00:00')
+    store.add_search('ps5', [], ts='2024-01-02T10:00:00')
+    recent = store.recent_searches()
+    assert [s['query'] for s in recent] == ['ps5', 'iphone']
+    assert recent[1]['avg_price'] == 3000 and recent[1]['results_count'] == 5
+    assert len(recent[1]['items']) == 3     # хранятся только первые три
+    assert recent[0]['avg_price'] == 0 and recent[0]['items'] == []
+
+
+def test_subscriptions(store):
+    assert store.add_subscription(1, 'iphone', 0, 50000)
+    assert not store.add_subscription(1, 'iphone', 0, 50000)
+    assert store.add_subscription(1, 'ps5')
+    assert store.add_subscription(2, 'iphone')
+    assert store.subscriptions(1) == [(1, 'iphone', 0, 50000), (1, 'ps5', 0, 0)]
+    assert store.subscribed_queries() == [('iphone', 2), ('ps5', 1)]
+
+    assert store.remove_subscriptions(1, 'ps5') == 1
+    assert store.remove_subscriptions(1, 'ps5') == 0
+    assert store.remove_subscriptions(2) == 1
+    assert store.subscriptions() == [(1, 'iphone', 0, 50000)]
+
+
+def test_crawl_states_are_replaced(store):
+    state = {'query': 'iphone', 'etag': '"a"', 'last_modified': None, 'fingerprint': 'f1',
+             'checked_at': '2024-01-01', 'changed_at': '2024-01-01'}
+    store.save_crawl_states([state])
+    store.save_crawl_states([dict(state, etag='"b"', checked_at='2024-01-02')])
+    assert store.crawl_states() == {'iphone': dict(state, etag='"b"', checked_at='2024-01-02')}
+
+
+def test_import_trends_only_into_empty_db(store, tmp_path):
+    trends = tmp_path / 'trends.json'
+    trends.write_text(json.dumps({'iphone': 5}), encoding='utf-8')
+    store.import_trends(trends)
+    store.import_trends(trends)
+    assert store.top_queries() == [('iphone', 5)]
+    store.import_trends(tmp_path / 'missing.json')
+    assert store.total_searches() == 5
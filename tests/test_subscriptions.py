@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from src.subscriptions import SubscriptionIndex, format_bounds, parse_subscription
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('iphone 13', ('iphone 13', 0, 0)),
+    ('  iPhone   13  до 50000', ('iphone 13', 0, 50000)),
+    ('iphone 13 от 20000 до 50 000', ('iphone 13', 20000, 50000)),
+    ('ps5 to 30000 from 10000', ('ps5', 10000, 30000)),
+    ('велосипед от 5 000', ('велосипед', 5000, 0)),
+    ('билеты до москвы', ('билеты до москвы', 0, 0)),   # "до" без числа - часть запроса
+    ('до 50000', None),
+    ('', None),
+])
+def test_parse_subscription(text, expected):
+    assert parse_subscription(text) == expected
+
+
+def test_format_bounds():
+    assert format_bounds(0, 0) == 'любая цена'
+    assert format_bounds(20000, 50000) == 'от 20 000 ₽ до 50 000 ₽'
+
+
+def test_match_agrees_with_naive_filtering():
+    rng = random.Random(5)
+    rows = []
+    for chat_id in range(200):
+        query = rng.choice(['iphone 13', 'ps5'])
+        min_price = rng.choice([0, 0, 10_000, 20_000, 40_000])
+        max_price = rng.choice([0, 30_000, 50_000, 90_000])
+        rows.append((chat_id, query, min_price, max_price))
+    index = SubscriptionIndex(rows)
+    assert len(index) == 200
+    assert sorted(index.queries()) == ['iphone 13', 'ps5']
+
+    for query in ('iphone 13', ' PS5 ', 'macbook'):
+        for price in (0, 5_000, 10_000, 25_000, 30_000, 45_000, 100_000):
+            expected = {
+                chat_id for chat_id, q, lo, hi in rows
+                if q == query.strip().lower() and lo <= price
+                and (not hi or (price and price <= hi))
+            }
+            assert index.match(query, price) == expected, (query, price)
+
+
+def test_unknown_price_matches_only_open_filters():
+    index = SubscriptionIndex([(1, 'q', 0, 0), (2, 'q', 100, 0), (3, 'q', 0, 500)])
+    assert index.match('q', 0) == {1}
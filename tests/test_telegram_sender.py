@@ -0,0 +1,112 @@
+import time
+import asyncio
+
+from telegram.error import BadRequest, RetryAfter
+
+from config.settings import Config
+from src.telegram_sender import INTERACTIVE, NOTIFY, TelegramSender
+
+
+class FakeBot:
+    """Записывает отправленное; fail - {text: [исключения по очереди]}"""
+
+    def __init__(self, fail=None):
+        self.sent = []
+        self.fail = fail or {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        errors = self.fail.get(text)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((chat_id, text))
+        return f"ok:{text}"
+
+
+def run(scenario, bot, **limits):
+    """scenario(sender) внутри event loop; отправитель закрывается в конце"""
+    options = dict(rate=1000, burst=1000, chat_rate=1000, chat_burst=1000, group_rate=1000)
+    options.update(limits)
+
+    async def main():
+        sender = TelegramSender(bot, **options)
+        try:
+            return await scenario(sender)
+        finally:
+            await sender.close()
+
+    return asyncio.run(main())
+
+
+def test_messages_keep_order_within_chat():
+    bot = FakeBot()
+
+    async def scenario(sender):
+        futures = [sender.send_message(chat, f"{chat}-{i}") for i in range(5) for chat in (1, 2)]
+        return await asyncio.gather(*futures)
+
+    results = run(scenario, bot)
+    assert results[0] == 'ok:1-0'
+    for chat in (1, 2):
+        assert [t for c, t in bot.sent if c == chat] == [f"{chat}-{i}" for i in range(5)]
+
+
+def test_interactive_lane_goes_first():
+    bot = FakeBot()
+
+    async def scenario(sender):
+        notify = [sender.send_message(chat, 'digest', lane=NOTIFY) for chat in range(10, 20)]
+        await asyncio.sleep(0)
+        reply = sender.send_message(1, 'reply', lane=INTERACTIVE)
+        await asyncio.gather(reply, *notify)
+
+    # Общий лимит - 20 сообщений в секунду, один токен в запасе
+    run(scenario, bot, rate=20, burst=1)
+    texts = [t for _, t in bot.sent]
+    assert texts.index('reply') <= 2
+
+
+def test_group_chats_use_group_rate():
+    bot = FakeBot()
+
+    async def scenario(sender):
+        start = time.monotonic()
+        await asyncio.gather(*(sender.send_message(-100, str(i)) for i in range(3)))
+        return time.monotonic() - start
+
+    # В группу - 10 в секунду без запаса: третье сообщение не раньше 0.2 сек
+    assert run(scenario, bot, chat_burst=1, group_rate=10) >= 0.18
+
+
+def test_retry_after_pauses_and_retries(monkeypatch):
+    monkeypatch.setattr(Config, 'TG_SEND_RETRIES', 2)
+    bot = FakeBot(fail={'a': [RetryAfter(0.1)]})
+
+    async def scenario(sender):
+        start = time.monotonic()
+        first = sender.send_message(1, 'a')
+        other = sender.send_message(2, 'b')
+        await asyncio.gather(first, other)
+        return first.result(), time.monotonic() - start, sender._paused_until > 0
+
+    result, elapsed, paused = run(scenario, bot)
+    assert result == 'ok:a'
+    assert paused and elapsed >= 0.1
+    assert sorted(bot.sent) == [(1, 'a'), (2, 'b')]
+
+
+def test_errors_reach_the_future(monkeypatch):
+    monkeypatch.setattr(Config, 'TG_SEND_RETRIES', 1)
+    bot = FakeBot(fail={
+        'bad': [BadRequest('chat not found')],
+        'flood': [RetryAfter(0.01), RetryAfter(0.01)],
+    })
+
+    async def scenario(sender):
+        futures = [sender.send_message(1, 'bad'), sender.send_message(1, 'flood'),
+                   sender.send_message(1, 'next')]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    bad, flood, after = run(scenario, bot)
+    assert isinstance(bad, BadRequest)
+    assert isinstance(flood, RetryAfter)
+    assert after == 'ok:next'
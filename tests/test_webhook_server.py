@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telegram import Bot
+
+from src.webhook_server import SECRET_HEADER, WebhookServer
+
+SECRET = 's3cret'
+UPDATE = {'update_id': 1, 'message': {
+    'message_id': 5, 'date': 0, 'chat': {'id': 7, 'type': 'private'}, 'text': '/search iphone',
+}}
+
+
+def call(*requests):
+    """Отправить запросы (method, path, kwargs) серверу с фейковым Application;
+    возвращает ([(status, text)], очередь апдейтов, сервер)"""
+    async def run():
+        app = SimpleNamespace(bot=Bot('123:test'), update_queue=asyncio.Queue())
+        server = WebhookServer(app, SECRET, path='/hook', port=0)
+        statuses = []
+        async with TestClient(TestServer(server.web)) as client:
+            for method, path, kwargs in requests:
+                response = await client.request(method, path, **kwargs)
+                statuses.append((response.status, await response.text()))
+        return statuses, app.update_queue, server
+
+    return asyncio.run(run())
+
+
+def test_update_is_queued():
+    statuses, queue, server = call(('POST', '/hook', {'json': UPDATE, 'headers': {SECRET_HEADER: SECRET}}))
+    assert statuses[0][0] == 200
+    update = queue.get_nowait()
+    assert update.update_id == 1 and update.message.text == '/search iphone'
+    assert server.received == 1
+
+
+@pytest.mark.parametrize('headers', [{}, {SECRET_HEADER: 'wrong'}])
+def test_wrong_secret_is_rejected(headers):
+    statuses, queue, server = call(('POST', '/hook', {'json': UPDATE, 'headers': headers}))
+    assert statuses[0][0] == 403
+    assert queue.empty() and server.rejected == 1
+
+
+@pytest.mark.parametrize('body', [
+    {'data': 'not json'},
+    {'json': [1, 2]},
+    {'json': {}},
+    {'json': {'message': {}}},                                      # нет update_id - TypeError
+    {'json': {'update_id': 1, 'message': {'message_id': 1}}},       # нет date - KeyError
+    {'json': {'update_id': 1, 'message': 'text'}},
+])
+def test_malformed_update_is_bad_request(body):
+    body = dict(body, headers={SECRET_HEADER: SECRET})
+    statuses, queue, server = call(('POST', '/hook', body))
+    assert statuses[0][0] == 400
+    assert queue.empty() and server.received == 0
+
+
+def test_health():
+    statuses, _, _ = call(
+        ('POST', '/hook', {'json': UPDATE, 'headers': {SECRET_HEADER: SECRET}}),
+        ('POST', '/hook', {'json': UPDATE}),
+        ('GET', '/healthz', {}),
+    )
+    assert [status for status, _ in statuses] == [200, 403, 200]
+    assert statuses[2][1] == '{"received": 1, "rejected": 1, "queued": 1}'
@@ -24,13 +24,16 @@ class AvitoCharts {
             // Обновляем цифры
             this.updateStats();
             
-            // Загружаем историю цен
-            const pricesResponse = await fetch('../data/prices.json');
-            this.prices = await pricesResponse.json();
-            
-            // Загружаем тренды
-            const trendsResponse = await fetch('../data/trends.json');
-            this.trends = await trendsResponse.json();
+            // Предагрегированные ряды (src/rollups.py): индекс + файлы топ-3 запросов
+            const indexResponse = await fetch('rollups/index.json');
+            this.rollups = await indexResponse.json();
+            this.trends = Object.fromEntries(this.rollups.trends || []);
+
+            const top = (this.rollups.queries || []).slice(0, 3);
+            this.series = await Promise.all(top.map(async (entry) => {
+                const response = await fetch(`rollups/${encodeURIComponent(entry.file)}`);
+                return response.json();
+            }));
             
         } catch (error) {
             console.log('Waiting for data...', error);
@@ -63,29 +66,33 @@ class AvitoCharts {
         const labels = [];
         const datasets = [];
 
-        if (this.prices) {
-            const topQueries = Object.keys(this.prices).slice(0, 3);
+        if (this.series) {
+            // Последние 24 часовые корзины, пропуски - null
+            const step = 3600 * 1000;
+            const last = Math.floor(Date.now() / step) * step;
+            const hours = [];
+            for (let i = 0; i < 24; i++) {
+                const hour = new Date(last - (23 - i) * step);
+                hours.push(hour.getTime() / 1000);
+                labels.push(hour.getHours() + ':00');
+            }
             
-            topQueries.forEach((query, index) => {
-                const data = this.prices[query]?.slice(-24).map(p => p.price) || [];
+            this.series.forEach((series, index) => {
+                const byTime = {};
+                const hourly = series.hour || {t: [], median: []};
+                hourly.t.forEach((t, i) => { byTime[t] = hourly.median[i]; });
                 const colors = ['#667eea', '#764ba2', '#48bb78'];
                 
                 datasets.push({
-                    label: query,
-                    data: data,
+                    label: series.query,
+                    data: hours.map(t => byTime[t] ?? null),
                     borderColor: colors[index],
                     backgroundColor: colors[index] + '20',
                     tension: 0.4,
+                    spanGaps: true,
                     fill: false
                 });
             });
-
-            // Последние 24 часа
-            for (let i = 0; i < 24; i++) {
-                const hour = new Date();
-                hour.setHours(hour.getHours() - (23 - i));
-                labels.push(hour.getHours() + ':00');
-            }
         }
 
         this.charts.price = new Chart(ctx, {